@@ -0,0 +1,115 @@
+"""
+Benchmark del motor de aristas técnicas.
+
+Compara la implementación anterior (bucle de Python sobre face_adjacency_angles
+con np.intersect1d por par de caras) contra extraer_aristas_tecnicas sobre
+meshes sintéticos de tamaño creciente, y verifica que el conjunto de aristas
+sea el mismo.
+
+Uso:
+    python benchmarks/bench_aristas.py
+    python benchmarks/bench_aristas.py --niveles 5 6 7 --sin-legado
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from convert_slddrw_to_pdf import extraer_aristas_tecnicas  # noqa: E402
+
+
+def extraer_legado(tm):
+    """Copia literal del algoritmo original, como referencia de tiempo y resultado"""
+    angulos_diedros = tm.face_adjacency_angles
+    umbral_angulo = np.radians(20)
+
+    aristas_tecnicas = []
+    if len(tm.face_adjacency) > 0:
+        for i, angulo in enumerate(angulos_diedros):
+            if abs(angulo) > umbral_angulo:
+                face_pair = tm.face_adjacency[i]
+                cara1 = tm.faces[face_pair[0]]
+                cara2 = tm.faces[face_pair[1]]
+                vertices_compartidos = np.intersect1d(cara1, cara2)
+                if len(vertices_compartidos) == 2:
+                    v1, v2 = tm.vertices[vertices_compartidos]
+                    aristas_tecnicas.append((tuple(v1), tuple(v2)))
+
+    aristas_borde = []
+    edges_unique = trimesh.grouping.group_rows(tm.edges_sorted, require_count=1)
+    for edge_idx in edges_unique:
+        edge = tm.edges[edge_idx]
+        v1, v2 = tm.vertices[edge]
+        aristas_borde.append((tuple(v1), tuple(v2)))
+
+    return list(set(aristas_tecnicas + aristas_borde))
+
+
+def crear_mesh_sintetico(nivel):
+    """
+    Pieza sintética con aristas vivas y superficies suaves: una caja subdividida
+    (aristas de 90°) junto a una esfera facetada, más una placa abierta para
+    generar bordes. Aproximadamente 40 * 4**nivel triángulos.
+    """
+    caja = trimesh.creation.box(extents=(2, 2, 2))
+    for _ in range(nivel):
+        caja = caja.subdivide()
+    esfera = trimesh.creation.icosphere(subdivisions=nivel, radius=0.8)
+    esfera.apply_translation((3, 0, 0))
+    placa = trimesh.creation.box(extents=(2, 2, 0.1))
+    placa.update_faces(placa.face_normals[:, 2] <= 0.5)  # quitar la tapa superior
+    placa.apply_translation((0, 3, 0))
+    return trimesh.util.concatenate([caja, esfera, placa])
+
+
+def conjunto_aristas(aristas):
+    """Conjunto de aristas independiente de la orientación, en float32"""
+    aristas = np.asarray(aristas, dtype=np.float32).reshape(-1, 2, 3)
+    return {tuple(sorted((tuple(a), tuple(b)))) for a, b in aristas}
+
+
+def medir(funcion, tm, repeticiones):
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        # Copia nueva para que trimesh no reutilice su cache entre repeticiones
+        copia = tm.copy()
+        inicio = time.perf_counter()
+        resultado = funcion(copia)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--niveles', type=int, nargs='+', default=[4, 5, 6, 7],
+                        help="Niveles de subdivisión de los meshes sintéticos")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--sin-legado', action='store_true',
+                        help="No medir la implementación anterior (lenta en meshes grandes)")
+    args = parser.parse_args()
+
+    print(f"{'Triángulos':>12} {'Aristas':>9} {'Legado (s)':>11} {'Vectorizado (s)':>16} {'Aceleración':>12}")
+    for nivel in args.niveles:
+        tm = crear_mesh_sintetico(nivel)
+        t_nuevo, aristas = medir(extraer_aristas_tecnicas, tm, args.repeticiones)
+
+        if args.sin_legado:
+            print(f"{len(tm.faces):>12} {len(aristas):>9} {'-':>11} {t_nuevo:>16.4f} {'-':>12}")
+            continue
+
+        t_legado, legado = medir(extraer_legado, tm, 1)
+        if conjunto_aristas(legado) != conjunto_aristas(aristas):
+            print(f"ERROR: el conjunto de aristas difiere en el nivel {nivel}")
+            return 1
+        print(f"{len(tm.faces):>12} {len(aristas):>9} {t_legado:>11.4f} {t_nuevo:>16.4f} {t_legado / t_nuevo:>11.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
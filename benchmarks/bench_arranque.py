@@ -0,0 +1,104 @@
+"""
+Benchmark del arranque de SOLIDPDF.
+
+Cada medida se toma en un intérprete nuevo, para que ninguna importación
+llegue ya cacheada: la importación del módulo (lo que espera la ventana), el
+coste en frío de cada subsistema diferido (ver SUBSISTEMAS), la carga de todos
+ellos seguidos (el arranque anterior, que lo importaba todo al inicio) y, si
+hay pantalla, el tiempo hasta que la ventana principal está dibujada. Se toma
+el mínimo de las repeticiones.
+
+Los subsistemas que no están instalados (p. ej. COM fuera de Windows) se
+omiten. bench_suite.py incluye estas medidas bajo la clave arranque/.
+
+Uso:
+    python benchmarks/bench_arranque.py
+    python benchmarks/bench_arranque.py --repeticiones 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en un proceso nuevo; imprime un JSON con los segundos de cada etapa
+CODIGO_MEDICION = r"""
+import json, sys, time
+inicio = time.perf_counter()
+import convert_slddrw_to_pdf as solidpdf
+medidas = {'importar_modulo': time.perf_counter() - inicio}
+modo = sys.argv[1]
+if modo == 'ventana':
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        medidas = {}
+    else:
+        solidpdf.App(root)
+        root.update()
+        medidas['ventana'] = time.perf_counter() - inicio
+        root.destroy()
+else:
+    disponibles = [nombre for nombre in sys.argv[2:]
+                   if all(modulo.disponible for modulo in solidpdf.SUBSISTEMAS[nombre])]
+    for nombre in disponibles:
+        inicio_subsistema = time.perf_counter()
+        solidpdf.cargar_subsistema(nombre)
+        medidas[nombre] = time.perf_counter() - inicio_subsistema
+    if modo == 'todo':
+        medidas = {'todo': time.perf_counter() - inicio}
+print(json.dumps(medidas))
+"""
+
+
+def medir_proceso(*argumentos):
+    """Ejecutar CODIGO_MEDICION en un intérprete nuevo y devolver sus medidas"""
+    salida = subprocess.run([sys.executable, '-c', CODIGO_MEDICION, *argumentos], cwd=RAIZ,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def medir_arranque(repeticiones, resultados):
+    """Agregar a `resultados` las medidas arranque/* (mínimo de las repeticiones)"""
+    sys.path.insert(0, RAIZ)
+    from convert_slddrw_to_pdf import SUBSISTEMAS
+
+    mejores = {}
+
+    def acumular(medidas):
+        for clave, segundos in medidas.items():
+            mejores[clave] = min(segundos, mejores.get(clave, float('inf')))
+
+    for _ in range(repeticiones):
+        for nombre in SUBSISTEMAS:
+            acumular({clave if clave == 'importar_modulo' else f"subsistema/{clave}": segundos
+                      for clave, segundos in medir_proceso('subsistema', nombre).items()})
+        acumular(medir_proceso('todo', *SUBSISTEMAS))
+        acumular({clave: segundos for clave, segundos in medir_proceso('ventana').items()
+                  if clave == 'ventana'})
+
+    for clave, segundos in mejores.items():
+        resultados[f"arranque/{clave}"] = segundos
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = medir_arranque(args.repeticiones, {})
+    print(f"{'Etapa':<36} {'ms':>9}")
+    for clave in sorted(resultados):
+        print(f"{clave:<36} {resultados[clave] * 1000:>9.1f}")
+    if 'arranque/ventana' not in resultados:
+        print("(sin pantalla: no se mide el tiempo hasta la ventana)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Benchmark del pool de exportación SLDDRW -> PDF.
+
+Usa el backend local (PDFs ficticios con latencia configurable) para medir
+cómo escala PoolExportacion con el número de procesos, sin SolidWorks.
+
+Uso:
+    python benchmarks/bench_exportacion.py
+    python benchmarks/bench_exportacion.py --planos 100 --latencia 0.2 --trabajadores 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from convert_slddrw_to_pdf import PoolExportacion  # noqa: E402
+
+
+def medir(num_trabajadores, planos, latencia, paginas):
+    """Exportar los planos con el backend local; devuelve (segundos, pdfs generados)"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = PoolExportacion('local', {'latencia': latencia, 'paginas': paginas},
+                               num_trabajadores=num_trabajadores)
+        pool.iniciar()  # El arranque de las sesiones no cuenta en el tiempo del lote
+        with pool:
+            inicio = time.perf_counter()
+            pdfs = pool.exportar(planos, temp_dir)
+            duracion = time.perf_counter() - inicio
+    # El orden de salida debe coincidir con el de entrada
+    for plano, pdf in zip(planos, pdfs):
+        nombre = os.path.splitext(os.path.basename(plano))[0]
+        if pdf is None or os.path.splitext(os.path.basename(pdf))[0] != nombre:
+            raise AssertionError(f"Orden de salida incorrecto en {plano}")
+    return duracion, sum(1 for pdf in pdfs if pdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--planos', type=int, default=40, help="Número de planos ficticios del lote")
+    parser.add_argument('--latencia', type=float, default=0.25, help="Segundos que tarda cada exportación")
+    parser.add_argument('--paginas', type=int, default=2, help="Hojas por plano")
+    parser.add_argument('--trabajadores', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    planos = [f"C:/Planos/plano_{i:04d}.SLDDRW" for i in range(args.planos)]
+    print(f"{'Procesos':>9} {'Tiempo (s)':>11} {'Planos/s':>9} {'Aceleración':>12}")
+    base = None
+    for num in args.trabajadores:
+        duracion, generados = medir(num, planos, args.latencia, args.paginas)
+        base = base or duracion
+        print(f"{num:>9} {duracion:>11.2f} {generados / duracion:>9.1f} {base / duracion:>11.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Suite de benchmarks de SOLIDPDF con resultados en JSON y comparación contra
+una línea base.
+
+Genera meshes STL sintéticos de tamaño creciente, en dos familias:
+  - afilada: cajas separadas (todas las aristas a 90°, muchas aristas técnicas)
+  - suave: toro de rejilla fina (casi ninguna arista supera el umbral)
+y mide sobre cada uno la carga del STL, extraer_caracteristicas_tecnicas, las
+siluetas y las líneas ocultas de las vistas de exportación, el renderizado
+sólido y wireframe en Agg, el rasterizador z-buffer del visor y la exportación de las vistas 2D (PNG y PDF vectorial).
+Además mide el flujo de conversión y combinación de planos con el backend
+local, que genera PDFs de varias hojas con trazos y cajetín compartido, y el
+arranque de la aplicación por subsistema (ver bench_arranque.py).
+
+Todas las medidas son segundos (menos es mejor) y se toma el mínimo de las
+repeticiones. En modo comparación, una medida que supera la base en más de
+la tolerancia (y en más de --margen segundos absolutos) es una regresión y
+el script termina con código 1.
+
+Uso:
+    python benchmarks/bench_suite.py --salida resultados.json
+    python benchmarks/bench_suite.py --rapido --salida base.json
+    python benchmarks/bench_suite.py --rapido --comparar base.json --tolerancia 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+
+import numpy as np
+import trimesh
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import convert_slddrw_to_pdf as solidpdf  # noqa: E402
+from bench_arranque import medir_arranque  # noqa: E402
+
+TAMANOS = [10_000, 100_000, 1_000_000, 5_000_000]
+TAMANOS_RAPIDO = [10_000, 100_000]
+FAMILIAS = ('afilada', 'suave')
+
+
+def generar_afilada(triangulos):
+    """Cajas de tamaño variable en rejilla: 12 triángulos y 12 aristas vivas por caja"""
+    plantilla = trimesh.creation.box().triangles.astype(np.float32)  # (12, 3, 3)
+    num = max(1, triangulos // 12)
+    lado = int(np.ceil(np.cbrt(num)))
+    rng = np.random.default_rng(0)
+    indices = np.arange(num)
+    centros = np.stack([indices % lado, (indices // lado) % lado, indices // (lado * lado)], axis=1) * 2.0
+    escalas = rng.uniform(0.4, 1.2, size=(num, 1, 1, 3))
+    return (plantilla[np.newaxis] * escalas + centros[:, np.newaxis, np.newaxis, :]).reshape(-1, 3, 3)
+
+
+def generar_suave(triangulos):
+    """Toro cerrado con una rejilla de nu x nv cuadriláteros (2 triángulos cada uno)"""
+    nv = max(8, int(np.sqrt(triangulos / 6)))
+    nu = max(8, triangulos // (2 * nv))
+    u = np.linspace(0, 2 * np.pi, nu, endpoint=False)
+    v = np.linspace(0, 2 * np.pi, nv, endpoint=False)
+    uu, vv = np.meshgrid(u, v, indexing='ij')
+    radio, tubo = 50.0, 15.0
+    puntos = np.stack([(radio + tubo * np.cos(vv)) * np.cos(uu),
+                       (radio + tubo * np.cos(vv)) * np.sin(uu),
+                       tubo * np.sin(vv)], axis=-1).astype(np.float32)
+    i, j = np.meshgrid(np.arange(nu), np.arange(nv), indexing='ij')
+    i1, j1 = (i + 1) % nu, (j + 1) % nv
+    a, b, c, d = puntos[i, j], puntos[i1, j], puntos[i1, j1], puntos[i, j1]
+    return np.concatenate([np.stack([a, b, c], axis=-2).reshape(-1, 3, 3),
+                           np.stack([a, c, d], axis=-2).reshape(-1, 3, 3)])
+
+
+def escribir_stl_binario(vectores, ruta):
+    registros = np.zeros(len(vectores), dtype=solidpdf.DTYPE_TRIANGULO_STL)
+    registros['vertices'] = vectores
+    normales = np.cross(vectores[:, 1] - vectores[:, 0], vectores[:, 2] - vectores[:, 0])
+    normales /= np.maximum(np.linalg.norm(normales, axis=1, keepdims=True), 1e-12)
+    registros['normal'] = normales
+    with open(ruta, 'wb') as f:
+        f.write(b'SOLIDPDF bench'.ljust(80, b' '))
+        f.write(np.uint32(len(vectores)).tobytes())
+        registros.tofile(f)
+
+
+def cronometrar(funcion, repeticiones):
+    """Mínimo de `repeticiones` ejecuciones; devuelve (segundos, resultado de la última)"""
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def dibujar_agg(artista_3d, minimo, maximo):
+    """Dibujar una figura 3D con el artista indicado en Agg (como el visor, sin Tk)"""
+    fig = Figure(figsize=(8, 6), dpi=80)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_axis_off()
+    artista_3d(ax)
+    ax.auto_scale_xyz(*zip(minimo, maximo))
+    fig.canvas.draw()
+
+
+def medir_malla(familia, triangulos, carpeta, repeticiones, resultados):
+    clave = f"malla/{familia}/{triangulos}"
+    vectores = (generar_afilada if familia == 'afilada' else generar_suave)(triangulos)
+    stl_path = os.path.join(carpeta, f"{familia}_{triangulos}.stl")
+    escribir_stl_binario(vectores, stl_path)
+    del vectores
+    print(f"{clave}: {os.path.getsize(stl_path) / 2**20:.0f} MB")
+
+    segundos, malla = cronometrar(lambda: solidpdf.MallaIndexada.desde_stl(stl_path, completa=True), repeticiones)
+    resultados[f"{clave}/cargar_stl"] = segundos
+
+    # extraer_caracteristicas_tecnicas es un método de App: se llama con un objeto
+    # que solo tiene el almacén de mallas, ya cargado, para medir únicamente la extracción
+    def extraer():
+        app = types.SimpleNamespace(almacen_mallas=solidpdf.AlmacenMallas())
+        app.almacen_mallas.obtener = lambda ruta, completa=False: solidpdf.MallaIndexada(malla.vertices, malla.caras)
+        return solidpdf.App.extraer_caracteristicas_tecnicas(app, stl_path)
+    segundos, indice = cronometrar(extraer, repeticiones)
+    resultados[f"{clave}/extraer_aristas"] = segundos
+    aristas = indice.seleccionar(np.radians(solidpdf.UMBRAL_ANGULO_GRADOS))
+
+    # Silueta de las cuatro vistas de exportación (adyacencia ya preparada)
+    detector = solidpdf.DetectorSiluetas.desde_malla(malla)
+    direcciones = [direccion for direccion, _ in solidpdf.VISTAS_ORTOGRAFICAS.values()]
+    segundos, siluetas = cronometrar(lambda: [detector.aristas(d) for d in direcciones], repeticiones)
+    resultados[f"{clave}/siluetas"] = segundos
+
+    # Separación en líneas visibles y ocultas de las cuatro vistas contra el mesh completo
+    def lineas_ocultas():
+        return [solidpdf.separar_aristas_ocultas(np.concatenate([aristas, silueta]), malla.vectores, direccion, base)
+                for direccion, silueta, base in zip(direcciones, siluetas,
+                                                    solidpdf.bases_de_vistas(solidpdf.VISTAS_ORTOGRAFICAS))]
+    segundos, _ = cronometrar(lineas_ocultas, repeticiones)
+    resultados[f"{clave}/lineas_ocultas"] = segundos
+
+    def lod():
+        presupuestos = [max(1, solidpdf.PRESUPUESTO_TRIANGULOS // f) for f in solidpdf.FACTORES_LOD]
+        vectores_lod = solidpdf.construir_piramide_lod(malla.vertices, malla.caras, presupuestos)[0]
+        return vectores_lod, solidpdf.calcular_colores_sombreado(vectores_lod)
+    segundos, (vectores_lod, colores) = cronometrar(lod, repeticiones)
+    resultados[f"{clave}/construir_lod"] = segundos
+
+    segundos, _ = cronometrar(lambda: dibujar_agg(lambda ax: ax.add_collection3d(
+        solidpdf.mplot3d.art3d.Poly3DCollection(vectores_lod, facecolors=colores, edgecolors=colores,
+                                                linewidths=0.1)), malla.minimo, malla.maximo), repeticiones)
+    resultados[f"{clave}/render_solido"] = segundos
+
+    # Rasterizador z-buffer del visor sobre el mesh completo (sin LOD), con la vista por defecto
+    rasterizador = solidpdf.RasterizadorZBuffer.desde_malla(malla)
+    limites = np.stack([malla.minimo, malla.maximo], axis=1)
+    segundos, _ = cronometrar(lambda: rasterizador.renderizar(800, 600, 30, 45, limites), repeticiones)
+    resultados[f"{clave}/render_raster"] = segundos
+
+    segundos, _ = cronometrar(lambda: dibujar_agg(
+        lambda ax: ax.add_line(solidpdf.crear_linea_wireframe(aristas)), malla.minimo, malla.maximo), repeticiones)
+    resultados[f"{clave}/render_wireframe"] = segundos
+
+    def vistas_2d():
+        segmentos = solidpdf.proyectar_aristas_vistas(aristas, solidpdf.VISTAS_ORTOGRAFICAS)
+        trabajos = [(nombre, seg, os.path.join(carpeta, f"{familia}_{triangulos}_{nombre}.png"))
+                    for nombre, seg in zip(solidpdf.VISTAS_ORTOGRAFICAS, segmentos)]
+        return solidpdf.renderizar_vistas_paralelo(trabajos)
+    segundos, _ = cronometrar(vistas_2d, repeticiones)
+    resultados[f"{clave}/exportar_vistas_2d"] = segundos
+
+    # Las mismas vistas en un único PDF vectorial (una hoja con cajetín por vista)
+    def vistas_pdf():
+        segmentos = solidpdf.proyectar_aristas_vistas(aristas, solidpdf.VISTAS_ORTOGRAFICAS)
+        vistas = [(nombre, seg, None) for nombre, seg in zip(solidpdf.VISTAS_ORTOGRAFICAS, segmentos)]
+        return solidpdf.exportar_planos_pdf([(clave, vistas)], os.path.join(carpeta, f"{familia}_{triangulos}.pdf"))
+    segundos, _ = cronometrar(vistas_pdf, repeticiones)
+    resultados[f"{clave}/exportar_vistas_pdf"] = segundos
+    os.remove(stl_path)
+
+
+def medir_flujo_planos(carpeta, planos, paginas, lineas, trabajadores, repeticiones, resultados, metadatos):
+    clave = f"planos/{planos}x{paginas}"
+    archivos = []
+    for i in range(planos):
+        ruta = os.path.join(carpeta, f"plano_{i:04d}.SLDDRW")
+        with open(ruta, 'w') as f:
+            f.write(f"plano {i}")
+        archivos.append(ruta)
+    salida = os.path.join(carpeta, "Planos_Combinados.pdf")
+    opciones = {'paginas': paginas, 'lineas': lineas}
+
+    segundos, resultado = cronometrar(lambda: solidpdf.convertir_lote(
+        archivos, salida, backend='local', opciones_backend=opciones,
+        num_trabajadores=trabajadores), repeticiones)
+    resultados[f"{clave}/convertir_lote"] = segundos
+    metadatos[clave] = {'paginas': resultado['paginas'], 'bytes': resultado['bytes'],
+                        'paginas_por_s': resultado['paginas'] / segundos}
+
+    # Combinación sola, sobre los PDFs ya exportados (sin arranque de procesos)
+    exportador = solidpdf.ExportadorLocal(**opciones)
+    pdfs = []
+    for idx, ruta in enumerate(archivos):
+        destino = os.path.join(carpeta, f"{idx:05d}")
+        os.makedirs(destino, exist_ok=True)
+        pdfs.append(exportador.exportar(ruta, destino))
+
+    def combinar():
+        fusionador = solidpdf.FusionadorPDF(salida)
+        for pdf in pdfs:
+            fusionador.agregar(pdf)
+        fusionador.cerrar()
+    segundos, _ = cronometrar(combinar, repeticiones)
+    resultados[f"{clave}/combinar"] = segundos
+    print(f"{clave}: {resultado['paginas']} páginas, {resultado['bytes'] / 1024:.0f} KB")
+
+
+def comparar(resultados, base, tolerancia, margen):
+    """Imprimir la comparación y devolver las claves que empeoran más de lo tolerado"""
+    regresiones = []
+    print(f"\n{'Medida':<48} {'Base s':>9} {'Actual s':>9} {'Cambio':>8}")
+    for clave in sorted(resultados):
+        if clave not in base:
+            print(f"{clave:<48} {'-':>9} {resultados[clave]:>9.3f}  (nueva)")
+            continue
+        anterior, actual = base[clave], resultados[clave]
+        cambio = actual / anterior - 1 if anterior > 0 else 0.0
+        marca = ""
+        if cambio > tolerancia and actual - anterior > margen:
+            regresiones.append(clave)
+            marca = "  REGRESIÓN"
+        print(f"{clave:<48} {anterior:>9.3f} {actual:>9.3f} {cambio:>+7.0%}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanos', type=int, nargs='+', help=f"triángulos por mesh (por defecto {TAMANOS})")
+    parser.add_argument('--rapido', action='store_true', help=f"solo meshes de {TAMANOS_RAPIDO} triángulos")
+    parser.add_argument('--familias', nargs='+', choices=FAMILIAS, default=list(FAMILIAS))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--planos', type=int, default=40, help="planos del lote ficticio")
+    parser.add_argument('--paginas', type=int, default=3, help="hojas por plano")
+    parser.add_argument('--lineas', type=int, default=500, help="trazos vectoriales por hoja")
+    parser.add_argument('--trabajadores', type=int, default=solidpdf.NUM_TRABAJADORES_EXPORTACION)
+    parser.add_argument('--sin-arranque', action='store_true', help="no medir el arranque por subsistema")
+    parser.add_argument('--salida', help="guardar los resultados en este JSON")
+    parser.add_argument('--comparar', metavar='BASE_JSON', help="comparar contra una línea base guardada")
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="empeoramiento relativo tolerado")
+    parser.add_argument('--margen', type=float, default=0.01,
+                        help="empeoramiento absoluto mínimo (s) para considerar regresión")
+    args = parser.parse_args()
+
+    tamanos = args.tamanos or (TAMANOS_RAPIDO if args.rapido else TAMANOS)
+    resultados = {}
+    metadatos = {}
+    with tempfile.TemporaryDirectory() as carpeta:
+        for triangulos in tamanos:
+            for familia in args.familias:
+                medir_malla(familia, triangulos, carpeta, args.repeticiones, resultados)
+        medir_flujo_planos(carpeta, args.planos, args.paginas, args.lineas, args.trabajadores,
+                           args.repeticiones, resultados, metadatos)
+    if not args.sin_arranque:
+        medir_arranque(args.repeticiones, resultados)
+
+    informe = {
+        'version': 1,
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'plataforma': {'python': platform.python_version(), 'sistema': platform.platform(),
+                       'procesador': platform.processor(), 'cpus': os.cpu_count()},
+        'parametros': vars(args),
+        'resultados': resultados,
+        'metadatos': metadatos,
+    }
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)['resultados']
+        regresiones = comparar(resultados, base, args.tolerancia, args.margen)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresión(es) por encima del {args.tolerancia:.0%}:")
+            for clave in regresiones:
+                print(f"  {clave}")
+            return 1
+        print("\nSin regresiones")
+    else:
+        for clave in sorted(resultados):
+            print(f"{clave:<48} {resultados[clave]:>9.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark del renderizado de las vistas 2D en PNG.
+
+Compara renderizar las cuatro vistas de una pieza en el proceso actual contra
+repartirlas en procesos (renderizar_vistas_paralelo con max_procesos explícito)
+sobre piezas sintéticas de tamaño creciente, y mide el arranque en frío de un
+proceso de trabajo. Sirve para ajustar SEGMENTOS_RENDER_PARALELO: repartir
+solo compensa cuando el tiempo ahorrado supera ese arranque, lo que exige
+varios núcleos libres y vistas con muchos segmentos.
+
+Uso:
+    python benchmarks/bench_vistas_2d.py
+    python benchmarks/bench_vistas_2d.py --triangulos 10000 100000 --procesos 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_suite import escribir_stl_binario, generar_afilada, solidpdf  # noqa: E402
+
+
+def importar_renderizado():
+    """Lo que importa un proceso de trabajo antes de su primera vista"""
+    import matplotlib.backends.backend_agg  # noqa: F401
+    import convert_slddrw_to_pdf  # noqa: F401
+    return os.getpid()
+
+
+def medir_arranque_proceso():
+    """Segundos hasta que un proceso nuevo (spawn) termina sus importaciones"""
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        pool.submit(importar_renderizado).result()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--triangulos', type=int, nargs='+', default=[10_000, 100_000, 400_000])
+    parser.add_argument('--procesos', type=int, default=min(len(solidpdf.VISTAS_ORTOGRAFICAS),
+                                                            solidpdf.nucleos_disponibles()),
+                        help="procesos del pool (por defecto uno por vista, hasta los núcleos disponibles)")
+    args = parser.parse_args()
+    procesos = max(2, args.procesos)
+
+    print(f"Núcleos disponibles: {solidpdf.nucleos_disponibles()}; "
+          f"arranque de un proceso: {medir_arranque_proceso():.2f} s; "
+          f"umbral: {solidpdf.SEGMENTOS_RENDER_PARALELO} segmentos")
+    print(f"{'Triángulos':>11} {'Segmentos':>10} {'Serie (s)':>10} {f'{procesos} procesos (s)':>15} "
+          f"{'Aceleración':>12} {'Automático':>11}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for triangulos in args.triangulos:
+            stl_path = os.path.join(carpeta, f"pieza_{triangulos}.stl")
+            escribir_stl_binario(generar_afilada(triangulos), stl_path)
+            trabajos = [(nombre, visibles, os.path.join(carpeta, f"{nombre}.png"), ocultos)
+                        for nombre, visibles, ocultos in solidpdf.vistas_plano_stl(stl_path)]
+            segmentos = sum(len(visibles) + len(ocultos) for _, visibles, _, ocultos in trabajos)
+
+            inicio = time.perf_counter()
+            for trabajo in trabajos:
+                solidpdf.renderizar_vista_2d(*trabajo)
+            serie = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            solidpdf.renderizar_vistas_paralelo(trabajos, max_procesos=procesos)
+            pool = time.perf_counter() - inicio
+
+            automatico = ('pool' if segmentos >= solidpdf.SEGMENTOS_RENDER_PARALELO
+                          and solidpdf.nucleos_disponibles() > 1 else 'serie')
+            print(f"{triangulos:>11} {segmentos:>10} {serie:>10.2f} {pool:>15.2f} "
+                  f"{serie / pool:>11.2f}x {automatico:>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,196 @@
 
 
 import os
-import win32com.client
+import sys
+import glob
+import fnmatch
+import signal
+import atexit
+import contextlib
+import argparse
+import importlib
+import importlib.util
+from abc import ABC, abstractmethod
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PyPDF2 import PdfMerger
 import tempfile
 import threading
-from stl import mesh
+import hashlib
+import json
+import shutil
+import multiprocessing
+import queue
+import time
+import io
+import zlib
 import numpy as np
-import trimesh
 
-# Configurar matplotlib para usar aceleración por hardware
-import matplotlib
-matplotlib.use('TkAgg')  # Backend optimizado
-import matplotlib.pyplot as plt
-from mpl_toolkits import mplot3d
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+# Los subsistemas pesados (combinación de PDF, COM de SolidWorks, visor 3D y
+# análisis con trimesh) no se importan al arrancar: la ventana aparece en
+# cuanto Tk está listo y cada módulo se carga en su primer uso o en segundo
+# plano (ver precargar_subsistemas).
 
-# Habilitar aceleración de hardware en matplotlib
-plt.rcParams['path.simplify'] = True
-plt.rcParams['path.simplify_threshold'] = 1.0
-plt.rcParams['agg.path.chunksize'] = 10000
 
-# Desactivar animaciones para cambios instantáneos
-plt.rcParams['animation.html'] = 'none'
-matplotlib.rcParams['toolbar'] = 'None'
+class ModuloDiferido:
+    """
+    Módulo que se importa en el primer acceso a uno de sus atributos.
+
+    preparar se ejecuta una vez antes de la importación (p. ej. para elegir el
+    backend de matplotlib antes de cargar pyplot).
+    """
+
+    def __init__(self, nombre, preparar=None):
+        self.nombre = nombre
+        self.preparar = preparar
+        self.modulo = None
+        self.segundos = None  # Tiempo de la importación, si ya se ha cargado
+        self._cerrojo = threading.Lock()  # El hilo de precarga y el principal pueden coincidir
+
+    @property
+    def disponible(self):
+        """True si el módulo está instalado (sin importarlo)"""
+        if self.modulo is not None:
+            return True
+        try:
+            return importlib.util.find_spec(self.nombre.split('.')[0]) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def cargar(self):
+        if self.modulo is None:
+            with self._cerrojo:
+                if self.modulo is None:
+                    inicio = time.perf_counter()
+                    with TRAZADOR.tramo('importar ' + self.nombre, 'arranque'):
+                        if self.preparar is not None:
+                            self.preparar()
+                        modulo = importlib.import_module(self.nombre)
+                    self.segundos = time.perf_counter() - inicio
+                    self.modulo = modulo
+        return self.modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self.cargar(), atributo)
+
+
+def _configurar_matplotlib():
+    """Backend y ajustes de matplotlib del visor; se aplica al cargarlo, no al arrancar"""
+    import matplotlib
+    matplotlib.use('TkAgg')  # Backend optimizado
+
+    # Habilitar aceleración de hardware en matplotlib
+    matplotlib.rcParams['path.simplify'] = True
+    matplotlib.rcParams['path.simplify_threshold'] = 1.0
+    matplotlib.rcParams['agg.path.chunksize'] = 10000
+
+    # Desactivar animaciones para cambios instantáneos
+    matplotlib.rcParams['animation.html'] = 'none'
+    matplotlib.rcParams['toolbar'] = 'None'
+
+
+# Fuera de Windows win32com no está disponible y solo funcionan los backends
+# locales; sin win32file la vigilancia de carpetas usa sondeo
+win32com_client = ModuloDiferido('win32com.client')
+win32con = ModuloDiferido('win32con')
+win32file = ModuloDiferido('win32file')
+trimesh = ModuloDiferido('trimesh')
+plt = ModuloDiferido('matplotlib.pyplot', preparar=_configurar_matplotlib)
+mplot3d = ModuloDiferido('mpl_toolkits.mplot3d', preparar=_configurar_matplotlib)
+backend_tkagg = ModuloDiferido('matplotlib.backends.backend_tkagg', preparar=_configurar_matplotlib)
+
+# Módulos de cada subsistema, en el orden en que se precargan
+SUBSISTEMAS = {
+    'pdf': (ModuloDiferido('PyPDF2'),),
+    'visor3d': (plt, mplot3d, backend_tkagg),
+    'analisis': (trimesh,),
+    'com': (win32com_client,),
+}
+
+# Retardo (ms) tras mostrar la ventana antes de empezar la precarga en segundo plano
+RETARDO_PRECARGA_MS = 300
+
+# Ángulo diedro mínimo (grados) para considerar una arista como técnica
+UMBRAL_ANGULO_GRADOS = 20
+
+# Rango del control de umbral del visor; las aristas por debajo del mínimo no se indexan
+RANGO_UMBRAL_GRADOS = (1, 90)
+
+# Vistas ortográficas estándar para planos técnicos: (dirección de vista, arriba)
+VISTAS_ORTOGRAFICAS = {
+    'frontal': ([0, 0, 1], [0, 1, 0]),     # Vista Z, arriba Y
+    'superior': ([0, 1, 0], [1, 0, 0]),    # Vista Y, arriba X
+    'lateral': ([1, 0, 0], [0, 0, 1]),     # Vista X, arriba Z
+    'isometrica': ([1, 1, 1], [0, 0, 1])   # Vista isométrica
+}
+
+# Hoja de los planos 2D en PDF vectorial: A4 apaisado (pulgadas)
+TAMANO_HOJA_PLANO = (11.69, 8.27)
+
+# Presupuesto de triángulos por defecto del nivel de detalle más denso
+PRESUPUESTO_TRIANGULOS = 8000
+
+# Divisores del presupuesto para cada nivel de la pirámide LOD (denso -> grueso)
+FACTORES_LOD = (1, 4, 16)
+
+# Muestras de visibilidad a lo ancho de una vista 2D exportada (resolución de la
+# separación en líneas visibles y ocultas) y pares muestra-triángulo por lote
+MUESTRAS_VISIBILIDAD = 2000
+LOTE_VISIBILIDAD = 1_000_000
+
+# Segmentos (visibles + ocultos) de todas las vistas 2D a partir de los cuales
+# los PNG se renderizan en procesos: cada proceso tarda alrededor de 1 s en
+# arrancar (importar matplotlib y este módulo) y una vista cuesta ~0.5 s más
+# ~20 us por segmento, así que con menos trabajo es más rápido el proceso actual
+# (ver benchmarks/bench_vistas_2d.py)
+SEGMENTOS_RENDER_PARALELO = 200_000
+
+# Cada cuántas muestras de una arista se prueba la visibilidad de entrada; el
+# resto solo se prueba, por bisección, donde cambia entre dos muestras probadas
+PASO_GRUESO_VISIBILIDAD = 8
+
+# Fragmentos y filas de pixels por lote del rasterizador por software: acotan la
+# memoria y mantienen los datos de cada lote en cache
+LOTE_RASTER = 2_000_000
+LOTE_FILAS_RASTER = 65_536
+
+# Intervalo mínimo entre redibujados de la vista 3D (~30 cuadros por segundo)
+INTERVALO_RENDER_MS = 33
+
+# Intervalo (ms) con el que el hilo de Tk aplica los eventos de progreso de los hilos de trabajo
+INTERVALO_PROGRESO_MS = 100
+
+# Los STL mayores que este tamaño se muestran simplificados por bloques; las aristas,
+# siluetas y exportaciones siguen usando el mesh completo, indexado también por bloques
+LIMITE_CARGA_COMPLETA_BYTES = 256 * 1024 * 1024
+
+# Resolución de la rejilla (celdas en el eje más largo) para la simplificación por bloques
+RESOLUCION_STREAMING = 1024
+
+# Registro de triángulo de un STL binario (50 bytes, little-endian)
+DTYPE_TRIANGULO_STL = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('atributo', '<u2'),
+])
+
+# Procesos de exportación simultáneos (cada uno con su propia sesión de SolidWorks)
+NUM_TRABAJADORES_EXPORTACION = 2
+
+# Supervisión de cada exportación: segundos máximos por plano, reintentos tras
+# un cuelgue y espera base antes de reintentar (se duplica en cada intento)
+TIEMPO_LIMITE_EXPORTACION = 300
+REINTENTOS_EXPORTACION = 2
+ESPERA_REINTENTO = 5.0
+
+# Variable de entorno que activa la traza de etapas: ruta del JSON a escribir
+# (o "1" para traza_solidpdf.json en la carpeta actual)
+VARIABLE_TRAZA = 'SOLIDPDF_TRAZA'
+
+# Carpeta de datos persistentes de la aplicación (caches en disco)
+CARPETA_DATOS = os.path.join(os.path.expanduser('~'), '.solidpdf')
+
+# Segundos que un plano debe permanecer sin cambios antes de convertirlo en modo vigilancia
+ESPERA_ESTABILIDAD = 2.0
 
 class App:
     def __init__(self, root):
@@ -54,6 +219,31 @@ class App:
         self.status = tk.Label(self.frame_pdf, text="Seleccione archivos para comenzar.")
         self.status.grid(row=3, column=0, pady=5)
 
+        # Número de procesos de exportación en paralelo
+        frame_procesos = tk.Frame(self.frame_pdf)
+        frame_procesos.grid(row=4, column=0, pady=5)
+        tk.Label(frame_procesos, text="Procesos de exportación:").pack(side=tk.LEFT)
+        self.num_trabajadores = tk.IntVar(value=NUM_TRABAJADORES_EXPORTACION)
+        tk.Spinbox(frame_procesos, from_=1, to=16, width=4, textvariable=self.num_trabajadores).pack(side=tk.LEFT, padx=5)
+
+        # División del PDF combinado en volúmenes (0 = sin dividir)
+        frame_volumenes = tk.Frame(self.frame_pdf)
+        frame_volumenes.grid(row=5, column=0, pady=5)
+        tk.Label(frame_volumenes, text="Dividir cada:").pack(side=tk.LEFT)
+        self.max_paginas_volumen = tk.IntVar(value=0)
+        tk.Spinbox(frame_volumenes, from_=0, to=10000, width=6, textvariable=self.max_paginas_volumen).pack(side=tk.LEFT, padx=5)
+        tk.Label(frame_volumenes, text="páginas").pack(side=tk.LEFT)
+        self.max_mb_volumen = tk.IntVar(value=0)
+        tk.Spinbox(frame_volumenes, from_=0, to=10000, width=6, textvariable=self.max_mb_volumen).pack(side=tk.LEFT, padx=5)
+        tk.Label(frame_volumenes, text="MB").pack(side=tk.LEFT)
+        self.comprimir_pdf = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_volumenes, text="Comprimir flujos", variable=self.comprimir_pdf).pack(side=tk.LEFT, padx=10)
+
+        # Agregar al final del PDF combinado los planos 2D vectoriales exportados en la sesión
+        self.anexar_planos_2d = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.frame_pdf, text="Incluir planos 2D exportados en el PDF combinado",
+                       variable=self.anexar_planos_2d).grid(row=6, column=0, pady=5)
+
         # Frame para visualización 3D
         self.frame_3d = tk.LabelFrame(root, text="Visualizar Pieza 3D (.SLDPRT)", padx=10, pady=10)
         self.frame_3d.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
@@ -75,14 +265,36 @@ class App:
         
         # Botón para exportar plano técnico
         tk.Button(self.frame_controles, text="Exportar Plano 2D", command=self.exportar_plano_tecnico, bg='#2196F3', fg='white').pack(side=tk.LEFT, padx=5)
+        self.plano_vectorial = tk.BooleanVar(value=True)
+        tk.Checkbutton(self.frame_controles, text="PDF vectorial", variable=self.plano_vectorial).pack(side=tk.LEFT)
         
         # Checkbox para modo wireframe
         self.wireframe_var = tk.BooleanVar(value=False)
         tk.Checkbutton(self.frame_controles, text="Wireframe", variable=self.wireframe_var, command=self.actualizar_visualizacion).pack(side=tk.LEFT, padx=5)
         
+        # Motor del modo sólido: rasterizador z-buffer propio (mesh completo) o matplotlib (niveles LOD)
+        self.motor_raster = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.frame_controles, text="Raster", variable=self.motor_raster, command=self.actualizar_visualizacion).pack(side=tk.LEFT)
+        
+        # Presupuesto de triángulos del nivel de detalle más denso
+        tk.Label(self.frame_controles, text="Detalle:").pack(side=tk.LEFT)
+        self.presupuesto_triangulos = tk.IntVar(value=PRESUPUESTO_TRIANGULOS)
+        tk.Spinbox(self.frame_controles, from_=500, to=200000, increment=1000, width=7,
+                   textvariable=self.presupuesto_triangulos, command=self.actualizar_detalle).pack(side=tk.LEFT, padx=2)
+        
         # Botón de calibración
         tk.Button(self.frame_controles, text="⚙ Calibrar", command=self.mostrar_calibracion, bg='#FF9800', fg='white').pack(side=tk.LEFT, padx=5)
 
+        # Umbral de ángulo diedro de las aristas técnicas (wireframe y planos 2D)
+        frame_umbral = tk.Frame(self.frame_3d)
+        frame_umbral.pack(fill=tk.X)
+        tk.Label(frame_umbral, text="Ángulo de arista (°):").pack(side=tk.LEFT, padx=5)
+        self.umbral_angulo = tk.DoubleVar(value=UMBRAL_ANGULO_GRADOS)
+        tk.Scale(frame_umbral, from_=RANGO_UMBRAL_GRADOS[0], to=RANGO_UMBRAL_GRADOS[1], orient=tk.HORIZONTAL,
+                 length=250, variable=self.umbral_angulo, command=self.cambiar_umbral_aristas).pack(side=tk.LEFT)
+        self.label_aristas = tk.Label(frame_umbral, text="")
+        self.label_aristas.pack(side=tk.LEFT, padx=5)
+
         self.label_3d = tk.Label(self.frame_3d, text="Ningún archivo 3D cargado")
         self.label_3d.pack(pady=5)
 
@@ -93,9 +305,27 @@ class App:
         self.current_stl_path = None
         self.current_ax = None
         self.current_figura = None
-        self.current_trimesh = None  # Almacenar mesh procesado
         self.canvas_3d = None  # Canvas de matplotlib para 3D
-        self.aristas_tecnicas_cache = None  # Cache de aristas extraídas
+        self.indice_aristas = None  # IndiceAristas del modelo actual (sirve para cualquier umbral)
+        self.coleccion_solida = None  # Poly3DCollection de la vista sólida
+        self.rasterizador = None  # RasterizadorZBuffer del modelo actual
+        self.visor_raster = None  # VisorRaster (se crea la primera vez que se usa)
+        self.raster_mostrado = False  # True si el visor muestra el rasterizador en lugar de matplotlib
+        self.arrastre_raster = None  # (x, y, elev, azim) al empezar a rotar en la vista raster
+        self.linea_wireframe = None  # Line3D con las aristas técnicas
+        self.linea_silueta = None  # Line3D con la silueta de la vista actual
+        self.detector_siluetas = None  # DetectorSiluetas del modelo actual
+        self.modo_wireframe_mostrado = False  # Modo que muestra la escena actualmente
+        self.calibracion_aplicada = None  # Calibración usada al aplicar la vista mostrada
+        self.almacen_mallas = AlmacenMallas()  # Cada STL se parsea una sola vez
+        self.malla_actual = None  # MallaIndexada del modelo actual
+        self.niveles_lod = None  # Pirámide de niveles de detalle del modelo actual
+        self.niveles_lod_firma = None
+        self.nivel_lod_actual = 0
+        self.nivel_lod_arrastre = len(FACTORES_LOD) - 2  # Nivel mostrado mientras se rota
+        self.indice_aristas_firma = None  # (ruta, tamaño, mtime) del STL indexado en memoria
+        self.cache_aristas = CacheAristasDisco()  # Cache persistente entre sesiones
+        self.planos_vectoriales = []  # PDFs de planos 2D exportados en esta sesión
         
         # Estado persistente de la vista (compartido entre wireframe y sólido)
         self.vista_actual = {'elev': 30, 'azim': 45, 'xlim': None, 'ylim': None, 'zlim': None}
@@ -105,6 +335,25 @@ class App:
         
         # Ventana de calibración (se crea cuando se necesita)
         self.ventana_calibracion = None
+        
+        # Backend de exportación (ver BACKENDS_EXPORTACION)
+        self.backend_exportacion = 'solidworks'
+        self.opciones_backend = {}
+        
+        # PDFs ya exportados y lote interrumpido pendiente de reanudar
+        self.cache_conversion = CacheConversion()
+        self.root.after(500, self.ofrecer_reanudar_lote)
+        
+        # Redibujados agrupados: como máximo uno por intervalo de cuadro
+        self.programador_render = ProgramadorRender(
+            self.root, lambda: self.visor_raster if self.raster_mostrado else self.canvas_3d)
+        # Los hilos de trabajo no tocan los widgets: publican en el bus y Tk los aplica
+        self.bus_progreso = BusProgreso(self.root, self.aplicar_progreso)
+        self.ritmo_lote = None  # (completados, instante) del primer plano exportado del lote
+        self.zoom_pendiente = 1.0  # Factor de zoom acumulado por scroll aún no aplicado
+
+        # Con la ventana ya visible, cargar los subsistemas pesados en segundo plano
+        self.root.after(RETARDO_PRECARGA_MS, precargar_subsistemas)
     
     def mostrar_calibracion(self):
         """Mostrar ventana de calibración de vistas"""
@@ -170,50 +419,68 @@ class App:
     
     def extraer_caracteristicas_tecnicas(self, stl_path):
         """
-        Extrae características geométricas usando trimesh para wireframe técnico
-        Detecta: aristas agudas, bordes, características cilíndricas, planas
+        Extrae características geométricas para wireframe técnico
+        Calcula el ángulo diedro de cada par de caras adyacentes y los bordes abiertos
+        Devuelve el IndiceAristas (válido para cualquier umbral)
         """
-        # Cargar mesh con trimesh para análisis avanzado
-        tm = trimesh.load(stl_path)
-        
-        # 1. Detectar aristas por ángulo de características (sharp features)
-        # Ángulo de 30 grados para detectar aristas técnicas importantes
-        aristas_agudas = tm.edges[trimesh.grouping.group_rows(
-            tm.edges_sorted, require_count=1)]
-        
-        # 2. Identificar aristas con ángulo diedro significativo
-        # Esto captura cambios de dirección importantes para planos técnicos
-        angulos_diedros = tm.face_adjacency_angles
-        umbral_angulo = np.radians(20)  # 20 grados - aristas técnicas
-        
-        # Obtener aristas con ángulo significativo
-        aristas_tecnicas = []
-        if len(tm.face_adjacency) > 0:
-            for i, angulo in enumerate(angulos_diedros):
-                if abs(angulo) > umbral_angulo:
-                    # Obtener la arista compartida entre las caras adyacentes
-                    face_pair = tm.face_adjacency[i]
-                    cara1 = tm.faces[face_pair[0]]
-                    cara2 = tm.faces[face_pair[1]]
-                    
-                    # Encontrar vértices compartidos
-                    vertices_compartidos = np.intersect1d(cara1, cara2)
-                    if len(vertices_compartidos) == 2:
-                        v1, v2 = tm.vertices[vertices_compartidos]
-                        aristas_tecnicas.append((tuple(v1), tuple(v2)))
-        
-        # 3. Detectar bordes/silueta del modelo
-        aristas_borde = []
-        edges_unique = trimesh.grouping.group_rows(tm.edges_sorted, require_count=1)
-        for edge_idx in edges_unique:
-            edge = tm.edges[edge_idx]
-            v1, v2 = tm.vertices[edge]
-            aristas_borde.append((tuple(v1), tuple(v2)))
-        
-        # Combinar todas las características detectadas
-        todas_aristas = set(aristas_tecnicas + aristas_borde)
-        
-        return list(todas_aristas), tm
+        # Desde el mesh indexado compartido (sin releer el STL), siempre a resolución completa
+        malla = self.almacen_mallas.obtener(stl_path, completa=True)
+        with TRAZADOR.tramo('extraer aristas', 'aristas', caras=len(malla.caras)):
+            return IndiceAristas.desde_malla(malla, np.radians(RANGO_UMBRAL_GRADOS[0]))
+
+    def obtener_indice_aristas(self, stl_path):
+        """
+        Devuelve el índice de aristas del STL consultando primero la cache en
+        memoria, luego la cache en disco, y solo si ambas fallan lo construye
+        """
+        stat = os.stat(stl_path)
+        firma = (stl_path, stat.st_size, stat.st_mtime_ns)
+        if self.indice_aristas is not None and self.indice_aristas_firma == firma:
+            return self.indice_aristas
+
+        clave = self.cache_aristas.clave(stl_path, RANGO_UMBRAL_GRADOS[0])
+        indice = self.cache_aristas.obtener(clave)
+        if indice is None:
+            indice = self.extraer_caracteristicas_tecnicas(stl_path)
+            self.cache_aristas.guardar(clave, indice)
+
+        self.indice_aristas = indice
+        self.indice_aristas_firma = firma
+        return indice
+
+    def obtener_aristas_tecnicas(self, stl_path):
+        """Aristas técnicas (N, 2, 3) del STL con el umbral de ángulo actual"""
+        return self.obtener_indice_aristas(stl_path).seleccionar(np.radians(self.umbral_angulo.get()))
+
+    def obtener_detector_siluetas(self, stl_path):
+        """Normales y adyacencia del modelo preparadas para calcular siluetas (una vez por STL)"""
+        malla = self.almacen_mallas.obtener(stl_path, completa=True)
+        if self.detector_siluetas is None or self.detector_siluetas.vertices is not malla.vertices:
+            with TRAZADOR.tramo('preparar siluetas', 'aristas', caras=len(malla.caras)):
+                self.detector_siluetas = DetectorSiluetas.desde_malla(malla)
+        return self.detector_siluetas
+
+    def actualizar_silueta(self):
+        """Recalcular la silueta del wireframe para la orientación actual de la cámara"""
+        if self.linea_silueta is None or not self.modo_wireframe_mostrado:
+            return
+        detector = self.obtener_detector_siluetas(self.current_stl_path)
+        with TRAZADOR.tramo('silueta', 'aristas'):
+            aristas = detector.aristas(direccion_vista_ejes(self.current_ax))
+        self.linea_silueta.set_data_3d(*aristas_a_polilinea(aristas))
+
+    def cambiar_umbral_aristas(self, valor=None):
+        """Mover el control de umbral: se aplica una vez por cuadro, sin reanalizar el mesh"""
+        if self.indice_aristas is not None and self.current_stl_path:
+            self.programador_render.solicitar(self.aplicar_umbral_aristas)
+
+    def aplicar_umbral_aristas(self):
+        """Seleccionar las aristas del umbral actual (búsqueda binaria) y actualizar el wireframe"""
+        indice = self.obtener_indice_aristas(self.current_stl_path)
+        umbral = np.radians(self.umbral_angulo.get())
+        if self.linea_wireframe is not None:
+            self.linea_wireframe.set_data_3d(*indice.polilinea(umbral))
+        self.label_aristas.config(text=f"{indice.contar(umbral)} aristas")
 
     def seleccionar_archivos(self):
         archivos = filedialog.askopenfilenames(
@@ -228,6 +495,25 @@ class App:
             self.status.config(text="No se seleccionaron archivos.")
             self.btn_convertir.config(state="disabled")
 
+    def ofrecer_reanudar_lote(self):
+        """Si quedó un lote interrumpido, ofrecer reanudarlo donde se detuvo"""
+        manifiesto = ManifiestoLote.cargar()
+        if manifiesto is None:
+            return
+        archivos = [a for a in manifiesto.archivos if os.path.exists(a)]
+        if not archivos:
+            manifiesto.finalizar()
+            return
+        if messagebox.askyesno(
+                "Lote interrumpido",
+                f"Hay una conversión interrumpida ({len(manifiesto.completados)} de "
+                f"{len(manifiesto.archivos)} planos exportados).\n¿Reanudarla?"):
+            self.archivos = archivos
+            self.status.config(text=f"Reanudando lote de {len(archivos)} archivo(s).")
+            self.iniciar_conversion()
+        else:
+            manifiesto.finalizar()
+
     def iniciar_conversion(self):
         self.btn_convertir.config(state="disabled")
         self.btn_seleccionar.config(state="disabled")
@@ -235,45 +521,104 @@ class App:
         self.status.config(text="Iniciando conversión...")
         threading.Thread(target=self.convertir_archivos).start()
 
+    def aplicar_progreso(self, estado):
+        """
+        Aplicar en el hilo de Tk el estado acumulado de los eventos de progreso.
+        Campos: total, completados, archivo (último plano terminado) e instante
+        en que terminó, texto (estado libre; tiene prioridad sobre archivo),
+        reiniciar_ritmo y etiqueta_3d.
+        """
+        if estado.get('reiniciar_ritmo'):
+            self.ritmo_lote = None
+        if 'etiqueta_3d' in estado:
+            self.label_3d.config(text=estado['etiqueta_3d'])
+        if 'completados' in estado:
+            self.progress['value'] = (estado['completados'] / estado['total']) * 100
+        if estado.get('texto'):
+            self.status.config(text=estado['texto'])
+        elif estado.get('archivo'):
+            completados, total = estado['completados'], estado['total']
+            texto = f"Procesando {completados}/{total}: {os.path.basename(estado['archivo'])}"
+            # El ritmo se mide desde el primer plano exportado (sin el arranque de
+            # SolidWorks) con los instantes de los eventos, no con los del repintado
+            if self.ritmo_lote is None:
+                self.ritmo_lote = (completados, estado['instante'])
+            else:
+                base, inicio = self.ritmo_lote
+                hechos = completados - base
+                segundos = estado['instante'] - inicio
+                if hechos > 0 and segundos > 0:
+                    ritmo = hechos / segundos
+                    restante = int((total - completados) / ritmo)
+                    texto += f" — {ritmo:.2f} planos/s, quedan {restante // 60}:{restante % 60:02d}"
+            self.status.config(text=texto)
+
     def convertir_archivos(self):
+        bus = self.bus_progreso
         if not self.archivos:
-            self.status.config(text="No se seleccionaron archivos.")
-            self.btn_convertir.config(state="disabled")
-            self.btn_seleccionar.config(state="normal")
+            bus.publicar(texto="No se seleccionaron archivos.")
+            bus.ejecutar(self.btn_convertir.config, state="disabled")
+            bus.ejecutar(self.btn_seleccionar.config, state="normal")
             return
+        total = len(self.archivos)
         try:
-            swApp = win32com.client.Dispatch('SldWorks.Application')
-            swApp.Visible = False
-        except Exception as e:
-            self.status.config(text=f"Error iniciando SolidWorks: {e}")
-            self.btn_seleccionar.config(state="normal")
+            num_trabajadores = max(1, int(self.num_trabajadores.get()))
+            max_paginas = max(0, int(self.max_paginas_volumen.get()))
+            max_bytes = max(0, int(self.max_mb_volumen.get())) * 1024 * 1024
+        except (tk.TclError, ValueError):
+            num_trabajadores = NUM_TRABAJADORES_EXPORTACION
+            max_paginas = max_bytes = 0
+        output_folder = os.path.dirname(self.archivos[0])
+        
+        def al_avanzar(completados, slddrw_path):
+            # Solo encola el evento: el ritmo de conversión no depende del refresco de la interfaz
+            if slddrw_path is None:
+                bus.publicar(total=total, completados=completados, archivo=None, reiniciar_ritmo=True,
+                             texto=f"{completados}/{total} planos sin cambios, "
+                                   f"exportando {total - completados}...")
+            else:
+                bus.publicar(total=total, completados=completados, archivo=slddrw_path,
+                             instante=time.monotonic(), texto=None)
+        
+        # Lote reanudable: se registra qué planos ya están exportados
+        try:
+            with TRAZADOR.tramo('convertir_archivos', 'lote', planos=total):
+                resultado = convertir_lote(
+                    self.archivos, os.path.join(output_folder, "Planos_Combinados.pdf"),
+                    backend=self.backend_exportacion, opciones_backend=self.opciones_backend,
+                    num_trabajadores=num_trabajadores, max_paginas=max_paginas, max_bytes=max_bytes,
+                    comprimir=bool(self.comprimir_pdf.get()), cache=self.cache_conversion,
+                    manifiesto=ManifiestoLote(self.archivos), al_avanzar=al_avanzar,
+                    anexos=[p for p in self.planos_vectoriales if os.path.exists(p)]
+                    if self.anexar_planos_2d.get() else None)
+        except ErrorInicioExportacion as e:
+            bus.publicar(texto=f"Error iniciando SolidWorks: {e}")
+            bus.ejecutar(self.btn_seleccionar.config, state="normal")
             return
-        with tempfile.TemporaryDirectory() as temp_dir:
-            pdfs = []
-            total = len(self.archivos)
-            for idx, slddrw_path in enumerate(self.archivos, 1):
-                pdf = exportar_a_pdf(swApp, slddrw_path, temp_dir)
-                if pdf:
-                    pdfs.append(pdf)
-                self.progress['value'] = (idx / total) * 100
-                self.status.config(text=f"Procesando {idx}/{total}: {os.path.basename(slddrw_path)}")
-                self.root.update_idletasks()
-            swApp.ExitApp()
-            if not pdfs:
-                self.status.config(text="No se generaron PDFs.")
-                self.btn_seleccionar.config(state="normal")
-                return
-            output_folder = os.path.dirname(self.archivos[0])
-            output_pdf = os.path.join(output_folder, "Planos_Combinados.pdf")
-            merger = PdfMerger()
-            for pdf in pdfs:
-                merger.append(pdf)
-            merger.write(output_pdf)
-            merger.close()
-            self.status.config(text=f"PDF combinado guardado en: {output_pdf}")
-            messagebox.showinfo("Éxito", f"PDF combinado guardado en:\n{output_pdf}")
-        self.btn_seleccionar.config(state="normal")
-        self.btn_convertir.config(state="normal")
+        volumenes = resultado['volumenes']
+        if not volumenes:
+            bus.publicar(texto="No se generaron PDFs.")
+            bus.ejecutar(self.btn_seleccionar.config, state="normal")
+            return
+        print(f"Optimización del PDF combinado: {resultado['optimizacion']}")
+        if resultado['latencia']:
+            print("Latencia por intento: " + ", ".join(f"{clave} {valor:.2f} s"
+                                                      for clave, valor in resultado['latencia'].items()))
+        for slddrw_path, motivo in resultado['motivos_fallo'].items():
+            print(f"Fallido: {slddrw_path} ({motivo})")
+        if len(volumenes) == 1:
+            bus.publicar(texto=f"PDF combinado guardado en: {volumenes[0]}")
+            bus.ejecutar(messagebox.showinfo, "Éxito",
+                         f"PDF combinado guardado en:\n{volumenes[0]}\n\n{resultado['optimizacion']}")
+        else:
+            bus.publicar(texto=f"PDF combinado guardado en {len(volumenes)} volúmenes en: {output_folder}")
+            bus.ejecutar(messagebox.showinfo, "Éxito", f"PDF combinado guardado en {len(volumenes)} volúmenes:\n"
+                         + "\n".join(volumenes) + f"\n\n{resultado['optimizacion']}")
+        if resultado['motivos_fallo']:
+            bus.ejecutar(messagebox.showwarning, "Planos no convertidos", "\n".join(
+                f"{os.path.basename(p)}: {motivo}" for p, motivo in resultado['motivos_fallo'].items()))
+        bus.ejecutar(self.btn_seleccionar.config, state="normal")
+        bus.ejecutar(self.btn_convertir.config, state="normal")
 
     def abrir_sldprt(self):
         archivo = filedialog.askopenfilename(
@@ -287,7 +632,7 @@ class App:
 
     def cargar_y_visualizar(self, sldprt_path):
         try:
-            swApp = win32com.client.Dispatch('SldWorks.Application')
+            swApp = win32com_client.Dispatch('SldWorks.Application')
             swApp.Visible = False
 
             # Usar carpeta temporal del sistema pero mantener el archivo
@@ -298,15 +643,15 @@ class App:
             
             if stl_path:
                 # Ejecutar visualización en el hilo principal
-                self.root.after(0, self.visualizar_stl, stl_path)
-                self.label_3d.config(text=f"Visualizando: {os.path.basename(sldprt_path)}")
+                self.bus_progreso.ejecutar(self.visualizar_stl, stl_path)
+                self.bus_progreso.publicar(etiqueta_3d=f"Visualizando: {os.path.basename(sldprt_path)}")
             else:
-                self.label_3d.config(text="Error al convertir el archivo")
-                self.root.after(0, messagebox.showerror, "Error", "No se pudo convertir el archivo a STL")
+                self.bus_progreso.publicar(etiqueta_3d="Error al convertir el archivo")
+                self.bus_progreso.ejecutar(messagebox.showerror, "Error", "No se pudo convertir el archivo a STL")
 
         except Exception as e:
-            self.label_3d.config(text="Error al cargar el archivo")
-            self.root.after(0, messagebox.showerror, "Error", f"Error al cargar el archivo:\n{e}")
+            self.bus_progreso.publicar(etiqueta_3d="Error al cargar el archivo")
+            self.bus_progreso.ejecutar(messagebox.showerror, "Error", f"Error al cargar el archivo:\n{e}")
 
     def convertir_a_stl(self, swApp, sldprt_path, temp_dir):
         from win32com.client import VARIANT
@@ -318,7 +663,9 @@ class App:
         errors = VARIANT(pythoncom.VT_BYREF | pythoncom.VT_I4, 0)
         warnings = VARIANT(pythoncom.VT_BYREF | pythoncom.VT_I4, 0)
 
-        part = swApp.OpenDoc6(sldprt_path, swDocPART, swOpenDocOptions_Silent, '', errors, warnings)
+        nombre = os.path.basename(sldprt_path)
+        with TRAZADOR.tramo('OpenDoc6', 'com', pieza=nombre):
+            part = swApp.OpenDoc6(sldprt_path, swDocPART, swOpenDocOptions_Silent, '', errors, warnings)
         if part is None:
             print(f"No se pudo abrir {os.path.basename(sldprt_path)}")
             return None
@@ -326,7 +673,8 @@ class App:
         stl_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(sldprt_path))[0] + '.stl')
 
         try:
-            result = part.SaveAs(stl_path)
+            with TRAZADOR.tramo('SaveAs STL', 'com', pieza=nombre):
+                result = part.SaveAs(stl_path)
             if result:
                 print(f"STL guardado: {stl_path}")
                 self.temp_files.append(stl_path)  # Rastrear archivo temporal
@@ -338,99 +686,41 @@ class App:
             print(f"Error exportando a STL: {e}")
             return None
         finally:
-            swApp.CloseDoc(os.path.basename(sldprt_path))
+            with TRAZADOR.tramo('CloseDoc', 'com', pieza=nombre):
+                swApp.CloseDoc(os.path.basename(sldprt_path))
 
     def visualizar_stl(self, stl_path, restaurar_vista=None):
+        """
+        Construir la escena persistente de un modelo: una figura y un canvas por
+        modelo cargado. Los cambios de modo, calibración o vista posteriores solo
+        alternan la visibilidad de los artistas y la cámara (ver actualizar_visualizacion).
+        """
         # Cerrar canvas anterior si existe
         if self.canvas_3d:
             self.canvas_3d.get_tk_widget().destroy()
+            self.canvas_3d = None
         
         # Cerrar figura anterior para liberar memoria
         if self.current_figura:
             plt.close(self.current_figura)
 
         self.current_stl_path = stl_path
-        stl_mesh = mesh.Mesh.from_file(stl_path)
-
-        # Simplificar modelo para mejor rendimiento de rotación
-        max_triangles = 2000
-        if len(stl_mesh.vectors) > max_triangles:
-            step = max(1, len(stl_mesh.vectors) // max_triangles)
-            simplified_vectors = stl_mesh.vectors[::step]
-        else:
-            simplified_vectors = stl_mesh.vectors
-
-        # PRE-PROCESAR: Extraer aristas técnicas ANTES de crear figura (evita interferencia)
-        aristas_tecnicas = None
-        if self.wireframe_var.get():
-            if self.current_trimesh is None or self.current_stl_path != stl_path:
-                aristas_tecnicas, self.current_trimesh = self.extraer_caracteristicas_tecnicas(stl_path)
-                self.aristas_tecnicas_cache = aristas_tecnicas  # Cachear aristas
-            else:
-                aristas_tecnicas = self.aristas_tecnicas_cache
+        with TRAZADOR.tramo('leer STL', 'stl', archivo=os.path.basename(stl_path)):
+            self.malla_actual = self.almacen_mallas.obtener(stl_path)
 
-        # Crear figura optimizada DESPUÉS del pre-procesamiento
+        # Crear figura optimizada; los artistas se crean bajo demanda en mostrar_modo
+        cargar_subsistema('visor3d')  # Inmediato si la precarga ya terminó
         self.current_figura = plt.figure(figsize=(8, 6), dpi=80)
         self.current_ax = self.current_figura.add_subplot(111, projection='3d')
-        
-        # Modo wireframe o sólido
-        if self.wireframe_var.get():
-            # Modo wireframe AVANZADO - usar aristas pre-calculadas
-
-            for arista in aristas_tecnicas:
-                p1, p2 = arista
-                self.current_ax.plot3D([p1[0], p2[0]], [p1[1], p2[1]], [p1[2], p2[2]], 
-                                       color='#1a1a1a', linewidth=1.5, alpha=0.9)
-            
-            collection = None  # No hay colección en modo wireframe
-        else:
-            # Modo sólido con sombreado mejorado
-            # Calcular normales para sombreado realista
-            normales = np.array([np.cross(v[1] - v[0], v[2] - v[0]) for v in simplified_vectors])
-            mag = np.linalg.norm(normales, axis=1)
-            mag[mag == 0] = 1  # Evitar división por cero
-            normales = normales / mag[:, np.newaxis]
-            
-            # Múltiples fuentes de luz para sombreado más realista
-            luz_principal = np.array([1, 1, 2])  # Luz principal desde arriba-derecha
-            luz_principal = luz_principal / np.linalg.norm(luz_principal)
-            
-            luz_relleno = np.array([-0.5, -0.5, 1])  # Luz de relleno suave
-            luz_relleno = luz_relleno / np.linalg.norm(luz_relleno)
-            
-            # Calcular intensidad combinada
-            intensidad_principal = np.abs(np.dot(normales, luz_principal))
-            intensidad_relleno = np.abs(np.dot(normales, luz_relleno))
-            
-            # Combinar luces: 70% principal + 30% relleno + luz ambiente
-            intensidades = 0.2 + 0.7 * intensidad_principal + 0.3 * intensidad_relleno
-            intensidades = np.clip(intensidades, 0.3, 1.0)
-            
-            # Crear colores basados en intensidad con gradiente más rico
-            color_base = np.array([0.6, 0.7, 0.85])  # Azul grisáceo
-            color_sombra = np.array([0.3, 0.35, 0.45])  # Azul oscuro para sombras
-            
-            # Interpolación de color basada en intensidad
-            colores = color_sombra + (color_base - color_sombra) * intensidades[:, np.newaxis]
-            
-            # Renderizar con aristas sutiles del mismo color (invisibles)
-            collection = mplot3d.art3d.Poly3DCollection(
-                simplified_vectors,
-                facecolors=colores,
-                edgecolors=colores,
-                linewidths=0.1,
-                alpha=1.0,
-                antialiased=True
-            )
-        
-        # Solo agregar colección si existe (modo sólido)
-        if collection is not None:
-            self.current_ax.add_collection3d(collection)
+        self.coleccion_solida = None
+        self.linea_wireframe = None
+        self.linea_silueta = None
+        self.label_aristas.config(text="")
         
         # Configurar límites del gráfico (solo si no hay vista para restaurar)
         if not restaurar_vista or restaurar_vista.get('xlim') is None:
-            scale = stl_mesh.points.flatten()
-            self.current_ax.auto_scale_xyz(scale, scale, scale)
+            self.encuadrar_modelo()
+        self.current_ax.set_autoscale_on(False)  # Los artistas añadidos después no cambian el encuadre
         
         # Ocultar ejes para vista limpia
         self.current_ax.set_axis_off()
@@ -439,81 +729,269 @@ class App:
         self.current_ax.set_facecolor('white')
         self.current_figura.patch.set_facecolor('white')
         
-        # Establecer vista ANTES de crear el canvas
-        if restaurar_vista:
-            # Aplicar calibración si está en modo wireframe
-            if self.wireframe_var.get():
-                elev_ajustado = restaurar_vista['elev'] + self.calibracion['elev_offset']
-                azim_ajustado = restaurar_vista['azim'] + self.calibracion['azim_offset']
-                zoom_factor = self.calibracion['zoom_offset']
-                
-                self.current_ax.view_init(elev=elev_ajustado, azim=azim_ajustado)
-                
-                if restaurar_vista.get('xlim') is not None:
-                    # Aplicar factor de zoom
-                    xlim = restaurar_vista['xlim']
-                    ylim = restaurar_vista['ylim']
-                    zlim = restaurar_vista['zlim']
-                    
-                    # Calcular centro
-                    x_center = (xlim[0] + xlim[1]) / 2
-                    y_center = (ylim[0] + ylim[1]) / 2
-                    z_center = (zlim[0] + zlim[1]) / 2
-                    
-                    # Aplicar zoom
-                    x_range = (xlim[1] - xlim[0]) * zoom_factor
-                    y_range = (ylim[1] - ylim[0]) * zoom_factor
-                    z_range = (zlim[1] - zlim[0]) * zoom_factor
-                    
-                    self.current_ax.set_xlim([x_center - x_range/2, x_center + x_range/2])
-                    self.current_ax.set_ylim([y_center - y_range/2, y_center + y_range/2])
-                    self.current_ax.set_zlim([z_center - z_range/2, z_center + z_range/2])
-            else:
-                # Modo sólido - sin calibración
-                self.current_ax.view_init(elev=restaurar_vista['elev'], azim=restaurar_vista['azim'])
-                if restaurar_vista.get('xlim') is not None:
-                    self.current_ax.set_xlim(restaurar_vista['xlim'])
-                    self.current_ax.set_ylim(restaurar_vista['ylim'])
-                    self.current_ax.set_zlim(restaurar_vista['zlim'])
-        else:
-            # Vista isométrica por defecto para carga inicial
-            self.current_ax.view_init(elev=30, azim=45)
+        # Artistas del modo actual y vista ANTES de crear el canvas
+        with TRAZADOR.tramo('construir escena', 'render'):
+            self.mostrar_modo()
+            self.aplicar_vista(restaurar_vista)
+            self.actualizar_silueta()
+        
+        # Actualizar estado persistente con la vista actual (el rasterizador la lee de ahí)
+        self.sincronizar_vista_actual()
         
         # Integrar en Tkinter
-        self.canvas_3d = FigureCanvasTkAgg(self.current_figura, master=self.frame_viewer)
-        self.canvas_3d.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.canvas_3d = backend_tkagg.FigureCanvasTkAgg(self.current_figura, master=self.frame_viewer)
+        if TRAZADOR.activo:
+            # draw_idle termina llamando a canvas.draw: así se mide cada dibujado real
+            self.canvas_3d.draw = TRAZADOR.envolver(self.canvas_3d.draw, 'matplotlib draw', 'render')
+        self.mostrar_motor()
         
         # Forzar actualización inmediata sin animación
-        self.canvas_3d.draw_idle()
+        (self.visor_raster if self.raster_mostrado else self.canvas_3d).draw_idle()
         self.root.update_idletasks()
         
         # Conectar eventos del mouse
         self.canvas_3d.mpl_connect('scroll_event', self.on_scroll)
+        self.canvas_3d.mpl_connect('button_press_event', self.on_mouse_press)
         self.canvas_3d.mpl_connect('button_release_event', self.on_mouse_release)
+    
+    def mostrar_modo(self):
+        """
+        Mostrar el artista del modo actual (sólido o wireframe) y ocultar el otro.
+        Cada artista se construye una sola vez por modelo.
+        """
+        wireframe = self.wireframe_var.get()
+        if wireframe and self.linea_wireframe is None:
+            # Modo wireframe AVANZADO - todas las aristas pre-calculadas en un solo artista
+            aristas_tecnicas = self.obtener_aristas_tecnicas(self.current_stl_path)
+            self.linea_wireframe = crear_linea_wireframe(aristas_tecnicas)
+            self.current_ax.add_line(self.linea_wireframe)
+            self.label_aristas.config(text=f"{len(aristas_tecnicas)} aristas")
+            # Contorno de superficies curvas; depende de la vista (ver actualizar_silueta)
+            self.linea_silueta = crear_linea_wireframe(np.empty((0, 2, 3), dtype=np.float32))
+            self.current_ax.add_line(self.linea_silueta)
+        elif not wireframe and not self.usar_raster() and self.coleccion_solida is None:
+            # Modo sólido con sombreado mejorado (colores precalculados por nivel LOD)
+            simplified_vectors, colores = self.obtener_niveles_lod()[0]
+            
+            # Renderizar con aristas sutiles del mismo color (invisibles)
+            self.coleccion_solida = mplot3d.art3d.Poly3DCollection(
+                simplified_vectors,
+                facecolors=colores,
+                edgecolors=colores,
+                linewidths=0.1,
+                alpha=1.0,
+                antialiased=True
+            )
+            self.nivel_lod_actual = 0
+            self.current_ax.add_collection3d(self.coleccion_solida)
         
-        # Actualizar estado persistente con la vista actual
-        self.sincronizar_vista_actual()
+        if self.linea_wireframe is not None:
+            self.linea_wireframe.set_visible(wireframe)
+            self.linea_silueta.set_visible(wireframe)
+        if self.coleccion_solida is not None:
+            self.coleccion_solida.set_visible(not wireframe)
+        self.modo_wireframe_mostrado = wireframe
+
+    def usar_raster(self):
+        """El modo sólido se dibuja con el rasterizador propio si está elegido"""
+        return bool(self.motor_raster.get()) and not self.wireframe_var.get()
+
+    def mostrar_motor(self):
+        """
+        Mostrar en el visor el widget del motor activo (rasterizador o canvas de
+        matplotlib) y ocultar el otro. Los dos comparten la cámara de vista_actual.
+        """
+        raster = self.usar_raster()
+        if raster and self.visor_raster is None:
+            self.visor_raster = VisorRaster(self.frame_viewer, self.renderizar_raster)
+            widget = self.visor_raster.get_tk_widget()
+            widget.bind('<ButtonPress-1>', self.on_raster_press)
+            widget.bind('<B1-Motion>', self.on_raster_drag)
+            widget.bind('<ButtonRelease-1>', self.on_raster_release)
+            for evento in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+                widget.bind(evento, self.on_raster_scroll)
+            widget.bind('<Configure>', lambda event: self.programador_render.solicitar())
+        activo, inactivo = (self.visor_raster, self.canvas_3d) if raster else (self.canvas_3d, self.visor_raster)
+        if inactivo is not None:
+            inactivo.get_tk_widget().pack_forget()
+        if activo is not None:
+            activo.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.raster_mostrado = raster
+
+    def obtener_rasterizador(self):
+        """Rasterizador del modelo actual (colores y orientación de caras calculados una vez por STL)"""
+        if self.rasterizador is None or self.rasterizador.vertices is not self.malla_actual.vertices:
+            with TRAZADOR.tramo('preparar raster', 'render', caras=len(self.malla_actual.caras)):
+                self.rasterizador = RasterizadorZBuffer.desde_malla(self.malla_actual)
+        return self.rasterizador
+
+    def renderizar_raster(self, ancho, alto):
+        """Cuadro del rasterizador con la cámara de vista_actual (el modo sólido no lleva calibración)"""
+        vista = self.vista_actual
+        with TRAZADOR.tramo('rasterizar', 'render', ancho=ancho, alto=alto):
+            return self.obtener_rasterizador().renderizar(
+                ancho, alto, vista['elev'], vista['azim'], [vista['xlim'], vista['ylim'], vista['zlim']])
+
+    def aplicar_vista_actual(self):
+        """Llevar vista_actual a los ejes de matplotlib, para que el otro motor siga en la misma vista"""
+        self.aplicar_vista(self.vista_actual)
+
+    def on_raster_press(self, event):
+        self.arrastre_raster = (event.x, event.y, self.vista_actual['elev'], self.vista_actual['azim'])
+
+    def on_raster_drag(self, event):
+        """Rotar como mplot3d: arrastrar el ancho (o el alto) completo del visor gira 180°"""
+        if self.arrastre_raster is None:
+            return
+        x, y, elev, azim = self.arrastre_raster
+        widget = self.visor_raster.get_tk_widget()
+        self.vista_actual['elev'] = elev + (event.y - y) / max(widget.winfo_height(), 1) * 180
+        self.vista_actual['azim'] = azim - (event.x - x) / max(widget.winfo_width(), 1) * 180
+        self.programador_render.solicitar(self.aplicar_vista_actual)
+
+    def on_raster_release(self, event):
+        self.arrastre_raster = None
+
+    def on_raster_scroll(self, event):
+        """Zoom con la rueda en la vista raster (delta en Windows, botones 4 y 5 en X11)"""
+        acercar = event.num == 4 or getattr(event, 'delta', 0) > 0
+        self.zoom_pendiente *= 0.9 if acercar else 1.1
+        self.programador_render.solicitar(self.aplicar_zoom_pendiente)
+    
+    def aplicar_vista(self, vista):
+        """
+        Aplicar una vista guardada (elevación, azimut y límites) a la cámara.
+        En modo wireframe se suma la calibración de compensación entre modos.
+        """
+        if not vista:
+            # Vista isométrica por defecto para carga inicial
+            self.current_ax.view_init(elev=30, azim=45)
+            self.calibracion_aplicada = None
+            return
+        
+        if self.wireframe_var.get():
+            # Aplicar calibración en modo wireframe
+            elev_ajustado = vista['elev'] + self.calibracion['elev_offset']
+            azim_ajustado = vista['azim'] + self.calibracion['azim_offset']
+            zoom_factor = self.calibracion['zoom_offset']
+            self.calibracion_aplicada = dict(self.calibracion)
+        else:
+            # Modo sólido - sin calibración
+            elev_ajustado = vista['elev']
+            azim_ajustado = vista['azim']
+            zoom_factor = 1.0
+            self.calibracion_aplicada = None
+        
+        self.current_ax.view_init(elev=elev_ajustado, azim=azim_ajustado)
+        
+        if vista.get('xlim') is not None:
+            # Aplicar factor de zoom alrededor del centro de cada eje
+            for limites, fijar in ((vista['xlim'], self.current_ax.set_xlim),
+                                   (vista['ylim'], self.current_ax.set_ylim),
+                                   (vista['zlim'], self.current_ax.set_zlim)):
+                centro = (limites[0] + limites[1]) / 2
+                rango = (limites[1] - limites[0]) * zoom_factor
+                fijar([centro - rango / 2, centro + rango / 2])
+    
+    def encuadrar_modelo(self):
+        """Ajustar los límites de los ejes al modelo completo"""
+        # Límites precalculados en el mesh indexado: no hace falta releer el STL
+        minimo, maximo = float(self.malla_actual.minimo.min()), float(self.malla_actual.maximo.max())
+        escala = [minimo, maximo]
+        self.current_ax.set_autoscale_on(True)
+        self.current_ax.auto_scale_xyz(escala, escala, escala)
+        self.current_ax.set_autoscale_on(False)
+    
+    def on_mouse_press(self, event):
+        """Mostrar un nivel de detalle grueso mientras el usuario rota"""
+        if event.button in [1, 3]:
+            self.aplicar_nivel_lod(self.nivel_lod_arrastre)
     
     def on_mouse_release(self, event):
         """Capturar cuando el usuario suelta el mouse después de rotar"""
         # Sincronizar vista después de cualquier interacción con el mouse
         if event.button in [1, 3]:  # Botón izquierdo o derecho
+            self.aplicar_nivel_lod(0)  # Refinar al nivel más denso
+            self.programador_render.solicitar(self.actualizar_silueta)  # Silueta de la nueva orientación
             self.root.after(50, self.sincronizar_vista_actual)  # Pequeño delay para que matplotlib actualice
     
+    def obtener_niveles_lod(self):
+        """
+        Devuelve la pirámide LOD [(vectores, colores), ...] del modelo actual, del
+        nivel más denso al más grueso. Se reconstruye solo si cambia el archivo o
+        el presupuesto; los colores de iluminación quedan cacheados por nivel.
+        """
+        stl_path = self.current_stl_path
+        try:
+            presupuesto = max(100, int(self.presupuesto_triangulos.get()))
+        except (tk.TclError, ValueError):
+            presupuesto = PRESUPUESTO_TRIANGULOS  # Valor no numérico en el Spinbox
+        stat = os.stat(stl_path)
+        firma = (stl_path, stat.st_size, stat.st_mtime_ns, presupuesto)
+        if self.niveles_lod is None or self.niveles_lod_firma != firma:
+            presupuestos = [max(1, presupuesto // factor) for factor in FACTORES_LOD]
+            vertices, caras = self.malla_actual.vertices, self.malla_actual.caras
+            self.niveles_lod = [(vectores, calcular_colores_sombreado(vectores))
+                                for vectores in construir_piramide_lod(vertices, caras, presupuestos)]
+            self.niveles_lod_firma = firma
+        return self.niveles_lod
+    
+    def aplicar_nivel_lod(self, nivel, forzar=False):
+        """Cambiar los polígonos de la vista sólida al nivel de detalle indicado"""
+        if self.coleccion_solida is None or not self.niveles_lod:
+            return
+        if self.nivel_lod_actual == nivel and not forzar:
+            return
+        vectores, colores = self.niveles_lod[min(nivel, len(self.niveles_lod) - 1)]
+        self.coleccion_solida.set_verts(vectores)
+        self.coleccion_solida.set_facecolor(colores)
+        self.coleccion_solida.set_edgecolor(colores)
+        self.nivel_lod_actual = nivel
+        self.programador_render.solicitar()
+    
     def sincronizar_vista_actual(self):
-        """Guardar el estado actual de la vista en vista_actual"""
+        """
+        Guardar el estado actual de la vista en vista_actual, descontando la
+        calibración que se aplicó al mostrarla (vista_actual es la vista sin compensar)
+        """
         if self.current_ax:
-            self.vista_actual['elev'] = self.current_ax.elev
-            self.vista_actual['azim'] = self.current_ax.azim
-            self.vista_actual['xlim'] = self.current_ax.get_xlim()
-            self.vista_actual['ylim'] = self.current_ax.get_ylim()
-            self.vista_actual['zlim'] = self.current_ax.get_zlim()
+            calibracion = self.calibracion_aplicada or {'elev_offset': 0.0, 'azim_offset': 0.0, 'zoom_offset': 1.0}
+            self.vista_actual['elev'] = self.current_ax.elev - calibracion['elev_offset']
+            self.vista_actual['azim'] = self.current_ax.azim - calibracion['azim_offset']
+            for eje, limites in (('xlim', self.current_ax.get_xlim()),
+                                 ('ylim', self.current_ax.get_ylim()),
+                                 ('zlim', self.current_ax.get_zlim())):
+                centro = (limites[0] + limites[1]) / 2
+                rango = (limites[1] - limites[0]) / calibracion['zoom_offset']
+                self.vista_actual[eje] = (centro - rango / 2, centro + rango / 2)
     
     def on_scroll(self, event):
-        """Manejar el evento de scroll del mouse para hacer zoom"""
+        """
+        Manejar el evento de scroll del mouse para hacer zoom.
+        Los pasos de una ráfaga se acumulan en un único factor que se aplica
+        en el siguiente redibujado programado.
+        """
         if self.current_ax is None:
             return
         
+        # Factor de zoom (scroll up = zoom in, scroll down = zoom out)
+        if event.button == 'up':
+            scale_factor = 0.9  # Zoom in (acercar)
+        elif event.button == 'down':
+            scale_factor = 1.1  # Zoom out (alejar)
+        else:
+            return
+        
+        self.zoom_pendiente *= scale_factor
+        self.programador_render.solicitar(self.aplicar_zoom_pendiente)
+    
+    def aplicar_zoom_pendiente(self):
+        """Aplicar el factor de zoom acumulado por los eventos de scroll"""
+        scale_factor = self.zoom_pendiente
+        self.zoom_pendiente = 1.0
+        if self.current_ax is None or scale_factor == 1.0:
+            return
+        
         # Obtener los límites actuales
         xlim = self.current_ax.get_xlim()
         ylim = self.current_ax.get_ylim()
@@ -524,14 +1002,6 @@ class App:
         ydata = (ylim[0] + ylim[1]) / 2
         zdata = (zlim[0] + zlim[1]) / 2
         
-        # Factor de zoom (scroll up = zoom in, scroll down = zoom out)
-        if event.button == 'up':
-            scale_factor = 0.9  # Zoom in (acercar)
-        elif event.button == 'down':
-            scale_factor = 1.1  # Zoom out (alejar)
-        else:
-            return
-        
         # Calcular nuevos límites
         new_xlim = [xdata - (xdata - xlim[0]) * scale_factor,
                     xdata + (xlim[1] - xdata) * scale_factor]
@@ -547,41 +1017,55 @@ class App:
         
         # Actualizar estado persistente
         self.sincronizar_vista_actual()
-        
-        # Redibujar
-        self.canvas_3d.draw()
     
     def cambiar_vista(self, elevacion, azimut):
         """Cambiar la vista 3D a una posición preestablecida"""
         if self.current_ax:
-            self.current_ax.view_init(elev=elevacion, azim=azimut)
-            
-            # Actualizar estado persistente
+            # Actualizar estado persistente y aplicarlo (con calibración si corresponde)
             self.sincronizar_vista_actual()
+            self.vista_actual['elev'] = elevacion
+            self.vista_actual['azim'] = azimut
+            self.aplicar_vista(self.vista_actual)
             
-            self.canvas_3d.draw()
+            self.programador_render.solicitar(self.actualizar_silueta)
     
     def restablecer_zoom(self):
         """Restablecer el zoom a la vista completa del modelo"""
         if self.current_ax and self.current_stl_path:
-            stl_mesh = mesh.Mesh.from_file(self.current_stl_path)
-            scale = stl_mesh.points.flatten()
-            self.current_ax.auto_scale_xyz(scale, scale, scale)
+            self.encuadrar_modelo()
             
             # Actualizar estado persistente
             self.sincronizar_vista_actual()
             
-            self.canvas_3d.draw()
+            self.programador_render.solicitar()
     
     def actualizar_visualizacion(self):
-        """Actualizar la visualización cuando cambian los controles"""
-        if self.current_stl_path:
-            # Sincronizar estado antes de recrear (por si hay cambios de rotación manual)
-            if self.current_ax:
-                self.sincronizar_vista_actual()
-            
-            # Recrear la visualización usando el estado persistente
-            self.visualizar_stl(self.current_stl_path, restaurar_vista=self.vista_actual)
+        """
+        Actualizar la visualización cuando cambian los controles, sin reconstruir
+        la escena: cambia la visibilidad de los artistas y la cámara
+        """
+        if self.current_stl_path and self.current_ax:
+            # Las ráfagas (sliders de calibración) se agrupan en un solo redibujado
+            self.programador_render.solicitar(self.aplicar_estado_visual)
+    
+    def aplicar_estado_visual(self):
+        """Aplicar el modo y la cámara actuales a la escena (sin dibujar)"""
+        if not self.current_ax:
+            return
+        # Sincronizar estado antes de cambiar (por si hay cambios de rotación manual)
+        self.sincronizar_vista_actual()
+        
+        if self.wireframe_var.get() != self.modo_wireframe_mostrado or self.usar_raster() != self.raster_mostrado:
+            self.mostrar_modo()
+            self.mostrar_motor()
+        self.aplicar_vista(self.vista_actual)
+        self.actualizar_silueta()
+    
+    def actualizar_detalle(self):
+        """Reconstruir la pirámide LOD con el nuevo presupuesto y actualizar los polígonos"""
+        if self.current_stl_path and self.coleccion_solida is not None:
+            self.obtener_niveles_lod()
+            self.aplicar_nivel_lod(0, forzar=True)
     
     def limpiar_archivos_temporales(self):
         """Eliminar todos los archivos temporales STL creados"""
@@ -596,70 +1080,27 @@ class App:
     
     def exportar_plano_tecnico(self):
         """Exporta vistas técnicas 2D del modelo para planos normados"""
-        if not self.current_stl_path or not self.current_trimesh:
+        if not self.current_stl_path:
             messagebox.showwarning("Advertencia", "Primero carga un modelo 3D")
             return
         
         try:
+            nombre_base = os.path.splitext(os.path.basename(self.current_stl_path))[0]
+            if self.plano_vectorial.get():
+                self.exportar_plano_pdf(nombre_base)
+                return
+
             # Solicitar carpeta de destino
             carpeta_destino = filedialog.askdirectory(title="Seleccionar carpeta para guardar planos")
             if not carpeta_destino:
                 return
             
-            nombre_base = os.path.splitext(os.path.basename(self.current_stl_path))[0]
-            
-            # Generar vistas ortográficas estándar usando trimesh
-            vistas = {
-                'frontal': ([0, 0, 1], [0, 1, 0]),     # Vista Z, arriba Y
-                'superior': ([0, 1, 0], [1, 0, 0]),    # Vista Y, arriba X
-                'lateral': ([1, 0, 0], [0, 0, 1]),     # Vista X, arriba Z
-                'isometrica': ([1, 1, 1], [0, 0, 1])   # Vista isométrica
-            }
-            
-            archivos_generados = []
+            trabajos = [(nombre_vista, visibles, os.path.join(carpeta_destino, f"{nombre_base}_{nombre_vista}.png"), ocultos)
+                        for nombre_vista, visibles, ocultos in self.vistas_plano_actual()]
             
-            for nombre_vista, (direccion, arriba) in vistas.items():
-                # Crear figura para esta vista
-                fig = plt.figure(figsize=(10, 10), dpi=150)
-                ax = fig.add_subplot(111)
-                
-                # Proyección 2D de las aristas técnicas
-                aristas_tecnicas, _ = self.extraer_caracteristicas_tecnicas(self.current_stl_path)
-                
-                # Proyectar aristas a 2D según la dirección de vista
-                direccion = np.array(direccion, dtype=float)
-                direccion = direccion / np.linalg.norm(direccion)
-                arriba = np.array(arriba, dtype=float)
-                arriba = arriba / np.linalg.norm(arriba)
-                
-                # Crear sistema de coordenadas 2D
-                derecha = np.cross(arriba, direccion)
-                derecha = derecha / np.linalg.norm(derecha)
-                
-                # Proyectar cada arista
-                for arista in aristas_tecnicas:
-                    p1, p2 = np.array(arista[0]), np.array(arista[1])
-                    
-                    # Proyectar puntos 3D a 2D
-                    p1_2d = np.array([np.dot(p1, derecha), np.dot(p1, arriba)])
-                    p2_2d = np.array([np.dot(p2, derecha), np.dot(p2, arriba)])
-                    
-                    # Dibujar línea
-                    ax.plot([p1_2d[0], p2_2d[0]], [p1_2d[1], p2_2d[1]], 
-                           'k-', linewidth=0.5)
-                
-                # Configurar aspecto técnico
-                ax.set_aspect('equal')
-                ax.grid(True, alpha=0.3, linestyle='--')
-                ax.set_title(f'Vista {nombre_vista.capitalize()}', fontsize=12, fontweight='bold')
-                
-                # Guardar como PNG de alta calidad
-                archivo_salida = os.path.join(carpeta_destino, f"{nombre_base}_{nombre_vista}.png")
-                plt.savefig(archivo_salida, dpi=300, bbox_inches='tight', 
-                           facecolor='white', edgecolor='none')
-                plt.close(fig)
-                
-                archivos_generados.append(archivo_salida)
+            # Renderizar las vistas (en procesos si son grandes y hay núcleos libres)
+            archivos_generados = renderizar_vistas_paralelo(trabajos)
+            for nombre_vista, archivo_salida in zip(VISTAS_ORTOGRAFICAS, archivos_generados):
                 print(f"Vista {nombre_vista} guardada: {archivo_salida}")
             
             messagebox.showinfo("Éxito", 
@@ -669,45 +1110,2901 @@ class App:
         except Exception as e:
             messagebox.showerror("Error", f"Error al exportar planos: {str(e)}")
             print(f"Error detallado: {e}")
+
+    def vistas_plano_actual(self):
+        """Vistas de plano del modelo cargado, con el umbral de aristas actual y las caches de la App"""
+        # Extraer aristas UNA sola vez; cada vista añade su propia silueta
+        aristas_tecnicas = self.obtener_aristas_tecnicas(self.current_stl_path)
+        detector = self.obtener_detector_siluetas(self.current_stl_path)
+        triangulos = self.almacen_mallas.obtener(self.current_stl_path, completa=True).vectores
+        return vistas_plano(aristas_tecnicas, detector, triangulos)
+
+    def exportar_plano_pdf(self, nombre_base):
+        """Exporta todas las vistas del modelo a un PDF vectorial de varias hojas con cajetín"""
+        salida = filedialog.asksaveasfilename(title="Guardar plano 2D", defaultextension=".pdf",
+                                              initialfile=f"{nombre_base}_plano.pdf",
+                                              filetypes=[("PDF", "*.pdf")])
+        if not salida:
+            return
+        with TRAZADOR.tramo('exportar plano PDF', 'pdf', pieza=nombre_base):
+            hojas = exportar_planos_pdf([(nombre_base, self.vistas_plano_actual())], salida)
+        print(f"Plano 2D guardado: {salida} ({hojas} hojas)")
+        if salida not in self.planos_vectoriales:
+            self.planos_vectoriales.append(salida)
+        messagebox.showinfo("Éxito", f"Plano 2D guardado ({hojas} hojas):\n{salida}")
     
     def on_closing(self):
         """Manejar el evento de cierre de la ventana"""
         print("\nCerrando aplicación y limpiando archivos temporales...")
+        print(self.programador_render.resumen())
         self.limpiar_archivos_temporales()
         self.root.destroy()
 
 
-def exportar_a_pdf(swApp, slddrw_path, temp_dir):
-    from win32com.client import VARIANT
-    import pythoncom
-    swDocDRAWING = 3
-    swOpenDocOptions_Silent = 64
-    errors = VARIANT(pythoncom.VT_BYREF | pythoncom.VT_I4, 0)
-    warnings = VARIANT(pythoncom.VT_BYREF | pythoncom.VT_I4, 0)
-    drawing = swApp.OpenDoc6(slddrw_path, swDocDRAWING, swOpenDocOptions_Silent, '', errors, warnings)
-    if drawing is None:
-        print(f"No se pudo abrir {os.path.basename(slddrw_path)}")
-        return None
-    pdf_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(slddrw_path))[0] + '.pdf')
-    try:
-        result = drawing.SaveAs(pdf_path)
-        if result:
-            print(f"Guardado: {pdf_path}")
-            return pdf_path
+class _Tramo:
+    """Tramo en curso de una traza activa (ver Trazador.tramo)"""
+    __slots__ = ('trazador', 'nombre', 'categoria', 'args', 'inicio')
+
+    def __init__(self, trazador, nombre, categoria, args):
+        self.trazador = trazador
+        self.nombre = nombre
+        self.categoria = categoria
+        self.args = args
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.trazador._registrar(self.nombre, self.categoria, self.inicio, time.perf_counter_ns(), self.args)
+        return False
+
+
+_TRAMO_NULO = contextlib.nullcontext()
+
+
+class Trazador:
+    """
+    Instrumentación por tramos con nombre. Desactivada, tramo() devuelve un
+    contexto vacío compartido y el coste es una comprobación. Activada, cada
+    tramo se guarda como evento completo ("ph": "X") del formato de traza de
+    Chrome (chrome://tracing, Perfetto) y al salir se vuelca el JSON y se
+    imprime un resumen por etapa. Los procesos de exportación escriben su parte
+    junto a la traza y el proceso principal las une al volcar.
+    """
+
+    def __init__(self):
+        self.ruta = None
+        self._eventos = []
+        self._lock = threading.Lock()
+
+    @property
+    def activo(self):
+        return self.ruta is not None
+
+    def activar(self, ruta):
+        self.ruta = os.path.abspath('traza_solidpdf.json' if ruta == '1' else ruta)
+        # Los procesos hijos (spawn) heredan el entorno y se activan al importar el módulo
+        os.environ[VARIABLE_TRAZA] = self.ruta
+        if self._es_proceso_principal():
+            for parte in glob.glob(self.ruta + '.*.parte'):
+                os.remove(parte)  # restos de una ejecución anterior
+            atexit.register(self.finalizar)
         else:
-            print(f"Error al guardar {pdf_path}")
-            return None
-    except Exception as e:
-        print(f"Error exportando {os.path.basename(slddrw_path)}: {e}")
-        return None
-    finally:
-        swApp.CloseDoc(os.path.basename(slddrw_path))
+            atexit.register(self.volcar_parte)
 
+    @staticmethod
+    def _es_proceso_principal():
+        # Al importar el módulo en un hijo spawn, parent_process() aún es None pero el nombre ya está asignado
+        return multiprocessing.current_process().name == 'MainProcess'
+
+    def tramo(self, nombre, categoria='general', **args):
+        """Contexto que mide el tramo `nombre`; los kwargs se guardan como argumentos del evento"""
+        if self.ruta is None:
+            return _TRAMO_NULO
+        return _Tramo(self, nombre, categoria, args)
+
+    def envolver(self, funcion, nombre, categoria='general'):
+        """Versión de `funcion` que registra cada llamada como un tramo"""
+        def envuelta(*args, **kwargs):
+            with self.tramo(nombre, categoria):
+                return funcion(*args, **kwargs)
+        return envuelta
+
+    def _registrar(self, nombre, categoria, inicio_ns, fin_ns, args):
+        evento = {'name': nombre, 'cat': categoria, 'ph': 'X', 'ts': inicio_ns / 1000,
+                  'dur': (fin_ns - inicio_ns) / 1000, 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if args:
+            evento['args'] = args
+        with self._lock:
+            self._eventos.append(evento)
+
+    def volcar_parte(self):
+        """En un proceso hijo: escribir sus eventos para que los una el proceso principal"""
+        if self.ruta is None or not self._eventos:
+            return
+        with self._lock:
+            eventos, self._eventos = self._eventos, []
+        escribir_json_atomico(f"{self.ruta}.{os.getpid()}.parte", eventos)
+
+    def finalizar(self):
+        """Unir las partes de los procesos hijos, escribir la traza e imprimir el resumen"""
+        with self._lock:
+            eventos = list(self._eventos)
+        for parte in glob.glob(self.ruta + '.*.parte'):
+            try:
+                with open(parte, encoding='utf-8') as f:
+                    eventos.extend(json.load(f))
+                os.remove(parte)
+            except (OSError, ValueError) as e:
+                print(f"No se pudo leer la parte de traza {parte}: {e}")
+        nombres = [{'name': 'process_name', 'ph': 'M', 'pid': pid,
+                    'args': {'name': 'principal' if pid == os.getpid() else f'exportador {pid}'}}
+                   for pid in sorted({e['pid'] for e in eventos})]
+        try:
+            escribir_json_atomico(self.ruta, {'traceEvents': nombres + eventos, 'displayTimeUnit': 'ms'})
+            print(f"Traza guardada en {self.ruta}")
+        except OSError as e:
+            print(f"No se pudo guardar la traza: {e}")
+        print(self.resumen(eventos))
+
+    def resumen(self, eventos=None):
+        """Tabla por etapa: llamadas, tiempo total, medio y máximo"""
+        if eventos is None:
+            eventos = self._eventos
+        etapas = {}
+        for evento in eventos:
+            etapas.setdefault(evento['name'], []).append(evento['dur'] / 1000)
+        filas = sorted(etapas.items(), key=lambda e: -sum(e[1]))
+        ancho = max([len(nombre) for nombre in etapas] + [5])
+        lineas = [f"{'Etapa':<{ancho}}  {'N':>6}  {'Total s':>9}  {'Media ms':>9}  {'Máx ms':>9}"]
+        for nombre, duraciones in filas:
+            lineas.append(f"{nombre:<{ancho}}  {len(duraciones):>6}  {sum(duraciones) / 1000:>9.3f}  "
+                          f"{sum(duraciones) / len(duraciones):>9.1f}  {max(duraciones):>9.1f}")
+        return "\n".join(lineas)
+
+
+# Trazador global del módulo; se activa con la variable de entorno o con --traza
+TRAZADOR = Trazador()
+if os.environ.get(VARIABLE_TRAZA):
+    TRAZADOR.activar(os.environ[VARIABLE_TRAZA])
+
+
+class BusProgreso:
+    """
+    Bus de eventos de progreso entre hilos. Los hilos de trabajo publican en
+    una cola (sin tocar widgets) y el hilo de Tk la vacía cada `intervalo_ms`:
+    los campos de estado de una ráfaga se fusionan (gana el último valor) y se
+    aplican con una sola llamada a `aplicar`; las llamadas encoladas con
+    ejecutar() se hacen todas, en orden, en el hilo de Tk.
+    """
+
+    def __init__(self, root, aplicar, intervalo_ms=INTERVALO_PROGRESO_MS):
+        self.root = root
+        self.aplicar = aplicar
+        self.intervalo_ms = intervalo_ms
+        self._cola = queue.SimpleQueue()
+        # Estadísticas
+        self.eventos = 0
+        self.repintados = 0
+        self.root.after(self.intervalo_ms, self._drenar)
+
+    def publicar(self, **campos):
+        """Publicar campos de estado (seguro desde cualquier hilo)"""
+        self._cola.put((None, campos, None))
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        """Encolar una llamada para el hilo de Tk (messagebox, botones, visualización...)"""
+        self._cola.put((funcion, args, kwargs))
+
+    def _drenar(self):
+        estado = {}
+        try:
+            while True:
+                funcion, args, kwargs = self._cola.get_nowait()
+                self.eventos += 1
+                if funcion is None:
+                    estado.update(args)
+                    continue
+                # Las llamadas ven aplicado el estado publicado antes que ellas
+                if estado:
+                    self._aplicar(estado)
+                    estado = {}
+                try:
+                    funcion(*args, **kwargs)
+                except Exception as e:
+                    print(f"Error en una llamada del bus de progreso: {e}")
+        except queue.Empty:
+            pass
+        if estado:
+            self._aplicar(estado)
+        self.root.after(self.intervalo_ms, self._drenar)
+
+    def _aplicar(self, estado):
+        self.repintados += 1
+        try:
+            self.aplicar(estado)
+        except Exception as e:
+            print(f"Error aplicando el progreso: {e}")
+
+
+def cargar_subsistema(nombre):
+    """Importar ahora los módulos de un subsistema (ver SUBSISTEMAS)"""
+    for modulo in SUBSISTEMAS[nombre]:
+        modulo.cargar()
+
+
+def precargar_subsistemas(nombres=None):
+    """
+    Importar los subsistemas disponibles en un hilo en segundo plano, para que
+    el primer uso no espere a la importación. Si el usuario llega antes, el
+    hilo principal espera solo lo que falte de ese módulo. Devuelve el hilo.
+    """
+    def precargar():
+        for nombre in nombres or SUBSISTEMAS:
+            if not all(modulo.disponible for modulo in SUBSISTEMAS[nombre]):
+                continue
+            try:
+                cargar_subsistema(nombre)
+            except Exception as e:  # Se volverá a intentar (y a informar) en el primer uso
+                print(f"No se pudo precargar el subsistema {nombre}: {e}")
+
+    hilo = threading.Thread(target=precargar, name='precarga', daemon=True)
+    hilo.start()
+    return hilo
+
+
+class ProgramadorRender:
+    """
+    Agrupa ráfagas de solicitudes de redibujado (sliders, scroll, botones) en
+    como máximo un draw_idle por intervalo. De cada tipo de cambio (función de
+    estado) solo se aplica una vez antes de dibujar: los estados intermedios de
+    una ráfaga se descartan.
+    """
+
+    def __init__(self, root, obtener_canvas, intervalo_ms=INTERVALO_RENDER_MS):
+        self.root = root
+        self.obtener_canvas = obtener_canvas
+        self.intervalo_ms = intervalo_ms
+        self._pendientes = {}  # función de estado -> None (conserva el orden de llegada)
+        self._programado = None
+        # Estadísticas para ajustar el intervalo
+        self.solicitudes = 0
+        self.redibujados = 0
+
+    @property
+    def fusionados(self):
+        """Solicitudes que no generaron un redibujado propio"""
+        return self.solicitudes - self.redibujados - (1 if self._programado else 0)
+
+    def solicitar(self, aplicar_estado=None):
+        """
+        Pedir un redibujado. aplicar_estado (opcional) se ejecuta una sola vez
+        justo antes de dibujar, aunque se solicite varias veces en la ráfaga.
+        """
+        self.solicitudes += 1
+        if aplicar_estado is not None:
+            self._pendientes[aplicar_estado] = None
+        if self._programado is None:
+            self._programado = self.root.after(self.intervalo_ms, self._ejecutar)
+
+    def _ejecutar(self):
+        self._programado = None
+        pendientes, self._pendientes = self._pendientes, {}
+        for aplicar in pendientes:
+            aplicar()
+        canvas = self.obtener_canvas()
+        if canvas is not None:
+            canvas.draw_idle()
+            self.redibujados += 1
+
+    def resumen(self):
+        return (f"Render: {self.solicitudes} solicitudes, {self.redibujados} redibujados, "
+                f"{self.fusionados} fusionados (intervalo {self.intervalo_ms} ms)")
+
+
+class VisorRaster:
+    """
+    Vista del RasterizadorZBuffer dentro de Tk: un Canvas cuya imagen se
+    reemplaza en cada cuadro por la imagen RGB codificada como PPM, sin pasar
+    por matplotlib ni PIL. Ofrece get_tk_widget y draw_idle como el canvas de
+    matplotlib, así que el ProgramadorRender lo redibuja del mismo modo.
+    """
+
+    def __init__(self, master, renderizar, ancho=640, alto=480):
+        self.renderizar = renderizar  # (ancho, alto) -> imagen (alto, ancho, 3) uint8
+        self.canvas = tk.Canvas(master, bg='white', highlightthickness=0, width=ancho, height=alto)
+        self._item = self.canvas.create_image(0, 0, anchor=tk.NW)
+        self.foto = None
+
+    def get_tk_widget(self):
+        return self.canvas
+
+    def draw_idle(self):
+        """Dibujar el cuadro al tamaño actual del widget (síncrono: el programador ya agrupa las ráfagas)"""
+        ancho, alto = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if ancho < 2 or alto < 2:  # Todavía sin mapear
+            ancho, alto = int(self.canvas['width']), int(self.canvas['height'])
+        imagen = np.ascontiguousarray(self.renderizar(ancho, alto), dtype=np.uint8)
+        # La referencia a la foto debe conservarse mientras se muestra
+        self.foto = tk.PhotoImage(data=b'P6 %d %d 255\n' % (ancho, alto) + imagen.tobytes(), format='PPM')
+        self.canvas.itemconfigure(self._item, image=self.foto)
+
+
+class LectorSTL:
+    """
+    Lector de STL por bloques. Los STL binarios se abren con np.memmap y los
+    registros de triángulos se exponen como vistas estructuradas sin copia;
+    los ASCII se leen línea a línea. Límites y simplificación se calculan
+    bloque a bloque, con memoria acotada aunque el archivo no quepa en RAM.
+    """
+
+    def __init__(self, stl_path, tam_bloque=500_000):
+        self.stl_path = stl_path
+        self.tam_bloque = tam_bloque
+        tamano = os.path.getsize(stl_path)
+        with open(stl_path, 'rb') as f:
+            inicio = f.read(1024)
+        self.num_triangulos = int(np.frombuffer(inicio[80:84], dtype='<u4')[0]) if tamano >= 84 else 0
+        necesario = 84 + DTYPE_TRIANGULO_STL.itemsize * self.num_triangulos
+        cabecera_ascii = inicio.lstrip().startswith(b'solid')
+        # Un STL binario ocupa 84 + 50 * n bytes (algunos empiezan con "solid"); el
+        # ASCII empieza con "solid" y enseguida aparece "facet". "facet" se busca
+        # después de los 80 bytes de cabecera, porque hay exportadores que lo
+        # escriben en la cabecera del binario (el primer "endfacet" de un ASCII ya
+        # queda más allá). Algunos exportadores agregan bytes al final del
+        # binario, que se ignoran.
+        if tamano >= 84 and tamano == necesario:
+            self.binario = True
+        elif cabecera_ascii and b'facet' in inicio[80:]:
+            self.binario = False
+        elif tamano >= 84 and tamano > necesario:
+            self.binario = True
+        elif cabecera_ascii:
+            self.binario = False  # ASCII sin facetas
+        else:
+            raise ValueError(f"{os.path.basename(stl_path)} no es un STL válido "
+                             f"({tamano} bytes; un binario con {self.num_triangulos} triángulos necesita {necesario})")
+        if not self.binario:
+            self.num_triangulos = None  # Desconocido hasta leer el ASCII
+
+    def registros(self):
+        """Vista memory-mapped (sin copia) de todos los registros de un STL binario"""
+        if not self.binario:
+            raise ValueError("Solo los STL binarios exponen registros memory-mapped")
+        if self.num_triangulos == 0:
+            return np.empty(0, dtype=DTYPE_TRIANGULO_STL)
+        return np.memmap(self.stl_path, dtype=DTYPE_TRIANGULO_STL, mode='r',
+                         offset=84, shape=(self.num_triangulos,))
+
+    def bloques(self):
+        """Generar bloques de triángulos (k, 3, 3) float32"""
+        if self.binario:
+            registros = self.registros()
+            for inicio in range(0, len(registros), self.tam_bloque):
+                yield registros['vertices'][inicio:inicio + self.tam_bloque]
+            del registros
+            return
+
+        # STL ASCII: acumular vértices línea a línea
+        puntos = []
+        with open(self.stl_path, 'r', errors='replace') as f:
+            for linea in f:
+                partes = linea.split()
+                if partes and partes[0] == 'vertex':
+                    puntos.append([float(c) for c in partes[1:4]])
+                    if len(puntos) == 3 * self.tam_bloque:
+                        yield np.array(puntos, dtype=np.float32).reshape(-1, 3, 3)
+                        puntos = []
+        if puntos:
+            yield np.array(puntos[:len(puntos) // 3 * 3], dtype=np.float32).reshape(-1, 3, 3)
+
+    def leer_todo(self):
+        """Sopa de triángulos completa (T, 3, 3); solo para archivos que caben en memoria"""
+        if self.binario:
+            return np.array(self.registros()['vertices'])  # Una sola copia desde el memory-map
+        bloques = [np.array(bloque) for bloque in self.bloques()]
+        if not bloques:
+            return np.empty((0, 3, 3), dtype=np.float32)
+        return np.concatenate(bloques)
+
+    def limites(self):
+        """Mínimo y máximo por eje, calculados por bloques"""
+        minimo = np.full(3, np.inf)
+        maximo = np.full(3, -np.inf)
+        for bloque in self.bloques():
+            puntos = bloque.reshape(-1, 3)
+            if len(puntos):
+                minimo = np.minimum(minimo, puntos.min(axis=0))
+                maximo = np.maximum(maximo, puntos.max(axis=0))
+        return minimo, maximo
+
+    def indexar(self):
+        """
+        Vértices compartidos y caras del mesh completo, deduplicando por bloques:
+        cada bloque se indexa por separado y luego se unen sus vértices, así nunca
+        hay en memoria más que un bloque de la sopa de triángulos.
+        """
+        vertices_acum = []
+        caras_acum = []
+        desplazamiento = 0
+        for bloque in self.bloques():
+            vertices, caras = indexar_triangulos(bloque)
+            vertices_acum.append(vertices)
+            caras_acum.append(caras.astype(np.int64) + desplazamiento)
+            desplazamiento += len(vertices)
+        if not vertices_acum:
+            return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int64)
+        vertices, caras = indexar_triangulos(np.concatenate(vertices_acum))
+        caras = caras.ravel()
+        return vertices, np.concatenate([caras[c] for c in caras_acum])
+
+    def simplificar(self, resolucion):
+        """
+        Agrupamiento de vértices por bloques (igual que simplificar_por_agrupamiento
+        pero sin tener el mesh completo en memoria). La memoria crece con el
+        tamaño del resultado, no con el del archivo.
+        Devuelve (vértices, caras) del mesh simplificado.
+        """
+        minimo, maximo = self.limites()
+        if not np.all(np.isfinite(minimo)):
+            return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int64)
+        escala = resolucion / max(float((maximo - minimo).max()), 1e-12)
+
+        celdas_acum = []  # (claves, sumas, conteos) por bloque
+        triangulos_acum = []
+        for bloque in self.bloques():
+            puntos = np.asarray(bloque, dtype=np.float64).reshape(-1, 3)
+            celdas = np.floor((puntos - minimo) * escala).astype(np.int64)
+            np.minimum(celdas, resolucion - 1, out=celdas)
+            clave = (celdas[:, 0] * resolucion + celdas[:, 1]) * resolucion + celdas[:, 2]
+
+            # Sumas de posiciones por celda de este bloque
+            unicas, grupo = np.unique(clave, return_inverse=True)
+            sumas = np.column_stack([np.bincount(grupo, weights=puntos[:, eje]) for eje in range(3)])
+            celdas_acum.append((unicas, sumas, np.bincount(grupo)))
+
+            # Triángulos en términos de celdas, sin degenerados ni repetidos
+            tri = clave.reshape(-1, 3)
+            validas = (tri[:, 0] != tri[:, 1]) & (tri[:, 1] != tri[:, 2]) & (tri[:, 0] != tri[:, 2])
+            triangulos_acum.append(_triangulos_unicos(tri[validas]))
+
+            # Compactar cuando lo acumulado crece, para mantener la memoria acotada
+            if len(celdas_acum) >= 8:
+                celdas_acum = [_fusionar_celdas(celdas_acum)]
+                triangulos_acum = [_triangulos_unicos(np.concatenate(triangulos_acum))]
+
+        if not celdas_acum:
+            return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int64)
+        claves, sumas, conteos = _fusionar_celdas(celdas_acum)
+        triangulos = _triangulos_unicos(np.concatenate(triangulos_acum))
+
+        centroides = (sumas / conteos[:, np.newaxis]).astype(np.float32)
+        caras = np.searchsorted(claves, triangulos)
+        # Compactar vértices no usados
+        usados, caras = np.unique(caras, return_inverse=True)
+        return centroides[usados], caras.reshape(-1, 3)
+
+
+def _fusionar_celdas(celdas_acum):
+    """Combinar (claves, sumas, conteos) de varios bloques en uno solo"""
+    claves = np.concatenate([c[0] for c in celdas_acum])
+    sumas = np.concatenate([c[1] for c in celdas_acum])
+    conteos = np.concatenate([c[2] for c in celdas_acum])
+    unicas, grupo = np.unique(claves, return_inverse=True)
+    sumas = np.column_stack([np.bincount(grupo, weights=sumas[:, eje]) for eje in range(3)])
+    return unicas, sumas, np.bincount(grupo, weights=conteos).astype(np.int64)
+
+
+def _triangulos_unicos(triangulos):
+    """Eliminar triángulos repetidos (mismos tres índices en cualquier orden) conservando orientación"""
+    if len(triangulos) == 0:
+        return triangulos.reshape(0, 3)
+    ordenados = np.ascontiguousarray(np.sort(triangulos, axis=1))
+    filas = ordenados.view(np.dtype((np.void, ordenados.dtype.itemsize * 3))).ravel()
+    _, primeros = np.unique(filas, return_index=True)
+    return triangulos[np.sort(primeros)]
+
+
+class MallaIndexada:
+    """
+    Representación única de un STL: vértices compartidos y caras indexadas, con
+    límites y normales de cara precalculados. La adyacencia y los bordes abiertos
+    se calculan la primera vez que se piden, ordenando las aristas de todas las
+    caras, y solo quedan cacheados esos resultados compactos.
+    """
+
+    def __init__(self, vertices, caras):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.caras = np.ascontiguousarray(caras, dtype=np.int32 if len(self.vertices) < 2**31 else np.int64)
+        self.minimo = self.vertices.min(axis=0) if len(self.vertices) else np.zeros(3, dtype=np.float32)
+        self.maximo = self.vertices.max(axis=0) if len(self.vertices) else np.zeros(3, dtype=np.float32)
+
+        # Normales de cara
+        v0, v1, v2 = (self.vertices[self.caras[:, i]] for i in range(3))
+        normales = np.cross(v1 - v0, v2 - v0)
+        mag = np.linalg.norm(normales, axis=1)
+        mag[mag == 0] = 1  # Evitar división por cero
+        self.normales_caras = normales / mag[:, np.newaxis]
+
+        self._adyacencia = None
+        self._bordes = None
+
+    @classmethod
+    def desde_stl(cls, stl_path, completa=False):
+        """
+        Parsear el STL una vez. Los archivos grandes se leen por bloques sobre un
+        memory-map, sin cargar nunca la sopa de triángulos completa: para mostrar
+        se simplifican, y con completa=True (aristas, siluetas, exportación) se
+        indexan a resolución completa.
+        """
+        lector = LectorSTL(stl_path)
+        if os.path.getsize(stl_path) <= LIMITE_CARGA_COMPLETA_BYTES:
+            return cls(*indexar_triangulos(lector.leer_todo()))
+        if completa:
+            return cls(*lector.indexar())
+        return cls(*lector.simplificar(RESOLUCION_STREAMING))
+
+    def _analizar_aristas(self):
+        """
+        Agrupar las aristas de todas las caras por sus vértices ordenados: las
+        que aparecen en exactamente dos caras distintas dan un par adyacente (como
+        face_adjacency de trimesh) y las que aparecen en una sola son bordes.
+        """
+        tipo = self.caras.dtype
+        aristas = np.sort(self.caras[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+        claves = aristas[:, 0].astype(np.int64) * max(len(self.vertices), 1) + aristas[:, 1]
+        orden = np.argsort(claves, kind='stable')
+        claves = claves[orden]
+        inicio = np.flatnonzero(np.r_[True, claves[1:] != claves[:-1]])
+        cuenta = np.diff(np.r_[inicio, len(claves)])
+        dobles = inicio[cuenta == 2]
+        pares = np.stack([orden[dobles] // 3, orden[dobles + 1] // 3], axis=1)
+        distintas = pares[:, 0] != pares[:, 1]
+        self._adyacencia = (pares[distintas].astype(tipo), aristas[orden[dobles[distintas]]])
+        self._bordes = aristas[orden[inicio[cuenta == 1]]]
+
+    @property
+    def adyacencia(self):
+        """Pares de caras adyacentes (A, 2) y la arista compartida de cada par (A, 2)"""
+        if self._adyacencia is None:
+            self._analizar_aristas()
+        return self._adyacencia
+
+    @property
+    def bordes(self):
+        """Aristas abiertas (B, 2): índices de vértices de las aristas de una sola cara"""
+        if self._bordes is None:
+            self._analizar_aristas()
+        return self._bordes
+
+    @property
+    def vectores(self):
+        """Sopa de triángulos (T, 3, 3) generada bajo demanda"""
+        return self.vertices[self.caras]
+
+
+class AlmacenMallas:
+    """
+    Almacén de mallas parseadas, compartido por visor, análisis de aristas y
+    exportación. Cada STL se parsea una sola vez mientras no cambie en disco.
+    De los STL grandes se guardan dos mallas: la simplificada para mostrar y la
+    completa (completa=True) para aristas, siluetas y exportación.
+    """
+
+    def __init__(self, max_mallas=2):
+        self.max_mallas = max_mallas
+        self._mallas = {}  # ruta -> (firma, {completa: MallaIndexada}), en orden de uso
+
+    def obtener(self, stl_path, completa=False):
+        stat = os.stat(stl_path)
+        firma = (stat.st_size, stat.st_mtime_ns)
+        # Debajo del límite la malla mostrada ya es la completa
+        completa = completa or stat.st_size <= LIMITE_CARGA_COMPLETA_BYTES
+        entrada = self._mallas.pop(stl_path, None)
+        if entrada is None or entrada[0] != firma:
+            entrada = (firma, {})
+        if completa not in entrada[1]:
+            entrada[1][completa] = MallaIndexada.desde_stl(stl_path, completa=completa)
+        self._mallas[stl_path] = entrada
+        # Descartar las mallas usadas hace más tiempo
+        while len(self._mallas) > self.max_mallas:
+            del self._mallas[next(iter(self._mallas))]
+        return entrada[1][completa]
+
+
+def hash_archivo(ruta):
+    """Hash blake2b del contenido de un archivo, leído por bloques de 1 MB"""
+    h = hashlib.blake2b(digest_size=20)
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h
+
+
+def escribir_json_atomico(ruta, datos):
+    """Escribir JSON en un archivo temporal y reemplazar el destino de una vez"""
+    ruta_tmp = ruta + f'.{os.getpid()}.tmp'
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=1)
+    os.replace(ruta_tmp, ruta)
+
+
+class CacheConversion:
+    """
+    Cache persistente de PDFs exportados. Cada plano se identifica por su ruta,
+    tamaño y fecha de modificación; si estos cambian se compara el hash del
+    contenido antes de darlo por modificado. Los PDFs se guardan con el hash
+    del plano como nombre, así que un plano movido o copiado reutiliza su PDF.
+    """
+
+    def __init__(self, carpeta=None):
+        self.carpeta = carpeta or os.path.join(CARPETA_DATOS, 'cache_conversion')
+        self._ruta_indice = os.path.join(self.carpeta, 'indice.json')
+        try:
+            with open(self._ruta_indice, encoding='utf-8') as f:
+                self.indice = json.load(f)
+        except (OSError, ValueError):
+            self.indice = {}
+
+    def _pdf(self, hash_plano):
+        return os.path.join(self.carpeta, hash_plano + '.pdf')
+
+    def buscar(self, slddrw_path):
+        """Devolver el PDF cacheado del plano, o None si falta o está desactualizado"""
+        clave = os.path.abspath(slddrw_path)
+        try:
+            stat = os.stat(slddrw_path)
+        except OSError:
+            return None
+        entrada = self.indice.get(clave)
+        if entrada and entrada['tamano'] == stat.st_size and entrada['mtime_ns'] == stat.st_mtime_ns:
+            pdf = self._pdf(entrada['hash'])
+            return pdf if os.path.exists(pdf) else None
+
+        # Tamaño o fecha distintos: solo el hash decide si el contenido cambió
+        hash_plano = hash_archivo(slddrw_path).hexdigest()
+        pdf = self._pdf(hash_plano)
+        if not os.path.exists(pdf):
+            return None
+        self._registrar(clave, stat, hash_plano)
+        return pdf
+
+    def guardar(self, slddrw_path, pdf_exportado):
+        """Copiar un PDF recién exportado a la cache y devolver su ruta en ella"""
+        stat = os.stat(slddrw_path)
+        hash_plano = hash_archivo(slddrw_path).hexdigest()
+        os.makedirs(self.carpeta, exist_ok=True)
+        pdf = self._pdf(hash_plano)
+        shutil.copyfile(pdf_exportado, pdf + '.tmp')
+        os.replace(pdf + '.tmp', pdf)
+        self._registrar(os.path.abspath(slddrw_path), stat, hash_plano)
+        return pdf
+
+    def _registrar(self, clave, stat, hash_plano):
+        anterior = self.indice.get(clave)
+        self.indice[clave] = {'tamano': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': hash_plano}
+        try:
+            os.makedirs(self.carpeta, exist_ok=True)
+            escribir_json_atomico(self._ruta_indice, self.indice)
+            # Eliminar el PDF de la versión anterior si ya nadie lo referencia
+            if anterior and anterior['hash'] != hash_plano:
+                if all(e['hash'] != anterior['hash'] for e in self.indice.values()):
+                    os.remove(self._pdf(anterior['hash']))
+        except OSError as e:
+            print(f"No se pudo actualizar la cache de conversión: {e}")
+
+
+class ManifiestoLote:
+    """
+    Registro en disco del lote de conversión en curso: planos seleccionados y
+    planos ya exportados. Si la aplicación se cierra a mitad de un lote, el
+    manifiesto permite reanudarlo exportando solo lo que faltaba.
+    """
+
+    def __init__(self, archivos, completados=None, ruta=None):
+        self.ruta = ruta or os.path.join(CARPETA_DATOS, 'lote_en_curso.json')
+        self.archivos = list(archivos)
+        self.completados = set(completados or ())
+
+    @classmethod
+    def cargar(cls, ruta=None):
+        """Cargar el manifiesto de un lote interrumpido, o None si no hay ninguno"""
+        ruta = ruta or os.path.join(CARPETA_DATOS, 'lote_en_curso.json')
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+            return cls(datos['archivos'], datos['completados'], ruta)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def guardar(self):
+        try:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            escribir_json_atomico(self.ruta, {'archivos': self.archivos,
+                                              'completados': sorted(self.completados)})
+        except OSError as e:
+            print(f"No se pudo guardar el manifiesto del lote: {e}")
+
+    def marcar_completado(self, slddrw_path):
+        self.completados.add(slddrw_path)
+        self.guardar()
+
+    @property
+    def pendientes(self):
+        return [a for a in self.archivos if a not in self.completados]
+
+    def finalizar(self):
+        """El lote terminó: eliminar el manifiesto"""
+        try:
+            os.remove(self.ruta)
+        except OSError:
+            pass
+
+
+class CacheAristasDisco:
+    """
+    Cache persistente de índices de aristas (IndiceAristas) en disco.
+    Cada entrada es un .npz con las aristas float32 (N, 2, 3) y sus ángulos,
+    cuyo nombre es el hash de la firma del STL (ruta, tamaño, fecha de
+    modificación, primer y último MB) más el ángulo mínimo del índice. Como el índice sirve para cualquier umbral, cambiar el umbral no
+    invalida la cache. Se respeta un tamaño máximo eliminando las entradas
+    usadas hace más tiempo (LRU por fecha de acceso).
+    """
+
+    def __init__(self, carpeta=None, limite_bytes=256 * 1024 * 1024):
+        self.carpeta = carpeta or os.path.join(CARPETA_DATOS, 'cache_aristas')
+        self.limite_bytes = limite_bytes
+
+    def clave(self, stl_path, angulo_minimo_grados, muestra=1024 * 1024):
+        """
+        Hash de la firma del STL combinado con el ángulo mínimo. Se llama desde el
+        hilo de Tk: leer solo la cabeza y la cola mantiene el coste constante
+        aunque el STL ocupe gigabytes.
+        """
+        stat = os.stat(stl_path)
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{os.path.abspath(stl_path)};{stat.st_size};{stat.st_mtime_ns}".encode())
+        with open(stl_path, 'rb') as f:
+            h.update(f.read(muestra))
+            if stat.st_size > muestra:
+                f.seek(max(stat.st_size - muestra, muestra))
+                h.update(f.read(muestra))
+        h.update(f"indice;minimo={float(angulo_minimo_grados):.6f}".encode())
+        return h.hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.carpeta, clave + '.npz')
+
+    def obtener(self, clave):
+        """Devuelve el IndiceAristas cacheado o None si no existe"""
+        ruta = self._ruta(clave)
+        try:
+            with np.load(ruta, allow_pickle=False) as datos:
+                indice = IndiceAristas(datos['aristas'], datos['angulos'])
+            os.utime(ruta)  # Marcar como usada recientemente
+            return indice
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def guardar(self, clave, indice):
+        """Guardar un índice de forma atómica y podar la cache si excede el límite"""
+        try:
+            os.makedirs(self.carpeta, exist_ok=True)
+            ruta = self._ruta(clave)
+            ruta_tmp = ruta + f'.{os.getpid()}.tmp'
+            with open(ruta_tmp, 'wb') as f:
+                np.savez(f, aristas=np.asarray(indice.aristas, dtype=np.float32), angulos=indice.angulos)
+            os.replace(ruta_tmp, ruta)
+            self._podar()
+        except OSError as e:
+            print(f"No se pudo guardar en cache de aristas: {e}")
+
+    def _podar(self):
+        """Eliminar las entradas menos usadas hasta quedar bajo el límite"""
+        entradas = []
+        for entrada in os.scandir(self.carpeta):
+            if entrada.name.endswith(('.npz', '.npy')):  # .npy: formato anterior (un solo umbral)
+                stat = entrada.stat()
+                entradas.append((stat.st_mtime, stat.st_size, entrada.path))
+        total = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in sorted(entradas):
+            if total <= self.limite_bytes:
+                break
+            try:
+                os.remove(ruta)
+                total -= tamano
+            except OSError:
+                pass
+
+
+def calcular_colores_sombreado(vectores):
+    """
+    Colores por triángulo con dos luces (principal + relleno) y luz ambiente.
+    vectores es un array (T, 3, 3); devuelve un array (T, 3) RGB.
+    """
+    # Calcular normales para sombreado realista
+    normales = np.cross(vectores[:, 1] - vectores[:, 0], vectores[:, 2] - vectores[:, 0])
+    mag = np.linalg.norm(normales, axis=1)
+    mag[mag == 0] = 1  # Evitar división por cero
+    normales = normales / mag[:, np.newaxis]
+
+    # Múltiples fuentes de luz para sombreado más realista
+    luz_principal = np.array([1, 1, 2])  # Luz principal desde arriba-derecha
+    luz_principal = luz_principal / np.linalg.norm(luz_principal)
+
+    luz_relleno = np.array([-0.5, -0.5, 1])  # Luz de relleno suave
+    luz_relleno = luz_relleno / np.linalg.norm(luz_relleno)
+
+    # Calcular intensidad combinada
+    intensidad_principal = np.abs(np.dot(normales, luz_principal))
+    intensidad_relleno = np.abs(np.dot(normales, luz_relleno))
+
+    # Combinar luces: 70% principal + 30% relleno + luz ambiente
+    intensidades = 0.2 + 0.7 * intensidad_principal + 0.3 * intensidad_relleno
+    intensidades = np.clip(intensidades, 0.3, 1.0)
+
+    # Crear colores basados en intensidad con gradiente más rico
+    color_base = np.array([0.6, 0.7, 0.85])  # Azul grisáceo
+    color_sombra = np.array([0.3, 0.35, 0.45])  # Azul oscuro para sombras
+
+    # Interpolación de color basada en intensidad
+    return color_sombra + (color_base - color_sombra) * intensidades[:, np.newaxis]
+
+
+def indexar_triangulos(vectores):
+    """Convierte una sopa de triángulos (T, 3, 3) en vértices (V, 3) y caras (T, 3)"""
+    puntos = np.ascontiguousarray(np.asarray(vectores).reshape(-1, 3))
+    # Comparar cada punto como un bloque de bytes es mucho más rápido que unique(axis=0)
+    filas = puntos.view(np.dtype((np.void, puntos.dtype.itemsize * 3))).ravel()
+    _, primeros, caras = np.unique(filas, return_index=True, return_inverse=True)
+    return puntos[primeros], caras.reshape(-1, 3)
+
+
+def simplificar_por_agrupamiento(vertices, caras, resolucion):
+    """
+    Simplificación por agrupamiento de vértices (vertex clustering): los vértices
+    que caen en la misma celda de una rejilla uniforme se fusionan en su
+    centroide, y se descartan los triángulos que quedan degenerados o repetidos.
+    A diferencia de tomar uno de cada N triángulos, la superficie no queda con huecos.
+    """
+    minimo = vertices.min(axis=0)
+    extension = max(float((vertices.max(axis=0) - minimo).max()), 1e-12)
+    celdas = np.floor((vertices - minimo) * (resolucion / extension)).astype(np.int64)
+    np.minimum(celdas, resolucion - 1, out=celdas)
+    clave = (celdas[:, 0] * resolucion + celdas[:, 1]) * resolucion + celdas[:, 2]
+    _, grupo = np.unique(clave, return_inverse=True)
+
+    # Centroide de cada celda
+    conteo = np.bincount(grupo)
+    centroides = np.column_stack([np.bincount(grupo, weights=vertices[:, eje]) for eje in range(3)])
+    centroides /= conteo[:, np.newaxis]
+
+    # Remapear caras y descartar degeneradas y duplicadas (conservando orientación)
+    nuevas = grupo.reshape(-1)[caras]
+    validas = ((nuevas[:, 0] != nuevas[:, 1]) & (nuevas[:, 1] != nuevas[:, 2])
+               & (nuevas[:, 0] != nuevas[:, 2]))
+    nuevas = _triangulos_unicos(nuevas[validas])
+
+    # Compactar vértices no usados
+    usados, nuevas = np.unique(nuevas, return_inverse=True)
+    return centroides[usados], nuevas.reshape(-1, 3)
+
+
+def simplificar_a_presupuesto(vertices, caras, presupuesto, intentos=6):
+    """
+    Busca la resolución de rejilla más fina cuyo resultado no supere el
+    presupuesto de triángulos. Una superficie agrupada en una rejilla de
+    resolución r tiene del orden de r² triángulos, lo que guía cada intento.
+    """
+    if len(caras) <= presupuesto:
+        return vertices, caras
+    resolucion = max(2, int(np.sqrt(presupuesto / 2)))
+    mejor = None
+    for _ in range(intentos):
+        v, c = simplificar_por_agrupamiento(vertices, caras, resolucion)
+        if len(c) <= presupuesto:
+            if mejor is None or len(c) > len(mejor[1]):
+                mejor = (v, c)
+            if len(c) >= 0.8 * presupuesto:
+                break
+            siguiente = int(resolucion * min(2.0, np.sqrt(presupuesto / max(len(c), 1))))
+            resolucion = max(siguiente, resolucion + 1)
+        else:
+            siguiente = int(resolucion * 0.95 * np.sqrt(presupuesto / len(c)))
+            resolucion = max(2, min(siguiente, resolucion - 1))
+    return mejor or simplificar_por_agrupamiento(vertices, caras, 2)
+
+
+def construir_piramide_lod(vertices, caras, presupuestos):
+    """
+    Construye los niveles de detalle como sopas de triángulos float32 (T, 3, 3),
+    uno por presupuesto. Cada nivel se simplifica a partir del anterior.
+    """
+    niveles = []
+    for presupuesto in sorted(presupuestos, reverse=True):
+        vertices, caras = simplificar_a_presupuesto(vertices, caras, presupuesto)
+        niveles.append(np.asarray(vertices, dtype=np.float32)[caras])
+    return niveles
+
+
+class RasterizadorZBuffer:
+    """
+    Motor de render sólido por software: rasteriza el mesh indexado completo,
+    sin decimar, en una imagen RGB con z-buffer. Cada triángulo se recorre por
+    filas de pixels: el tramo cubierto de cada fila sale de sus tres funciones
+    de arista, así que solo se generan los pixels que cubre. El fragmento más
+    cercano de cada pixel se elige con np.minimum.at sobre una clave
+    (profundidad, triángulo). No hay bucles de Python por triángulo ni por
+    pixel. Los colores por cara son los de calcular_colores_sombreado.
+    """
+
+    def __init__(self, vertices, caras, colores, fondo=(255, 255, 255)):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.caras = np.ascontiguousarray(caras)
+        self._columnas = np.ascontiguousarray(self.caras.T)  # índices de cada vértice contiguos
+        colores = np.clip(np.asarray(colores) * 255 + 0.5, 0, 255).astype(np.uint8)
+        # La última entrada es el fondo: los pixels sin ningún fragmento apuntan a ella
+        self.paleta = np.vstack([colores, np.array(fondo, dtype=np.uint8)])
+        self.orientacion = self._orientacion_cerrada()
+
+    @classmethod
+    def desde_malla(cls, malla):
+        return cls(malla.vertices, malla.caras, calcular_colores_sombreado(malla.vectores))
+
+    def _orientacion_cerrada(self):
+        """
+        +1 o -1 si el mesh es cerrado con caras orientadas de forma coherente
+        (normales hacia fuera o hacia dentro, según el signo del volumen), y 0
+        si no. Solo en un mesh cerrado y coherente las caras traseras nunca se
+        ven y pueden descartarse antes de rasterizar.
+        """
+        if len(self.caras) == 0:
+            return 0
+        a, b = self.caras[:, [0, 1, 2]].ravel().astype(np.int64), self.caras[:, [1, 2, 0]].ravel().astype(np.int64)
+        n = len(self.vertices)
+        dirigidas = np.sort(a * n + b)
+        # Cada arista dirigida aparece una sola vez y su opuesta también existe
+        if np.any(dirigidas[1:] == dirigidas[:-1]):
+            return 0
+        if not np.array_equal(dirigidas, np.sort(b * n + a)):
+            return 0
+        v0, v1, v2 = (self.vertices[c].astype(np.float64) for c in self._columnas)
+        volumen = np.einsum('ij,ij->', v0, np.cross(v1, v2))
+        return int(np.sign(volumen))
+
+    @staticmethod
+    def _rasterizar_filas(zbuffer, ancho, triangulos, por_triangulo, filas, lote):
+        """Recorrer las filas de pixels de un bloque de triángulos y fundir sus fragmentos en el z-buffer"""
+        fila_triangulo = np.repeat(np.arange(len(triangulos)), filas)
+        por_fila = np.take(por_triangulo, fila_triangulo, axis=1)
+        px0, py0, caja_izq, caja_der, y_caja, k_u, k_v, k_0 = por_fila[:8]
+        cotas = por_fila[8:]
+        triangulo = triangulos[fila_triangulo]
+        py = y_caja + (np.arange(len(triangulo)) - np.repeat(np.cumsum(filas) - filas, filas))
+        v = py - py0
+        izquierda = np.maximum.reduce([cotas[0] * v + cotas[1], cotas[4] * v + cotas[5], cotas[8] * v + cotas[9]])
+        derecha = np.minimum.reduce([cotas[2] * v + cotas[3], cotas[6] * v + cotas[7], cotas[10] * v + cotas[11]])
+        izquierda = np.maximum(np.ceil(px0 + izquierda), caja_izq)
+        derecha = np.minimum(np.floor(px0 + derecha), caja_der)
+        cuentas = np.maximum(derecha - izquierda + 1, 0).astype(np.int64)
+        # Clave de profundidad a lo largo de la fila: k = k_fila + k_u * px
+        k_fila = k_0 + k_v * v - k_u * px0
+        inicio_fila = py.astype(np.int64) * ancho + izquierda.astype(np.int64)
+        izquierda = izquierda.astype(np.int64)
+
+        acumuladas = np.cumsum(cuentas)
+        inicio = 0
+        while inicio < len(cuentas):
+            # Filas completas hasta llenar el lote de fragmentos
+            base = int(acumuladas[inicio - 1]) if inicio else 0
+            fin = max(int(np.searchsorted(acumuladas, base + lote, side='right')), inicio + 1)
+            n = cuentas[inicio:fin]
+            desplazamiento = np.arange(int(acumuladas[fin - 1]) - base) - np.repeat(acumuladas[inicio:fin] - n - base, n)
+            px = np.repeat(izquierda[inicio:fin], n) + desplazamiento
+            clave = ((np.repeat(k_fila[inicio:fin], n) + np.repeat(k_u[inicio:fin], n) * px).astype(np.int64) << 32
+                     | np.repeat(triangulo[inicio:fin], n))
+            np.minimum.at(zbuffer, np.repeat(inicio_fila[inicio:fin], n) + desplazamiento, clave)
+            inicio = fin
+
+    @staticmethod
+    def base_camara(elev, azim):
+        """Filas derecha, arriba y hacia la cámara para (elev, azim) en grados, como en mplot3d"""
+        elev, azim = np.radians(elev), np.radians(azim)
+        hacia_camara = np.array([np.cos(elev) * np.cos(azim), np.cos(elev) * np.sin(azim), np.sin(elev)])
+        derecha = np.array([-np.sin(azim), np.cos(azim), 0.0])
+        return np.array([derecha, np.cross(hacia_camara, derecha), hacia_camara])
+
+    def renderizar(self, ancho, alto, elev, azim, limites, lote=LOTE_RASTER, filas_lote=LOTE_FILAS_RASTER):
+        """
+        Imagen (alto, ancho, 3) uint8 de la vista. `limites` son los límites
+        (x, y, z) de los ejes, como en vista_actual: su centro va al centro de
+        la imagen y el mayor rango fija el zoom (a zoom 1 cabe su diagonal).
+        """
+        limites = np.asarray(limites, dtype=np.float64)
+        rango = float((limites[:, 1] - limites[:, 0]).max()) or 1.0
+        base = self.base_camara(elev, azim) * (min(ancho, alto) / (rango * np.sqrt(3)))
+        # Coordenadas de pantalla con los centros de pixel en los enteros
+        p = (self.vertices - limites.mean(axis=1).astype(np.float32)) @ base.T.astype(np.float32)
+        sx = p[:, 0] + np.float32(ancho / 2 - 0.5)
+        sy = np.float32(alto / 2 - 0.5) - p[:, 1]
+        sz = -p[:, 2]  # Profundidad: mayor = más lejos
+        zbuffer = np.full(ancho * alto, np.iinfo(np.int64).max, dtype=np.int64)
+        if len(self.caras) == 0:
+            return np.broadcast_to(self.paleta[-1], (alto, ancho, 3)).copy()
+
+        # Preparación de triángulos: caja en pixels y área con signo
+        (x0, x1, x2), (y0, y1, y2) = (sx[c] for c in self._columnas), (sy[c] for c in self._columnas)
+        caja_x0 = np.maximum(np.ceil(np.minimum(np.minimum(x0, x1), x2)), 0)
+        caja_x1 = np.minimum(np.floor(np.maximum(np.maximum(x0, x1), x2)), ancho - 1)
+        caja_y0 = np.maximum(np.ceil(np.minimum(np.minimum(y0, y1), y2)), 0)
+        caja_y1 = np.minimum(np.floor(np.maximum(np.maximum(y0, y1), y2)), alto - 1)
+        ex1, ex2, ey1, ey2 = x1 - x0, x2 - x0, y1 - y0, y2 - y0
+        area = ex1 * ey2 - ex2 * ey1
+        # Solo los triángulos que cubren algún centro de pixel, no están de
+        # canto y (en un mesh cerrado) miran a la cámara
+        util = (caja_x1 >= caja_x0) & (caja_y1 >= caja_y0) & (area != 0)
+        if self.orientacion:
+            util &= area * self.orientacion < 0  # El eje y de la pantalla apunta hacia abajo
+        t = np.flatnonzero(util)
+        area = area[t].astype(np.float64)
+
+        # (l1, l2, profundidad) como funciones afines de (u, v) = pixel - vértice 0;
+        # l0 = 1 - l1 - l2 completa las tres funciones de arista
+        a1, b1 = ey2[t] / area, -ex2[t] / area
+        a2, b2 = -ey1[t] / area, ex1[t] / area
+        z0 = sz[self._columnas[0, t]]
+        ez1, ez2 = sz[self._columnas[1, t]] - z0, sz[self._columnas[2, t]] - z0
+        az, bz = a1 * ez1 + a2 * ez2, b1 * ez1 + b2 * ez2
+
+        # En cada fila, la función de arista a·u + b·v + c >= 0 acota u por la
+        # izquierda (a > 0) o por la derecha (a < 0) con un límite afín en v:
+        # u = p·v + q. Se guardan (p, q) de las tres aristas como cota izquierda
+        # o derecha; las que no acotan ese lado quedan en (0, ∓inf)
+        cotas = []
+        for a, b, c in ((a1, b1, 0.0), (a2, b2, 0.0), (-(a1 + a2), -(b1 + b2), 1.0)):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pendiente, origen = -b / a, -(c + 1e-6) / a
+            for lado, infinito in ((a > 0, -np.inf), (a < 0, np.inf)):
+                cotas.append(np.where(lado, pendiente, 0.0))
+                cotas.append(np.where(lado, origen, infinito))
+
+        # Clave de cada fragmento: profundidad cuantizada en los 32 bits altos y
+        # triángulo en los bajos; el mínimo por pixel es el fragmento más cercano.
+        # La profundidad se lleva a [2**29, 2**29 + 2**30]: el margen absorbe el
+        # pequeño exceso de los pixels en el borde sin tener que recortar
+        z_min = float(sz.min())
+        escala_z = 2**30 / max(float(sz.max()) - z_min, 1e-12)
+        k_u, k_v = az * escala_z, bz * escala_z
+        k_0 = (z0 - z_min) * escala_z + 2**29
+
+        # Datos por triángulo que se replican en cada una de sus filas de pixels
+        por_triangulo = np.array([x0[t], y0[t], caja_x0[t], caja_x1[t], caja_y0[t],
+                                  k_u, k_v, k_0] + cotas, dtype=np.float32)
+        filas = (caja_y1[t] - caja_y0[t]).astype(np.int64) + 1
+        filas_acumuladas = np.cumsum(filas)
+        inicio = 0
+        while inicio < len(t):
+            # Bloques de triángulos con como mucho filas_lote filas en total
+            base = int(filas_acumuladas[inicio - 1]) if inicio else 0
+            fin = max(int(np.searchsorted(filas_acumuladas, base + filas_lote, side='right')), inicio + 1)
+            self._rasterizar_filas(zbuffer, ancho, t[inicio:fin], por_triangulo[:, inicio:fin],
+                                   filas[inicio:fin], lote)
+            inicio = fin
+
+        vacio = zbuffer == np.iinfo(np.int64).max
+        return self.paleta[np.where(vacio, len(self.paleta) - 1, zbuffer & 0xFFFFFFFF)].reshape(alto, ancho, 3)
+
+
+class IndiceAristas:
+    """
+    Aristas de un mesh ordenadas por ángulo diedro, de mayor a menor, con los
+    bordes abiertos al principio (ángulo infinito). Las aristas que superan un
+    umbral son siempre un prefijo del array, así que cambiar el umbral es una
+    búsqueda binaria y una vista, sin volver a analizar la adyacencia.
+    """
+
+    def __init__(self, aristas, angulos):
+        self.aristas = aristas  # (N, 2, 3) float32
+        self.angulos = angulos  # (N,) radianes, descendente
+        self._claves = -angulos  # Ascendente, para searchsorted
+        self._polilinea = None
+
+    @classmethod
+    def desde_malla(cls, malla, angulo_minimo=0.0):
+        """Índice de una MallaIndexada, con su adyacencia (sin construir un mesh de trimesh)"""
+        pares, compartidas = malla.adyacencia
+        normales = malla.normales_caras.astype(np.float64)
+        # Ángulo entre las normales de cada par, como face_adjacency_angles de trimesh
+        cosenos = np.einsum('ij,ij->i', normales[pares[:, 0]], normales[pares[:, 1]])
+        return cls._desde_adyacencia(malla.vertices, np.arccos(np.clip(cosenos, -1, 1)), compartidas,
+                                     malla.bordes, angulo_minimo)
+
+    @classmethod
+    def desde_trimesh(cls, tm, angulo_minimo=0.0):
+        """Índice de un mesh de trimesh (ver desde_malla)"""
+        if len(tm.face_adjacency) > 0:
+            angulos, compartidas = tm.face_adjacency_angles, tm.face_adjacency_edges
+        else:
+            angulos, compartidas = np.empty(0), np.empty((0, 2), dtype=np.int64)
+        bordes = tm.edges_sorted[trimesh.grouping.group_rows(tm.edges_sorted, require_count=1)]
+        return cls._desde_adyacencia(tm.vertices, angulos, compartidas, bordes.reshape(-1, 2), angulo_minimo)
+
+    @classmethod
+    def _desde_adyacencia(cls, vertices, angulos, compartidas, bordes, angulo_minimo):
+        """
+        Analiza la adyacencia una sola vez. Las aristas compartidas con ángulo
+        menor o igual que angulo_minimo no se guardan (nunca serán visibles).
+        """
+        num_vertices = max(len(vertices), 1)
+
+        # 1. Aristas compartidas: la arista común de cada par de caras adyacentes
+        if len(angulos) > 0:
+            angulos = np.abs(angulos)
+            conservar = angulos > angulo_minimo
+            compartidas = np.sort(compartidas[conservar], axis=1)
+            angulos = angulos[conservar]
+            orden = np.argsort(-angulos, kind='stable')
+            compartidas, angulos = compartidas[orden], angulos[orden]
+            # Una arista no manifold aparece en varios pares: conservar su mayor ángulo
+            claves = compartidas[:, 0].astype(np.int64) * num_vertices + compartidas[:, 1]
+            _, primeras = np.unique(claves, return_index=True)
+            primeras.sort()
+            compartidas, angulos = compartidas[primeras], angulos[primeras]
+        else:
+            compartidas = np.empty((0, 2), dtype=np.int64)
+            angulos = np.empty(0)
+
+        # 2. Bordes abiertos: aristas que pertenecen a una sola cara (siempre visibles)
+        indices = np.vstack([bordes, compartidas]).astype(np.int64)
+        angulos = np.concatenate([np.full(len(bordes), np.inf), angulos])
+        return cls(np.asarray(vertices, dtype=np.float32)[indices].reshape(-1, 2, 3), angulos)
+
+    def __len__(self):
+        return len(self.angulos)
+
+    def contar(self, umbral_angulo):
+        """Número de aristas con ángulo diedro mayor que umbral_angulo (radianes)"""
+        return int(np.searchsorted(self._claves, -umbral_angulo, side='left'))
+
+    def seleccionar(self, umbral_angulo):
+        """Aristas (N, 2, 3) visibles con el umbral dado (vista, sin copia)"""
+        return self.aristas[:self.contar(umbral_angulo)]
+
+    def polilinea(self, umbral_angulo):
+        """
+        Arrays x, y, z de aristas_a_polilinea para el umbral dado. La polilínea
+        del índice completo se construye una vez; cada umbral es un prefijo suyo.
+        """
+        if self._polilinea is None:
+            self._polilinea = aristas_a_polilinea(self.aristas)
+        fin = 3 * self.contar(umbral_angulo)
+        return tuple(coordenadas[:fin] for coordenadas in self._polilinea)
+
+
+class DetectorSiluetas:
+    """
+    Aristas de silueta de un mesh para una dirección de vista: las aristas
+    compartidas por una cara orientada hacia el observador y otra orientada
+    en sentido contrario. Normales y adyacencia se preparan una vez por mesh;
+    cada dirección es un producto matricial y dos comparaciones vectorizadas.
+    """
+
+    def __init__(self, vertices, normales, pares, compartidas):
+        self.vertices = vertices  # (V, 3) float32
+        self.normales = np.ascontiguousarray(normales, dtype=np.float32)  # (F, 3)
+        self.pares = np.ascontiguousarray(pares, dtype=np.int32)  # (A, 2) caras adyacentes
+        self.compartidas = np.ascontiguousarray(compartidas, dtype=np.int32)  # (A, 2) vértices de la arista
+
+    @classmethod
+    def desde_malla(cls, malla):
+        pares, compartidas = malla.adyacencia
+        return cls(malla.vertices, malla.normales_caras, pares, compartidas)
+
+    def aristas(self, direccion, tolerancia=1e-4):
+        """
+        Aristas de silueta (N, 2, 3) float32 vistas desde `direccion` (proyección
+        ortográfica): las que separan una cara frontal de una que no lo es. Solo
+        cuenta como frontal una cara con n·d > tolerancia, así las caras de
+        canto, como las tapas de un cilindro visto de lado, no alternan por
+        ruido numérico y la silueta de una superficie curva no se corta en las
+        caras casi paralelas a la vista.
+        """
+        if len(self.pares) == 0:
+            return np.empty((0, 2, 3), dtype=np.float32)
+        direccion = np.asarray(direccion, dtype=np.float32)
+        frontal = self.normales @ (direccion / np.linalg.norm(direccion)) > tolerancia
+        silueta = frontal[self.pares[:, 0]] != frontal[self.pares[:, 1]]
+        return self.vertices[self.compartidas[silueta]]
+
+
+def extraer_aristas_tecnicas(tm, umbral_angulo=np.radians(20)):
+    """
+    Motor vectorizado de aristas técnicas sobre un mesh de trimesh.
+    Devuelve un array (N, 2, 3) float32 con las aristas agudas y de borde,
+    sin duplicados y sin bucles de Python por arista.
+    """
+    return IndiceAristas.desde_trimesh(tm, umbral_angulo).seleccionar(umbral_angulo)
+
+
+def aristas_a_polilinea(aristas, dimension=3):
+    """
+    Convierte un array de aristas (N, 2, 3) (o segmentos 2D (N, 2, 2) con
+    dimension=2) en un array por coordenada de una sola polilínea, con un NaN
+    después de cada arista para separar los segmentos.
+    """
+    aristas = np.asarray(aristas, dtype=np.float32).reshape(-1, 2, dimension)
+    puntos = np.full((len(aristas), 3, dimension), np.nan, dtype=np.float32)
+    puntos[:, :2] = aristas
+    puntos = puntos.reshape(-1, dimension)
+    return tuple(puntos[:, i] for i in range(dimension))
+
+
+def crear_linea_wireframe(aristas, color='#1a1a1a', linewidth=1.5, alpha=0.9):
+    """
+    Crea un único artista Line3D con todas las aristas (array (N, 2, 3)).
+    Un solo path separado por NaN: matplotlib proyecta todos los puntos en una
+    operación vectorizada por redibujado, sin crear un Path por arista como
+    haría un Line3DCollection.
+    """
+    xs, ys, zs = aristas_a_polilinea(aristas)
+    return mplot3d.art3d.Line3D(xs, ys, zs, color=color, linewidth=linewidth, alpha=alpha)
+
+
+def bases_de_vistas(vistas):
+    """
+    Construye las matrices de proyección ortográfica (V, 3, 2) de cada vista.
+    Las columnas son los ejes 2D de la vista: derecha y arriba.
+    """
+    bases = []
+    for direccion, arriba in vistas.values():
+        direccion = np.array(direccion, dtype=float)
+        direccion = direccion / np.linalg.norm(direccion)
+        arriba = np.array(arriba, dtype=float)
+        # Quitar la componente a lo largo de la vista (en la isométrica "arriba"
+        # no es perpendicular): así la base es ortonormal y la proyección es
+        # realmente a lo largo de `direccion`
+        arriba = arriba - np.dot(arriba, direccion) * direccion
+        arriba = arriba / np.linalg.norm(arriba)
+
+        # Crear sistema de coordenadas 2D
+        derecha = np.cross(arriba, direccion)
+        derecha = derecha / np.linalg.norm(derecha)
+        bases.append(np.column_stack([derecha, arriba]))
+    return np.array(bases, dtype=np.float32)
+
+
+def direccion_vista_ejes(ax):
+    """
+    Dirección hacia la cámara de unos ejes 3D de matplotlib, en coordenadas de
+    datos. Los ejes escalan cada coordenada a su caja (box aspect / rango), y
+    las normales se transforman con la inversa, así que la dirección se divide
+    por esa escala.
+    """
+    elev, azim = np.radians(ax.elev), np.radians(ax.azim)
+    hacia_camara = np.array([np.cos(elev) * np.cos(azim), np.cos(elev) * np.sin(azim), np.sin(elev)])
+    rangos = np.array([limites[1] - limites[0] for limites in
+                       (ax.get_xlim3d(), ax.get_ylim3d(), ax.get_zlim3d())])
+    return hacia_camara * rangos / np.asarray(ax.get_box_aspect())
+
+
+def proyectar_aristas_vistas(aristas, vistas):
+    """
+    Proyecta todas las aristas (N, 2, 3) a todas las vistas en una sola
+    operación matricial. Devuelve un array (V, N, 2, 2) de segmentos 2D.
+    """
+    aristas = np.asarray(aristas, dtype=np.float32).reshape(-1, 2, 3)
+    return np.einsum('npc,vcd->vnpd', aristas, bases_de_vistas(vistas))
+
+
+class RejillaOclusion:
+    """
+    Rejilla 2D uniforme sobre los triángulos de un mesh proyectados en una
+    vista ortográfica. Cada celda guarda los triángulos cuya caja la toca,
+    ordenados del más cercano al observador al más lejano, y cada triángulo
+    sus coordenadas baricéntricas y su profundidad como funciones afines de
+    (u, v). Un punto solo se prueba contra el prefijo de triángulos de su celda
+    que llegan por delante de él, y todos los puntos se prueban en lote sin
+    bucles de Python por punto.
+    """
+
+    def __init__(self, triangulos, direccion, base, max_entradas=32_000_000):
+        triangulos = np.asarray(triangulos, dtype=np.float64).reshape(-1, 3, 3)
+        direccion = np.asarray(direccion, dtype=np.float64)
+        direccion = direccion / np.linalg.norm(direccion)
+        uv = triangulos @ base.astype(np.float64)  # (T, 3, 2)
+        w = triangulos @ direccion  # (T, 3) profundidad: mayor = más cerca del observador
+
+        # Caja 2D de cada triángulo (las reducciones por columna son mucho más
+        # rápidas que min/max sobre ejes cortos)
+        caja_min = np.minimum(np.minimum(uv[:, 0], uv[:, 1]), uv[:, 2])
+        caja_max = np.maximum(np.maximum(uv[:, 0], uv[:, 1]), uv[:, 2])
+        if len(uv):
+            minimo = np.array([caja_min[:, 0].min(), caja_min[:, 1].min()])
+            maximo = np.array([caja_max[:, 0].max(), caja_max[:, 1].max()])
+            extension = max(float((maximo - minimo).max()), float(w.max() - w.min()))
+        else:
+            minimo, maximo, extension = np.zeros(2), np.ones(2), 0.0
+        self.tolerancia_profundidad = 1e-4 * max(extension, 1e-12)
+
+        # Los triángulos de canto (área proyectada nula) no tapan nada
+        e1, e2 = uv[:, 1] - uv[:, 0], uv[:, 2] - uv[:, 0]
+        det = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]
+        validos = np.abs(det) > 1e-12 * max(extension, 1e-30) ** 2
+        uv, w, e1, e2, det = uv[validos], w[validos], e1[validos], e2[validos], det[validos]
+        caja_min, caja_max = caja_min[validos], caja_max[validos]
+
+        # (l1, l2, profundidad) = coeficientes @ (u, v, 1)
+        a = uv[:, 0]
+        c1 = np.stack([e2[:, 1], -e2[:, 0]], axis=1) / det[:, None]
+        c2 = np.stack([-e1[:, 1], e1[:, 0]], axis=1) / det[:, None]
+        dw1, dw2 = w[:, 1] - w[:, 0], w[:, 2] - w[:, 0]
+        cz = dw1[:, None] * c1 + dw2[:, None] * c2
+        self.coeficientes = np.stack([
+            np.column_stack([c1, -(c1[:, 0] * a[:, 0] + c1[:, 1] * a[:, 1])]),
+            np.column_stack([c2, -(c2[:, 0] * a[:, 0] + c2[:, 1] * a[:, 1])]),
+            np.column_stack([cz, w[:, 0] - (cz[:, 0] * a[:, 0] + cz[:, 1] * a[:, 1])]),
+        ], axis=1)  # (T, 3, 3)
+
+        # Celdas de aproximadamente dos triángulos cada una; más grandes si los
+        # triángulos grandes generarían demasiadas entradas
+        rango = np.maximum(maximo - minimo, 1e-12)
+        lado = max(float(np.sqrt(rango[0] * rango[1] / max(len(uv) / 2, 1))), float(rango.max()) / 2048)
+        while True:
+            dims = np.maximum(np.ceil(rango / lado).astype(np.int64), 1)
+            i0 = np.clip(((caja_min - minimo) / lado).astype(np.int64), 0, dims - 1)
+            i1 = np.clip(((caja_max - minimo) / lado).astype(np.int64), 0, dims - 1)
+            anchos = i1[:, 0] - i0[:, 0] + 1
+            cuentas = anchos * (i1[:, 1] - i0[:, 1] + 1)
+            total = int(cuentas.sum())
+            if total <= max_entradas:
+                break
+            lado *= np.sqrt(total / max_entradas) * 1.1
+
+        # Entradas (celda, triángulo) en formato CSR, ordenadas por la clave
+        # celda + fracción de profundidad: dentro de cada celda, de la
+        # profundidad máxima del triángulo más cercana a la más lejana
+        triangulo = np.repeat(np.arange(len(cuentas)), cuentas)
+        local = np.arange(total) - np.repeat(np.cumsum(cuentas) - cuentas, cuentas)
+        ancho = anchos[triangulo]
+        celda = ((i0[triangulo, 1] + local // ancho) * dims[0] + i0[triangulo, 0] + local % ancho)
+        z_max = np.maximum(np.maximum(w[:, 0], w[:, 1]), w[:, 2])
+        self.z_cercana = float(z_max.max()) if len(z_max) else 0.0
+        self.escala_z = 1.0 / (max(float(self.z_cercana - z_max.min()), 1e-12) * (1 + 1e-9)) if len(z_max) else 1.0
+        claves = celda + (self.z_cercana - z_max[triangulo]) * self.escala_z
+        orden = np.argsort(claves)
+        self.claves = claves[orden]
+        self.triangulos = triangulo[orden].astype(np.int32)
+        self.inicio = np.concatenate([[0], np.cumsum(np.bincount(celda, minlength=int(dims.prod())))])
+        self.minimo, self.lado, self.dims = minimo, lado, dims
+
+    def tapados(self, u, v, profundidad, lote=LOTE_VISIBILIDAD):
+        """Máscara de los puntos (u, v, profundidad) con algún triángulo delante"""
+        i = np.clip(((u - self.minimo[0]) / self.lado).astype(np.int64), 0, self.dims[0] - 1)
+        j = np.clip(((v - self.minimo[1]) / self.lado).astype(np.int64), 0, self.dims[1] - 1)
+        celda = j * self.dims[0] + i
+        # Solo pueden tapar el punto los triángulos cuya profundidad máxima
+        # supera la suya: un prefijo de la celda, hallado por búsqueda binaria
+        fraccion = np.clip((self.z_cercana - profundidad - self.tolerancia_profundidad) * self.escala_z, 0, 1)
+        primero = self.inicio[celda]
+        candidatos = np.searchsorted(self.claves, celda + fraccion) - primero
+        tapado = np.zeros(len(u), dtype=bool)
+
+        # Rondas de candidatos en orden de cercanía, de tamaño creciente: un punto
+        # deja de probarse en cuanto un triángulo lo tapa, así que los puntos detrás
+        # de muchas capas solo prueban las primeras
+        probados = np.zeros(len(u), dtype=np.int64)
+        activos = np.flatnonzero(candidatos > 0)
+        tanda = 1
+        while len(activos):
+            cuantos_ronda = np.minimum(candidatos[activos] - probados[activos], tanda)
+            # Lotes de puntos consecutivos con como máximo `lote` pares punto-triángulo
+            acumulado = np.cumsum(cuantos_ronda)
+            cortes = np.searchsorted(acumulado, np.arange(lote, int(acumulado[-1]), lote))
+            for desde, hasta in zip(np.r_[0, cortes], np.r_[cortes, len(activos)]):
+                puntos, cuantos = activos[desde:hasta], cuantos_ronda[desde:hasta]
+                pares = int(cuantos.sum())
+                if pares == 0:
+                    continue
+                punto = np.repeat(puntos, cuantos)
+                posicion = np.repeat(primero[puntos] + probados[puntos] - (np.cumsum(cuantos) - cuantos), cuantos)
+                coef = self.coeficientes[self.triangulos[posicion + np.arange(pares)]]
+                q = np.stack([u[punto], v[punto], np.ones(pares)], axis=1)
+                l1, l2, z = np.einsum('pij,pj->ip', coef, q)
+                tapa = ((l1 >= -1e-9) & (l2 >= -1e-9) & (l1 + l2 <= 1 + 1e-9) &
+                        (z > profundidad[punto] + self.tolerancia_profundidad))
+                tapado[punto[tapa]] = True
+            probados[activos] += cuantos_ronda
+            activos = activos[~tapado[activos] & (probados[activos] < candidatos[activos])]
+            tanda *= 2
+        return tapado
+
+
+def separar_aristas_ocultas(aristas, triangulos, direccion, base, muestras=MUESTRAS_VISIBILIDAD,
+                            paso_grueso=PASO_GRUESO_VISIBILIDAD):
+    """
+    Proyecta las aristas (N, 2, 3) en una vista y las divide en tramos visibles
+    y ocultos por los triángulos del mesh. Cada arista se muestrea con un paso
+    de 1/muestras del ancho de la vista. Se prueba contra la RejillaOclusion
+    una de cada `paso_grueso` muestras (y la última de cada arista); entre dos
+    probadas con distinto estado se bisecta hasta hallar el cambio, y las
+    demás toman el estado de sus vecinas. Las muestras consecutivas de una
+    arista con el mismo estado se fusionan en un tramo. Un oclusor más estrecho
+    que `paso_grueso` muestras puede pasar inadvertido. Devuelve (visibles,
+    ocultos), dos arrays (M, 2, 2) float32 de segmentos 2D.
+    """
+    aristas = np.asarray(aristas, dtype=np.float64).reshape(-1, 2, 3)
+    direccion = np.asarray(direccion, dtype=np.float64)
+    direccion = direccion / np.linalg.norm(direccion)
+    base = np.asarray(base, dtype=np.float64)
+    extremos = aristas @ base  # (N, 2, 2)
+    tramo = extremos[:, 1] - extremos[:, 0]
+    longitud = np.linalg.norm(tramo, axis=1)
+    conservar = longitud > 0  # Las aristas paralelas a la vista se proyectan en un punto
+    aristas, extremos, tramo, longitud = aristas[conservar], extremos[conservar], tramo[conservar], longitud[conservar]
+    vacio = np.empty((0, 2, 2), dtype=np.float32)
+    if len(aristas) == 0:
+        return vacio, vacio
+
+    rejilla = RejillaOclusion(triangulos, direccion, base)
+    profundidad = aristas @ direccion  # (N, 2)
+
+    # Muestras en el centro de cada subintervalo (evitan los vértices compartidos)
+    paso = float(np.ptp(extremos.reshape(-1, 2), axis=0).max()) / muestras
+    por_arista = np.clip(np.ceil(longitud / max(paso, 1e-30)), 1, muestras).astype(np.int64)
+    arista = np.repeat(np.arange(len(aristas)), por_arista)
+    k = np.arange(len(arista)) - np.repeat(np.cumsum(por_arista) - por_arista, por_arista)
+    oculto = np.zeros(len(arista), dtype=bool)
+    probada = (k % max(paso_grueso, 1) == 0) | (k == por_arista[arista] - 1)
+
+    def probar(indices):
+        a = arista[indices]
+        t = (k[indices] + 0.5) / por_arista[a]
+        puntos = extremos[a, 0] + t[:, None] * tramo[a]
+        z = profundidad[a, 0] + t * (profundidad[a, 1] - profundidad[a, 0])
+        oculto[indices] = rejilla.tapados(puntos[:, 0], puntos[:, 1], z)
+
+    probar(np.flatnonzero(probada))
+    while True:
+        # Pares de muestras probadas contiguas de una arista con estados distintos y huecos entre ellas
+        indices = np.flatnonzero(probada)
+        izquierda, derecha = indices[:-1], indices[1:]
+        bisecar = ((derecha - izquierda > 1) & (arista[izquierda] == arista[derecha]) &
+                   (oculto[izquierda] != oculto[derecha]))
+        if not bisecar.any():
+            break
+        medio = (izquierda[bisecar] + derecha[bisecar]) // 2
+        probada[medio] = True
+        probar(medio)
+    # Las muestras sin probar heredan el estado de la probada anterior (la primera de cada arista lo está)
+    oculto = oculto[np.maximum.accumulate(np.where(probada, np.arange(len(arista)), 0))]
+
+    # Tramos: empiezan donde cambia la arista o el estado de visibilidad
+    cambio = np.ones(len(arista), dtype=bool)
+    cambio[1:] = (arista[1:] != arista[:-1]) | (oculto[1:] != oculto[:-1])
+    inicio = np.flatnonzero(cambio)
+    fin = np.r_[inicio[1:], len(arista)] - 1
+    a = arista[inicio]
+    t0 = (k[inicio] / por_arista[a])[:, None]
+    t1 = ((k[fin] + 1) / por_arista[a])[:, None]
+    segmentos = np.stack([extremos[a, 0] + t0 * tramo[a], extremos[a, 0] + t1 * tramo[a]], axis=1)
+    segmentos = segmentos.astype(np.float32)
+    estado = oculto[inicio]
+    return segmentos[~estado], segmentos[estado]
+
+
+def vistas_plano(aristas_tecnicas, detector, triangulos, vistas=VISTAS_ORTOGRAFICAS):
+    """
+    Genera (nombre_vista, visibles, ocultos) para cada vista ortográfica de una
+    pieza: las aristas técnicas más la silueta de la vista, separadas en tramos
+    visibles y ocultos. Es perezoso: quien lo consume puede escribir cada vista
+    antes de que se calcule la siguiente.
+    """
+    for (nombre_vista, (direccion, _)), base in zip(vistas.items(), bases_de_vistas(vistas)):
+        aristas_vista = np.concatenate([aristas_tecnicas, detector.aristas(direccion)])
+        # Separar tramos visibles y ocultos (a trazos) según los triángulos del modelo
+        with TRAZADOR.tramo('líneas ocultas', 'aristas', vista=nombre_vista, aristas=len(aristas_vista)):
+            visibles, ocultos = separar_aristas_ocultas(aristas_vista, triangulos, direccion, base)
+        yield nombre_vista, visibles, ocultos
+
+
+def vistas_plano_stl(stl_path, umbral_grados=UMBRAL_ANGULO_GRADOS):
+    """Vistas de plano (ver vistas_plano) de un STL, sin interfaz ni caches de la App"""
+    malla = MallaIndexada.desde_stl(stl_path, completa=True)
+    umbral = np.radians(umbral_grados)
+    aristas = IndiceAristas.desde_malla(malla, umbral).seleccionar(umbral)
+    return vistas_plano(aristas, DetectorSiluetas.desde_malla(malla), malla.vectores)
+
+
+def dibujar_lineas_vista(ax, segmentos, segmentos_ocultos=None, polilinea=False):
+    """
+    Dibuja los segmentos 2D de una vista con un único LineCollection; las
+    líneas ocultas, si se dan, van en otro más fino y a trazos. Con
+    polilinea=True cada grupo es un solo Line2D separado por NaN: el backend
+    PDF escribe un LineCollection segmento a segmento desde Python, y un único
+    path en una sola operación (Agg, en cambio, dibuja antes la colección).
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+
+    for grupo, estilo in ((segmentos, dict(linewidth=0.5)),
+                          (segmentos_ocultos, dict(linewidth=0.3, linestyle='--'))):
+        if grupo is None or not len(grupo):
+            continue
+        if polilinea:
+            ax.add_line(Line2D(*aristas_a_polilinea(grupo, dimension=2), color='k', **estilo))
+        else:
+            ax.add_collection(LineCollection(grupo, colors='k', linewidths=estilo['linewidth'],
+                                             linestyles=estilo.get('linestyle', 'solid')))
+    ax.autoscale_view()
+
+    # Configurar aspecto técnico
+    ax.set_aspect('equal')
+
+
+def renderizar_vista_2d(nombre_vista, segmentos, archivo_salida, segmentos_ocultos=None):
+    """
+    Dibuja una vista 2D (ver dibujar_lineas_vista) y la guarda como PNG.
+    Usa Figure + Agg directamente (sin pyplot) para poder ejecutarse en
+    procesos de trabajo.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(10, 10), dpi=150)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    dibujar_lineas_vista(ax, segmentos, segmentos_ocultos)
+    ax.grid(True, alpha=0.3, linestyle='--')
+    ax.set_title(f'Vista {nombre_vista.capitalize()}', fontsize=12, fontweight='bold')
+
+    # Guardar como PNG de alta calidad
+    fig.savefig(archivo_salida, dpi=300, bbox_inches='tight',
+                facecolor='white', edgecolor='none')
+    return archivo_salida
+
+
+def nucleos_disponibles():
+    """Núcleos que este proceso puede usar (respeta la afinidad y los límites del contenedor)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def renderizar_vistas_paralelo(trabajos, max_procesos=None):
+    """
+    Renderiza una lista de trabajos (nombre_vista, segmentos, archivo_salida[,
+    segmentos_ocultos]). Solo se reparten entre procesos si hay varios núcleos
+    libres y al menos SEGMENTOS_RENDER_PARALELO segmentos: por debajo, arrancar
+    los procesos cuesta más de lo que ahorran. Un max_procesos explícito usa el
+    pool sin aplicar el umbral. Si el pool de procesos no está disponible se
+    renderiza en el proceso actual. Devuelve los archivos en el orden recibido.
+    """
+    if max_procesos is None:
+        # Posiciones 1 y 3 de cada trabajo: segmentos visibles y ocultos
+        segmentos = sum(len(grupo) for trabajo in trabajos for grupo in trabajo[1::2] if grupo is not None)
+        max_procesos = (min(len(trabajos), nucleos_disponibles())
+                        if segmentos >= SEGMENTOS_RENDER_PARALELO else 1)
+    if max_procesos > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=max_procesos, mp_context=contexto) as pool:
+                futuros = [pool.submit(renderizar_vista_2d, *trabajo) for trabajo in trabajos]
+                return [futuro.result() for futuro in futuros]
+        except (OSError, RuntimeError) as e:
+            print(f"Renderizado paralelo no disponible, continuando en serie: {e}")
+    return [renderizar_vista_2d(*trabajo) for trabajo in trabajos]
+
+
+def dibujar_cajetin(fig, campos):
+    """
+    Marco de la hoja y cajetín en la esquina inferior derecha: una fila por
+    campo (etiqueta, valor), en coordenadas de la figura.
+    """
+    from matplotlib.patches import Rectangle
+
+    fig.add_artist(Rectangle((0.02, 0.03), 0.96, 0.94, transform=fig.transFigure,
+                             fill=False, edgecolor='k', linewidth=1.0))
+    ancho, alto_fila = 0.34, 0.03
+    x0, y0 = 0.98 - ancho, 0.03
+    fig.add_artist(Rectangle((x0, y0), ancho, alto_fila * len(campos), transform=fig.transFigure,
+                             fill=False, edgecolor='k', linewidth=1.0))
+    for i, (etiqueta, valor) in enumerate(reversed(campos)):
+        y = y0 + i * alto_fila
+        if i:
+            fig.add_artist(Rectangle((x0, y), ancho, 0, transform=fig.transFigure, edgecolor='k', linewidth=0.5))
+        fig.text(x0 + 0.006, y + alto_fila / 2, etiqueta, fontsize=6, color='0.3', va='center')
+        fig.text(x0 + 0.07, y + alto_fila / 2, valor, fontsize=9, va='center')
+    fig.add_artist(Rectangle((x0 + 0.064, y0), 0, alto_fila * len(campos), transform=fig.transFigure,
+                             edgecolor='k', linewidth=0.5))
+
+
+def exportar_planos_pdf(piezas, salida, fecha=None):
+    """
+    Escribe las vistas 2D de una o varias piezas en un único PDF vectorial,
+    una hoja A4 apaisada con marco y cajetín por vista. `piezas` es un iterable
+    de (nombre_pieza, vistas), con vistas como las que genera vistas_plano; se
+    consume de forma perezosa y cada hoja se escribe a disco (PdfPages) y se
+    libera antes de calcular la siguiente. Devuelve el número de hojas.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    fecha = fecha or time.strftime('%Y-%m-%d')
+    hojas = 0
+    with PdfPages(salida, metadata={'Title': os.path.splitext(os.path.basename(salida))[0],
+                                    'Creator': 'SOLIDPDF'}) as pdf:
+        for nombre_pieza, vistas in piezas:
+            for nombre_vista, visibles, ocultos in vistas:
+                hojas += 1
+                fig = Figure(figsize=TAMANO_HOJA_PLANO)
+                ax = fig.add_axes((0.05, 0.14, 0.90, 0.80))
+                dibujar_lineas_vista(ax, visibles, ocultos, polilinea=True)
+                ax.set_axis_off()
+                dibujar_cajetin(fig, [('Pieza', nombre_pieza), ('Vista', nombre_vista.capitalize()),
+                                      ('Hoja', str(hojas)), ('Fecha', fecha)])
+                with TRAZADOR.tramo('hoja PDF', 'pdf', pieza=nombre_pieza, vista=nombre_vista):
+                    pdf.savefig(fig)
+    return hojas
+
+
+class ExportadorPDF(ABC):
+    """
+    Interfaz de un backend de exportación SLDDRW -> PDF. Cada proceso de
+    trabajo del PoolExportacion crea su propia instancia y su propia sesión.
+    Un backend que no implementa exportar no se puede instanciar.
+    """
+
+    def iniciar(self):
+        """Abrir la sesión del backend (se llama una vez por proceso)"""
+
+    @abstractmethod
+    def exportar(self, slddrw_path, temp_dir):
+        """Exportar un plano; devuelve la ruta del PDF o None si falla"""
+
+    def cerrar(self):
+        """Cerrar la sesión del backend"""
+
+    def pid_sesion(self):
+        """PID del proceso externo de la sesión (si lo hay), para poder matarlo si se cuelga"""
+        return None
+
+
+class ExportadorSolidWorks(ExportadorPDF):
+    """Backend COM: una instancia propia de SldWorks.Application por proceso"""
+
+    def __init__(self):
+        self.swApp = None
+
+    def iniciar(self):
+        if not win32com_client.disponible:
+            raise RuntimeError("pywin32 no está instalado: el backend de SolidWorks requiere Windows")
+        import pythoncom
+        pythoncom.CoInitialize()
+        # DispatchEx crea un proceso de SolidWorks nuevo en lugar de reutilizar uno existente
+        self.swApp = win32com_client.DispatchEx('SldWorks.Application')
+        self.swApp.Visible = False
+
+    def exportar(self, slddrw_path, temp_dir):
+        return exportar_a_pdf(self.swApp, slddrw_path, temp_dir)
+
+    def pid_sesion(self):
+        try:
+            return self.swApp.GetProcessID()
+        except Exception:
+            return None
+
+    def cerrar(self):
+        import pythoncom
+        try:
+            if self.swApp is not None:
+                self.swApp.ExitApp()
+        finally:
+            self.swApp = None
+            pythoncom.CoUninitialize()
+
+
+class ExportadorLocal(ExportadorPDF):
+    """
+    Backend de prueba sin SolidWorks: escribe PDFs ficticios (páginas A4
+    apaisado) tras una latencia configurable. Permite probar y medir la
+    planificación del pool en cualquier sistema. Con `lineas` > 0 cada hoja
+    lleva ese número de trazos vectoriales propios del plano más un cajetín
+    (XObject de formulario con fuente) idéntico en todos los planos, como los
+    PDFs reales de SolidWorks. Los planos cuyo nombre coincide con el patrón
+    `fallar` no generan PDF, como un fallo de SaveAs, y los que coinciden con
+    `colgar` no terminan nunca, como un diálogo modal.
+    """
+
+    def __init__(self, latencia=0.0, paginas=1, fallar=None, colgar=None, lineas=0):
+        self.latencia = latencia
+        self.paginas = paginas
+        self.fallar = fallar
+        self.colgar = colgar
+        self.lineas = lineas
+
+    def exportar(self, slddrw_path, temp_dir):
+        time.sleep(self.latencia)
+        if self.colgar and fnmatch.fnmatch(os.path.basename(slddrw_path), self.colgar):
+            while True:
+                time.sleep(60)
+        if self.fallar and fnmatch.fnmatch(os.path.basename(slddrw_path), self.fallar):
+            return None
+        pdf_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(slddrw_path))[0] + '.pdf')
+        from PyPDF2 import PdfWriter
+        writer = PdfWriter()
+        if self.lineas:
+            self._escribir_hojas(writer, os.path.basename(slddrw_path))
+        else:
+            for _ in range(self.paginas):
+                writer.add_blank_page(width=842, height=595)
+        with open(pdf_path, 'wb') as f:
+            writer.write(f)
+        return pdf_path
+
+    def _escribir_hojas(self, writer, nombre):
+        """Hojas con trazos aleatorios (semilla por plano) y el cajetín compartido"""
+        from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+        fuente = writer._add_object(DictionaryObject({
+            NameObject('/Type'): NameObject('/Font'),
+            NameObject('/Subtype'): NameObject('/Type1'),
+            NameObject('/BaseFont'): NameObject('/Helvetica'),
+        }))
+        cajetin = DecodedStreamObject()
+        cajetin.set_data(b"1 w 20 20 802 555 re S 560 20 262 80 re S "
+                         b"BT /F1 14 Tf 570 75 Td (EMPRESA S.A.) Tj ET "
+                         b"BT /F1 8 Tf 570 30 Td (Tolerancias generales ISO 2768-m) Tj ET")
+        cajetin.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Form'),
+            NameObject('/BBox'): ArrayObject([NumberObject(0), NumberObject(0), NumberObject(842), NumberObject(595)]),
+            NameObject('/Resources'): DictionaryObject({
+                NameObject('/Font'): DictionaryObject({NameObject('/F1'): fuente})}),
+        })
+        cajetin = writer._add_object(cajetin)
+
+        rng = np.random.default_rng(int.from_bytes(hashlib.blake2b(nombre.encode(), digest_size=4).digest(), 'little'))
+        for hoja in range(self.paginas):
+            writer.add_blank_page(width=842, height=595)
+            pagina = writer.pages[-1]  # add_blank_page devuelve el original, no la copia del writer
+            puntos = rng.uniform((30, 110), (812, 565), size=(self.lineas, 2, 2))
+            trazos = "".join(f"{a:.1f} {b:.1f} m {c:.1f} {d:.1f} l\n" for (a, b), (c, d) in puntos)
+            contenido = DecodedStreamObject()
+            contenido.set_data(f"0.4 w\n{trazos}S\n/Cajetin Do\n"
+                               f"BT /F1 10 Tf 570 55 Td ({nombre} hoja {hoja + 1}) Tj ET".encode('latin-1', 'replace'))
+            pagina[NameObject('/Contents')] = writer._add_object(contenido.flate_encode())
+            pagina[NameObject('/Resources')] = DictionaryObject({
+                NameObject('/Font'): DictionaryObject({NameObject('/F1'): fuente}),
+                NameObject('/XObject'): DictionaryObject({NameObject('/Cajetin'): cajetin}),
+            })
+
+
+# Backends de exportación disponibles por nombre
+BACKENDS_EXPORTACION = {
+    'solidworks': ExportadorSolidWorks,
+    'local': ExportadorLocal,
+}
+
+
+def _trabajador_exportacion(backend, opciones_backend, tareas, resultados):
+    """
+    Bucle de un proceso de exportación: abre su propia sesión del backend y
+    toma planos de la cola compartida hasta recibir None.
+    """
+    try:
+        exportador = BACKENDS_EXPORTACION[backend](**(opciones_backend or {}))
+        with TRAZADOR.tramo('iniciar sesión', 'exportacion', backend=backend):
+            exportador.iniciar()
+    except Exception as e:
+        resultados.put(('error_inicio', os.getpid(), str(e)))
+        return
+    resultados.put(('listo', os.getpid(), exportador.pid_sesion()))
+    try:
+        while True:
+            tarea = tareas.get()
+            if tarea is None:
+                break
+            idx, slddrw_path, temp_dir = tarea
+            resultados.put(('inicio', idx, os.getpid()))
+            try:
+                # Subcarpeta por plano: dos planos con el mismo nombre no se pisan
+                destino = os.path.join(temp_dir, f"{idx:05d}")
+                os.makedirs(destino, exist_ok=True)
+                with TRAZADOR.tramo('exportar plano', 'exportacion', plano=os.path.basename(slddrw_path)):
+                    pdf = exportador.exportar(slddrw_path, destino)
+            except Exception as e:
+                print(f"Error exportando {os.path.basename(slddrw_path)}: {e}")
+                pdf = None
+            resultados.put(('resultado', idx, pdf))
+    finally:
+        try:
+            exportador.cerrar()
+        except Exception as e:
+            print(f"Error cerrando el exportador: {e}")
+
+
+class PoolExportacion:
+    """
+    Pool de procesos de exportación. Cada proceso tiene su propia sesión del
+    backend y toma planos de una cola compartida; los resultados se devuelven
+    con su índice para conservar el orden de selección.
+
+    Cada exportación se supervisa: si un plano supera `tiempo_limite` segundos
+    (SaveAs colgado, diálogo modal...) o su proceso muere, se matan el proceso y
+    su sesión externa, se arranca un proceso nuevo y el plano se reintenta con
+    espera exponencial. Tras `reintentos` intentos fallidos pasa a `fallos`
+    mientras el resto del lote continúa. El arranque de cada proceso (apertura
+    de la sesión) tiene el mismo tiempo límite: un proceso que no llega a estar
+    listo se mata y el pool sigue con los demás.
+    """
+
+    def __init__(self, backend='solidworks', opciones_backend=None,
+                 num_trabajadores=NUM_TRABAJADORES_EXPORTACION,
+                 tiempo_limite=TIEMPO_LIMITE_EXPORTACION, reintentos=REINTENTOS_EXPORTACION,
+                 espera_reintento=ESPERA_REINTENTO):
+        if backend not in BACKENDS_EXPORTACION:
+            raise ValueError(f"Backend de exportación desconocido: {backend}")
+        self.backend = backend
+        self.opciones_backend = opciones_backend or {}
+        self.num_trabajadores = max(1, num_trabajadores)
+        self.tiempo_limite = tiempo_limite
+        self.reintentos = reintentos
+        self.espera_reintento = espera_reintento
+        self.latencias = []  # segundos por intento, también los vencidos o con el proceso muerto
+        self.fallos = {}  # ruta del plano -> motivo
+        self._procesos = {}  # pid -> Process
+        self._sesiones = {}  # pid del trabajador -> pid de su sesión externa
+        self._arranques = {}  # pid del trabajador aún sin sesión -> instante de arranque
+        self._contexto = None
+        self._tareas = None
+        self._resultados = None
+
+    def _arrancar_trabajador(self):
+        proceso = self._contexto.Process(
+            target=_trabajador_exportacion,
+            args=(self.backend, self.opciones_backend, self._tareas, self._resultados),
+            daemon=True)
+        proceso.start()
+        self._procesos[proceso.pid] = proceso
+        self._arranques[proceso.pid] = time.monotonic()
+
+    def _arranques_vencidos(self):
+        """Matar los procesos que no abrieron su sesión a tiempo; devuelve cuántos eran"""
+        ahora = time.monotonic()
+        vencidos = [pid for pid, inicio in self._arranques.items() if ahora - inicio > self.tiempo_limite]
+        for pid in vencidos:
+            print(f"Un proceso de exportación no abrió su sesión en {self.tiempo_limite:g} s; se descarta")
+            self._matar_trabajador(pid, reemplazar=False)
+        return len(vencidos)
+
+    def iniciar(self):
+        """Arrancar los procesos y esperar a que cada uno abra su sesión"""
+        self._contexto = multiprocessing.get_context('spawn')
+        self._tareas = self._contexto.Queue()
+        self._resultados = self._contexto.Queue()
+        for _ in range(self.num_trabajadores):
+            self._arrancar_trabajador()
+
+        errores = []
+        listos = 0
+        while self._arranques:
+            errores.extend(["tiempo límite de arranque superado"] * self._arranques_vencidos())
+            try:
+                tipo, pid, mensaje = self._resultados.get(timeout=1.0)
+            except queue.Empty:
+                # Procesos que murieron sin llegar a informar (p. ej. fallo al importar)
+                for pid in [pid for pid in self._arranques if not self._procesos[pid].is_alive()]:
+                    del self._arranques[pid]
+                    errores.append("El proceso de exportación terminó inesperadamente")
+                continue
+            if self._arranques.pop(pid, None) is None:
+                continue  # proceso ya descartado
+            if tipo == 'listo':
+                listos += 1
+                self._sesiones[pid] = mensaje
+            else:
+                errores.append(mensaje)
+        if listos == 0:
+            self.cerrar()
+            raise RuntimeError(errores[0] if errores else "No se pudo iniciar ningún exportador")
+        for mensaje in errores:
+            print(f"Un proceso de exportación no pudo iniciar: {mensaje}")
+        return self
+
+    def _matar_trabajador(self, pid, reemplazar=True):
+        """Matar un proceso de trabajo y su sesión externa, y arrancar otro en su lugar"""
+        self._arranques.pop(pid, None)
+        proceso = self._procesos.pop(pid, None)
+        if proceso is not None and proceso.is_alive():
+            proceso.kill()
+            proceso.join(timeout=5)
+        pid_sesion = self._sesiones.pop(pid, None)
+        if pid_sesion:
+            try:
+                os.kill(pid_sesion, signal.SIGTERM)
+            except OSError:
+                pass  # la sesión ya había terminado
+        if reemplazar:
+            self._arrancar_trabajador()
+
+    def procesar(self, archivos, temp_dir):
+        """
+        Exportar los planos en paralelo. Genera (índice, ruta, pdf) en orden de
+        finalización; pdf es None si la exportación falló.
+        """
+        for idx, slddrw_path in enumerate(archivos):
+            self._tareas.put((idx, slddrw_path, temp_dir))
+        intentos = [0] * len(archivos)
+        en_curso = {}  # índice -> (pid del trabajador, instante de inicio)
+        reintentos = []  # (instante a partir del cual reencolar, índice)
+        pendientes = len(archivos)
+        while pendientes:
+            ahora = time.monotonic()
+            for reintento in [r for r in reintentos if r[0] <= ahora]:
+                reintentos.remove(reintento)
+                self._tareas.put((reintento[1], archivos[reintento[1]], temp_dir))
+
+            # Supervisión: arranques colgados, planos que superan el tiempo límite o cuyo proceso murió
+            self._arranques_vencidos()
+            for idx, (pid, inicio) in list(en_curso.items()):
+                proceso = self._procesos.get(pid)
+                vencido = ahora - inicio > self.tiempo_limite
+                if not vencido and proceso is not None and proceso.is_alive():
+                    continue
+                del en_curso[idx]
+                self.latencias.append(ahora - inicio)
+                motivo = (f"tiempo límite de {self.tiempo_limite:g} s superado" if vencido
+                          else "el proceso de exportación terminó inesperadamente")
+                print(f"{os.path.basename(archivos[idx])}: {motivo}; reiniciando la sesión")
+                self._matar_trabajador(pid)
+                intentos[idx] += 1
+                if intentos[idx] <= self.reintentos:
+                    espera = self.espera_reintento * 2 ** (intentos[idx] - 1)
+                    reintentos.append((ahora + espera, idx))
+                else:
+                    self.fallos[archivos[idx]] = f"{motivo} ({intentos[idx]} intentos)"
+                    pendientes -= 1
+                    yield idx, archivos[idx], None
+
+            if not pendientes:
+                break
+            try:
+                tipo, a, b = self._resultados.get(timeout=0.5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self._procesos.values()):
+                    raise RuntimeError("Todos los procesos de exportación terminaron inesperadamente")
+                continue
+            if tipo in ('listo', 'error_inicio') and self._arranques.pop(a, None) is None:
+                continue  # proceso descartado por no arrancar a tiempo
+            if tipo == 'listo':
+                self._sesiones[a] = b
+            elif tipo == 'error_inicio':
+                print(f"Un proceso de exportación no pudo iniciar: {b}")
+            elif tipo == 'inicio':
+                en_curso[a] = (b, time.monotonic())
+            elif tipo == 'resultado' and a in en_curso:
+                _, inicio = en_curso.pop(a)
+                self.latencias.append(time.monotonic() - inicio)
+                if b is None:
+                    self.fallos[archivos[a]] = "error de exportación"
+                pendientes -= 1
+                yield a, archivos[a], b
+
+    def exportar(self, archivos, temp_dir):
+        """Exportar los planos y devolver la lista de PDFs (o None) en el orden recibido"""
+        pdfs = [None] * len(archivos)
+        for idx, _, pdf in self.procesar(archivos, temp_dir):
+            pdfs[idx] = pdf
+        return pdfs
+
+    def nuevo_lote(self):
+        """Vaciar latencias y motivos de fallo para que solo reflejen el lote siguiente"""
+        self.latencias = []
+        self.fallos = {}
+
+    def percentiles_latencia(self):
+        """
+        Percentiles de la latencia por intento en segundos (None si no hay datos).
+        Los intentos vencidos cuentan con el tiempo que llevaban al matarlos.
+        """
+        if not self.latencias:
+            return None
+        p50, p90, p99 = np.percentile(self.latencias, [50, 90, 99])
+        return {'p50': p50, 'p90': p90, 'p99': p99, 'max': max(self.latencias)}
+
+    def cerrar(self):
+        """Pedir a cada proceso que cierre su sesión y esperar a que termine"""
+        for proceso in self._procesos.values():
+            if proceso.is_alive():
+                self._tareas.put(None)
+        for proceso in self._procesos.values():
+            proceso.join(timeout=30)
+            if proceso.is_alive():
+                proceso.terminate()
+        self._procesos = {}
+        self._sesiones = {}
+        self._arranques = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class EscritorPDFIncremental:
+    """
+    Escritor de PDF que vuelca cada página (y los objetos que usa) al disco en
+    cuanto se agrega, en lugar de acumular todo el documento en memoria como
+    PdfMerger. Solo conserva en memoria la tabla de offsets y la lista de páginas;
+    el árbol de páginas, el catálogo y la tabla xref se escriben al cerrar.
+
+    Con deduplicar=True, los objetos idénticos entre planos (fuentes del cajetín,
+    logotipos, XObjects de formulario...) se detectan por hash de su contenido
+    ya traducido y se escriben una sola vez. Con comprimir=True, los flujos sin
+    filtro se comprimen con Flate.
+    """
+
+    # Atributos que una página puede heredar de sus nodos /Pages padres
+    ATRIBUTOS_HEREDABLES = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+    def __init__(self, ruta, deduplicar=True, comprimir=False):
+        self.ruta = ruta
+        self.deduplicar = deduplicar
+        self.comprimir = comprimir
+        self._f = open(ruta, 'wb')
+        self._f.write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        self._offsets = [None]  # offset de cada número de objeto (el 0 no se usa)
+        self._num_arbol_paginas = self._reservar()
+        self._kids = []
+        self._por_hash = {}  # hash del contenido -> número de objeto ya escrito
+        # Estadísticas de la optimización
+        self.objetos_deduplicados = 0
+        self.bytes_deduplicados = 0
+        self.bytes_comprimidos = 0
+        self.tiempo_optimizacion = 0.0
+
+    @property
+    def paginas(self):
+        return len(self._kids)
+
+    @property
+    def bytes_escritos(self):
+        return self._f.tell()
+
+    def _reservar(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _escribir_objeto(self, numero, objeto):
+        buffer = io.BytesIO()
+        objeto.write_to_stream(buffer, None)
+        self._escribir_bytes(numero, buffer.getvalue())
+
+    def _escribir_bytes(self, numero, datos):
+        self._offsets[numero] = self._f.tell()
+        self._f.write(f"{numero} 0 obj\n".encode())
+        self._f.write(datos)
+        self._f.write(b"\nendobj\n")
+
+    def _comprimir_flujo(self, flujo):
+        """Copia del flujo comprimida con Flate si no tenía ningún filtro"""
+        if '/Filter' in flujo or len(flujo._data) < 64:
+            return flujo
+        inicio = time.perf_counter()
+        datos = zlib.compress(flujo._data)
+        self.tiempo_optimizacion += time.perf_counter() - inicio
+        if len(datos) >= len(flujo._data):
+            return flujo
+        self.bytes_comprimidos += len(flujo._data) - len(datos)
+        from PyPDF2.generic import EncodedStreamObject, NameObject
+        comprimido = EncodedStreamObject()
+        comprimido.update(flujo)
+        comprimido[NameObject('/Filter')] = NameObject('/FlateDecode')
+        comprimido._data = datos
+        return comprimido
+
+    @staticmethod
+    def abrir(ruta_pdf):
+        """Lector de un PDF de entrada, ya descifrado si lo protege una contraseña vacía"""
+        from PyPDF2 import PdfReader
+        lector = PdfReader(ruta_pdf)
+        if lector.is_encrypted:
+            lector.decrypt('')
+        return lector
+
+    def agregar_pdf(self, pdf):
+        """
+        Copiar todas las páginas de un PDF (ruta o lector de abrir) y liberar el
+        lector al terminar; devuelve el número de páginas copiadas
+        """
+        from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+        lector = self.abrir(pdf) if isinstance(pdf, (str, os.PathLike)) else pdf
+
+        mapa = {}  # número de objeto en el lector -> número en la salida
+        en_curso = set()  # objetos en traducción (para detectar ciclos)
+
+        # Las referencias a páginas (enlaces, anotaciones) apuntan a las páginas nuevas
+        paginas = list(lector.pages)
+        numeros = []
+        for pagina in paginas:
+            numero = self._reservar()
+            numeros.append(numero)
+            if pagina.indirect_reference is not None:
+                mapa[pagina.indirect_reference.idnum] = numero
+
+        def copiar_indirecto(referencia):
+            # Los objetos referenciados se escriben antes que quien los usa, para
+            # que dos copias idénticas produzcan exactamente los mismos bytes
+            if referencia.idnum in mapa:
+                return mapa[referencia.idnum]
+            if referencia.idnum in en_curso:
+                # Referencia circular: se reserva el número sin deduplicar
+                mapa[referencia.idnum] = self._reservar()
+                return mapa[referencia.idnum]
+            en_curso.add(referencia.idnum)
+            copia = traducir(referencia.get_object())
+            en_curso.discard(referencia.idnum)
+            buffer = io.BytesIO()
+            copia.write_to_stream(buffer, None)
+            datos = buffer.getvalue()
+
+            if referencia.idnum in mapa:
+                numero = mapa[referencia.idnum]
+            elif self.deduplicar:
+                inicio = time.perf_counter()
+                clave = hashlib.blake2b(datos, digest_size=16).digest()
+                numero = self._por_hash.get(clave)
+                self.tiempo_optimizacion += time.perf_counter() - inicio
+                if numero is not None:
+                    self.objetos_deduplicados += 1
+                    self.bytes_deduplicados += len(datos)
+                    mapa[referencia.idnum] = numero
+                    return numero
+                numero = self._por_hash[clave] = self._reservar()
+            else:
+                numero = self._reservar()
+            mapa[referencia.idnum] = numero
+            self._escribir_bytes(numero, datos)
+            return numero
+
+        def traducir(valor):
+            if isinstance(valor, IndirectObject):
+                return IndirectObject(copiar_indirecto(valor), 0, None)
+            if isinstance(valor, StreamObject):
+                copia = valor.__class__()
+                copia._data = valor._data
+                for clave, v in valor.items():
+                    copia[clave] = traducir(v)
+                return self._comprimir_flujo(copia) if self.comprimir else copia
+            if isinstance(valor, DictionaryObject):
+                return DictionaryObject({clave: traducir(v) for clave, v in valor.items()})
+            if isinstance(valor, ArrayObject):
+                return ArrayObject([traducir(v) for v in valor])
+            return valor
+
+        for pagina, numero in zip(paginas, numeros):
+            nueva = DictionaryObject()
+            for clave, valor in pagina.items():
+                if clave not in ('/Parent', '/StructParents'):
+                    nueva[clave] = traducir(valor)
+            # Resolver atributos heredados del árbol de páginas original
+            for clave in self.ATRIBUTOS_HEREDABLES:
+                nodo = pagina.get('/Parent')
+                while clave not in nueva and nodo is not None:
+                    nodo = nodo.get_object()
+                    if clave in nodo:
+                        nueva[NameObject(clave)] = traducir(nodo.raw_get(clave))
+                    nodo = nodo.get('/Parent')
+            nueva[NameObject('/Parent')] = IndirectObject(self._num_arbol_paginas, 0, None)
+            self._escribir_objeto(numero, nueva)
+            self._kids.append(numero)
+        return len(paginas)
+
+    def cerrar(self):
+        """Escribir árbol de páginas, catálogo, tabla xref y trailer"""
+        from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject
+        arbol = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject([IndirectObject(n, 0, None) for n in self._kids]),
+            NameObject('/Count'): NumberObject(len(self._kids)),
+        })
+        self._escribir_objeto(self._num_arbol_paginas, arbol)
+        num_catalogo = self._reservar()
+        self._escribir_objeto(num_catalogo, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(self._num_arbol_paginas, 0, None),
+        }))
+
+        inicio_xref = self._f.tell()
+        lineas = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+        for offset in self._offsets[1:]:
+            # Números reservados que no llegaron a escribirse (PDF de entrada dañado)
+            lineas.append(f"{offset:010d} 00000 n \n" if offset is not None else "0000000000 65535 f \n")
+        self._f.write(''.join(lineas).encode())
+        self._f.write(f"trailer\n<< /Size {len(self._offsets)} /Root {num_catalogo} 0 R >>\n"
+                      f"startxref\n{inicio_xref}\n%%EOF\n".encode())
+        self._f.close()
+
+
+class FusionadorPDF:
+    """
+    Etapa de combinación en streaming. Cada PDF se agrega en cuanto está listo
+    y sus páginas se escriben a disco de inmediato. Opcionalmente divide la
+    salida en volúmenes por número de páginas o tamaño en bytes; un plano nunca
+    se reparte entre dos volúmenes. Los recursos compartidos se deduplican
+    dentro de cada volumen (ver EscritorPDFIncremental).
+    """
+
+    def __init__(self, salida, max_paginas=None, max_bytes=None, deduplicar=True, comprimir=False):
+        self.salida = salida
+        self.max_paginas = max_paginas or None
+        self.max_bytes = max_bytes or None
+        self.deduplicar = deduplicar
+        self.comprimir = comprimir
+        self.volumenes = []  # rutas de los volúmenes escritos
+        self.paginas = 0
+        self.estadisticas = {'objetos_deduplicados': 0, 'bytes_deduplicados': 0,
+                             'bytes_comprimidos': 0, 'tiempo_optimizacion': 0.0}
+        self._escritor = None
+
+    def _ruta_volumen(self, numero):
+        base, extension = os.path.splitext(self.salida)
+        return f"{base}_vol{numero:02d}{extension}"
+
+    def _eliminar_volumenes_anteriores(self):
+        """Borrar los <salida>_volNN de una combinación anterior, que ya no corresponden a esta"""
+        base, extension = os.path.splitext(self.salida)
+        for ruta in glob.glob(glob.escape(base) + '_vol*' + glob.escape(extension)):
+            if ruta[len(base) + 4:len(ruta) - len(extension)].isdigit():
+                try:
+                    os.remove(ruta)
+                except OSError as e:
+                    print(f"No se pudo eliminar el volumen anterior {ruta}: {e}")
+
+    def _cerrar_volumen(self):
+        self._escritor.cerrar()
+        for clave in self.estadisticas:
+            self.estadisticas[clave] += getattr(self._escritor, clave)
+        self._escritor = None
+
+    def _nuevo_volumen(self):
+        if self._escritor is not None:
+            self._cerrar_volumen()
+        if not self.volumenes:
+            self._eliminar_volumenes_anteriores()
+        if len(self.volumenes) == 1:
+            # Al abrir el segundo volumen, el primero pasa a llamarse _vol01
+            os.replace(self.volumenes[0], self._ruta_volumen(1))
+            self.volumenes[0] = self._ruta_volumen(1)
+        ruta = self.salida if not self.volumenes else self._ruta_volumen(len(self.volumenes) + 1)
+        self._escritor = EscritorPDFIncremental(ruta, deduplicar=self.deduplicar, comprimir=self.comprimir)
+        self.volumenes.append(ruta)
+
+    def agregar(self, ruta_pdf):
+        """Agregar un PDF completo; devuelve el número de páginas agregadas"""
+        # Un solo lector por PDF: sirve para decidir el volumen y para copiar las páginas
+        lector = EscritorPDFIncremental.abrir(ruta_pdf)
+        if self._escritor is None:
+            self._nuevo_volumen()
+        elif self._escritor.paginas:
+            # Comprobar si este PDF cabe en el volumen actual
+            excede_paginas = (self.max_paginas is not None and
+                              self._escritor.paginas + len(lector.pages) > self.max_paginas)
+            excede_bytes = (self.max_bytes is not None and
+                            self._escritor.bytes_escritos + os.path.getsize(ruta_pdf) > self.max_bytes)
+            if excede_paginas or excede_bytes:
+                self._nuevo_volumen()
+        paginas = self._escritor.agregar_pdf(lector)
+        self.paginas += paginas
+        return paginas
+
+    def cerrar(self):
+        """Terminar el volumen actual; devuelve la lista de volúmenes escritos"""
+        if self._escritor is not None:
+            self._cerrar_volumen()
+        return self.volumenes
+
+    def resumen(self):
+        """Texto con los bytes ahorrados por la optimización y el tiempo empleado"""
+        e = self.estadisticas
+        ahorrados = e['bytes_deduplicados'] + e['bytes_comprimidos']
+        return (f"{ahorrados / 1024:.0f} KB ahorrados ({e['objetos_deduplicados']} recursos "
+                f"deduplicados, {e['bytes_comprimidos'] / 1024:.0f} KB por compresión) "
+                f"en {e['tiempo_optimizacion'] * 1000:.0f} ms")
+
+
+def en_orden(resultados):
+    """
+    Reordenar resultados (índice, ...) que llegan en cualquier orden: cada uno
+    se entrega en cuanto están disponibles todos los de índice menor.
+    """
+    siguiente = 0
+    retenidos = {}
+    for resultado in resultados:
+        retenidos[resultado[0]] = resultado
+        while siguiente in retenidos:
+            yield retenidos.pop(siguiente)
+            siguiente += 1
+
+
+class ErrorInicioExportacion(Exception):
+    """No se pudo arrancar ninguna sesión del backend de exportación"""
+
+
+def convertir_lote(archivos, salida, backend='solidworks', opciones_backend=None,
+                   num_trabajadores=NUM_TRABAJADORES_EXPORTACION, max_paginas=0, max_bytes=0,
+                   comprimir=False, cache=None, manifiesto=None, al_avanzar=None, pool=None,
+                   tiempo_limite=TIEMPO_LIMITE_EXPORTACION, reintentos=REINTENTOS_EXPORTACION, anexos=None):
+    """
+    Flujo completo de conversión sin interfaz: reutiliza los PDFs cacheados,
+    exporta el resto en paralelo y combina todo en `salida` en el orden de
+    `archivos`, a medida que cada plano está listo. Si se pasa un `pool` ya
+    iniciado se usa (y se deja abierto) en lugar de arrancar uno nuevo. Los PDFs
+    de `anexos` (p. ej. los planos 2D vectoriales) se agregan al final, en la
+    misma pasada de combinación.
+
+    al_avanzar(completados, slddrw_path) se llama tras cada plano (y una vez con
+    slddrw_path=None después de consultar la cache). Devuelve un diccionario con
+    volúmenes escritos, páginas, bytes, planos exportados/cacheados/fallidos
+    (con su motivo), percentiles de latencia por intento, duración y resumen de
+    la optimización. Lanza ErrorInicioExportacion si el backend no arranca.
+    """
+    inicio = time.perf_counter()
+    total = len(archivos)
+    if manifiesto is not None:
+        manifiesto.guardar()
+
+    # Reutilizar los PDFs cacheados de los planos que no cambiaron
+    cacheados = []
+    pendientes = []
+    with TRAZADOR.tramo('consultar cache', 'lote', planos=total):
+        for idx, slddrw_path in enumerate(archivos):
+            pdf = cache.buscar(slddrw_path) if cache is not None else None
+            if pdf:
+                cacheados.append((idx, slddrw_path, pdf))
+                if manifiesto is not None:
+                    manifiesto.completados.add(slddrw_path)
+            else:
+                pendientes.append(idx)
+    if manifiesto is not None:
+        manifiesto.guardar()
+    completados = total - len(pendientes)
+    if al_avanzar:
+        al_avanzar(completados, None)
+
+    fusionador = FusionadorPDF(salida, max_paginas=max_paginas, max_bytes=max_bytes, comprimir=comprimir)
+    fallidos = []
+    exportados = 0
+    indices_pendientes = set(pendientes)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool_propio = pool is None and bool(pendientes)
+        if pool is not None and not pool_propio:
+            pool.nuevo_lote()
+        if pool_propio:
+            pool = PoolExportacion(backend, opciones_backend or {},
+                                   num_trabajadores=min(num_trabajadores, len(pendientes)),
+                                   tiempo_limite=tiempo_limite, reintentos=reintentos)
+            try:
+                with TRAZADOR.tramo('iniciar exportadores', 'lote', procesos=pool.num_trabajadores):
+                    pool.iniciar()
+            except Exception as e:
+                raise ErrorInicioExportacion(e) from e
+
+        def resultados():
+            # Primero los planos cacheados, después los exportados según terminan
+            yield from cacheados
+            if not pendientes:
+                return
+            archivos_pendientes = [archivos[idx] for idx in pendientes]
+            try:
+                for posicion, slddrw_path, pdf in pool.procesar(archivos_pendientes, temp_dir):
+                    if pdf:
+                        if cache is not None:
+                            pdf = cache.guardar(slddrw_path, pdf)
+                        if manifiesto is not None:
+                            manifiesto.marcar_completado(slddrw_path)
+                    yield pendientes[posicion], slddrw_path, pdf
+            finally:
+                if pool_propio:
+                    pool.cerrar()
+
+        # La combinación avanza en orden de selección mientras siguen las exportaciones
+        for idx, slddrw_path, pdf in en_orden(resultados()):
+            if pdf:
+                try:
+                    with TRAZADOR.tramo('combinar PDF', 'pdf', plano=os.path.basename(slddrw_path)):
+                        fusionador.agregar(pdf)
+                except Exception as e:
+                    print(f"Error al combinar {pdf}: {e}")
+                    fallidos.append(slddrw_path)
+            else:
+                fallidos.append(slddrw_path)
+            if idx in indices_pendientes:
+                exportados += 1 if pdf else 0
+                completados += 1
+                if al_avanzar:
+                    al_avanzar(completados, slddrw_path)
+        for ruta_pdf in anexos or ():
+            try:
+                with TRAZADOR.tramo('combinar PDF', 'pdf', plano=os.path.basename(ruta_pdf)):
+                    fusionador.agregar(ruta_pdf)
+            except Exception as e:
+                print(f"Error al combinar {ruta_pdf}: {e}")
+                fallidos.append(ruta_pdf)
+        with TRAZADOR.tramo('cerrar PDF', 'pdf'):
+            volumenes = fusionador.cerrar()
+
+    if not fusionador.paginas:
+        for volumen in volumenes:
+            os.remove(volumen)
+        volumenes = []
+    elif manifiesto is not None:
+        manifiesto.finalizar()
+    return {
+        'volumenes': volumenes,
+        'paginas': fusionador.paginas,
+        'bytes': sum(os.path.getsize(v) for v in volumenes),
+        'exportados': exportados,
+        'motivos_fallo': {f: pool.fallos.get(f, "error al combinar") for f in fallidos} if pool else {},
+        'latencia': pool.percentiles_latencia() if pool else None,
+        'cacheados': len(cacheados),
+        'fallidos': fallidos,
+        'segundos': time.perf_counter() - inicio,
+        'optimizacion': fusionador.resumen(),
+    }
+
+
+class VigilanteCarpeta:
+    """
+    Detecta planos .SLDDRW nuevos o modificados en una carpeta. En Windows usa
+    ReadDirectoryChangesW desde un hilo en segundo plano; si no está disponible
+    o la notificación falla (p. ej. en algunos recursos de red) recurre a sondear
+    la carpeta comparando tamaño y fecha de cada plano.
+    """
+
+    def __init__(self, carpeta, recursivo=False, intervalo=1.0):
+        self.carpeta = os.path.abspath(carpeta)
+        self.recursivo = recursivo
+        self.intervalo = intervalo
+        self._eventos = queue.Queue()
+        self._firmas = self.escanear()
+        self.modo = 'sondeo'
+        if win32file.disponible:
+            self.modo = 'notificacion'
+            threading.Thread(target=self._escuchar, daemon=True).start()
+
+    @staticmethod
+    def es_plano(ruta):
+        nombre = os.path.basename(ruta)
+        # Los archivos ~$ son bloqueos temporales de SolidWorks
+        return nombre.lower().endswith('.slddrw') and not nombre.startswith('~$')
+
+    def escanear(self):
+        """Todos los planos de la carpeta con su firma (tamaño, mtime_ns)"""
+        patron = os.path.join(self.carpeta, '**', '*') if self.recursivo else os.path.join(self.carpeta, '*')
+        firmas = {}
+        for ruta in glob.glob(patron, recursive=self.recursivo):
+            if self.es_plano(ruta):
+                try:
+                    stat = os.stat(ruta)
+                except OSError:
+                    continue
+                firmas[ruta] = (stat.st_size, stat.st_mtime_ns)
+        return firmas
+
+    def _escuchar(self):
+        try:
+            FILE_LIST_DIRECTORY = 0x0001
+            handle = win32file.CreateFile(
+                self.carpeta, FILE_LIST_DIRECTORY,
+                win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+                None, win32con.OPEN_EXISTING, win32con.FILE_FLAG_BACKUP_SEMANTICS, None)
+            filtro = (win32con.FILE_NOTIFY_CHANGE_FILE_NAME | win32con.FILE_NOTIFY_CHANGE_SIZE |
+                      win32con.FILE_NOTIFY_CHANGE_LAST_WRITE)
+            while True:
+                for _, nombre in win32file.ReadDirectoryChangesW(handle, 64 * 1024, self.recursivo, filtro, None, None):
+                    self._eventos.put(os.path.join(self.carpeta, nombre))
+        except Exception as e:
+            print(f"Notificación de cambios no disponible ({e}); se sondeará la carpeta")
+            self.modo = 'sondeo'
+            self._eventos.put(None)
+
+    def cambios(self, detener=None):
+        """
+        Esperar hasta `intervalo` segundos y devolver el conjunto de planos que
+        aparecieron o cambiaron desde la llamada anterior.
+        """
+        if self.modo == 'notificacion':
+            rutas = set()
+            try:
+                rutas.add(self._eventos.get(timeout=self.intervalo))
+                while True:
+                    rutas.add(self._eventos.get_nowait())
+            except queue.Empty:
+                pass
+            rutas.discard(None)
+            return {r for r in rutas if self.es_plano(r)}
+
+        if detener is not None:
+            detener.wait(self.intervalo)
+        else:
+            time.sleep(self.intervalo)
+        firmas = self.escanear()
+        cambiados = {r for r, firma in firmas.items() if self._firmas.get(r) != firma}
+        self._firmas = firmas
+        return cambiados
+
+
+class EstabilizadorArchivos:
+    """
+    Antirrebote de planos que aún se están copiando: un archivo se da por listo
+    cuando su tamaño y fecha no cambian durante `espera` segundos y se puede
+    abrir para lectura (en Windows falla mientras otro proceso lo escribe).
+    """
+
+    def __init__(self, espera=ESPERA_ESTABILIDAD):
+        self.espera = espera
+        self._observados = {}  # ruta -> (firma, instante del último cambio)
+
+    def observar(self, ruta):
+        self._observados.setdefault(ruta, (None, time.monotonic()))
+
+    def __len__(self):
+        return len(self._observados)
+
+    def listos(self):
+        """Devolver (y dejar de observar) los archivos que ya son estables"""
+        ahora = time.monotonic()
+        listos = []
+        for ruta, (firma_anterior, desde) in list(self._observados.items()):
+            try:
+                stat = os.stat(ruta)
+            except OSError:
+                del self._observados[ruta]  # borrado o renombrado
+                continue
+            firma = (stat.st_size, stat.st_mtime_ns)
+            if firma != firma_anterior:
+                self._observados[ruta] = (firma, ahora)
+                continue
+            if ahora - desde < self.espera:
+                continue
+            try:
+                with open(ruta, 'rb'):
+                    pass
+            except OSError:
+                continue
+            del self._observados[ruta]
+            listos.append(ruta)
+        return sorted(listos)
+
+
+def vigilar_carpeta(carpeta, destino=None, salida_combinada=None, backend='solidworks',
+                    opciones_backend=None, num_trabajadores=NUM_TRABAJADORES_EXPORTACION,
+                    espera=ESPERA_ESTABILIDAD, recursivo=False, intervalo=1.0,
+                    detener=None, al_convertir=None,
+                    tiempo_limite=TIEMPO_LIMITE_EXPORTACION, reintentos=REINTENTOS_EXPORTACION):
+    """
+    Modo vigilancia: convierte cada plano que llega o cambia en `carpeta` y deja
+    su PDF en `destino`. Las sesiones del backend se mantienen abiertas entre
+    lotes, así que cada plano nuevo solo paga la exportación. Si se indica
+    `salida_combinada`, el paquete combinado de todos los planos de la carpeta
+    se regenera tras cada lote (desde la cache, sin volver a exportar).
+
+    Se ejecuta hasta que se activa el threading.Event `detener` o Ctrl+C.
+    al_convertir(slddrw_path, pdf) se llama por cada plano procesado. Si las
+    sesiones mueren y no se pueden reabrir, los planos esperan al ciclo
+    siguiente, que vuelve a intentar arrancarlas.
+    """
+    destino = os.path.abspath(destino or os.path.join(carpeta, 'PDF'))
+    os.makedirs(destino, exist_ok=True)
+    if salida_combinada:
+        salida_combinada = os.path.abspath(salida_combinada)
+        os.makedirs(os.path.dirname(salida_combinada), exist_ok=True)
+    vigilante = VigilanteCarpeta(carpeta, recursivo=recursivo, intervalo=intervalo)
+    estabilizador = EstabilizadorArchivos(espera)
+    cache = CacheConversion()
+    pool = PoolExportacion(backend, opciones_backend, num_trabajadores=num_trabajadores,
+                           tiempo_limite=tiempo_limite, reintentos=reintentos)
+    try:
+        pool.iniciar()
+    except Exception as e:
+        raise ErrorInicioExportacion(e) from e
+    pool_activo = True
+    print(f"Vigilando {vigilante.carpeta} ({vigilante.modo}); PDFs en {destino}")
+
+    # Los planos que ya estaban en la carpeta también se revisan (la cache evita reexportarlos)
+    for ruta in vigilante.escanear():
+        estabilizador.observar(ruta)
+    try:
+        with pool:
+            while detener is None or not detener.is_set():
+                for ruta in vigilante.cambios(detener):
+                    estabilizador.observar(ruta)
+                listos = estabilizador.listos()
+                if not listos:
+                    continue
+
+                pendientes = []
+                for slddrw_path in listos:
+                    pdf = cache.buscar(slddrw_path)
+                    if pdf:
+                        _publicar_pdf(slddrw_path, pdf, destino, al_convertir)
+                    else:
+                        pendientes.append(slddrw_path)
+                if pendientes and not pool_activo:
+                    pool_activo = _reiniciar_pool(pool)
+                    if not pool_activo:
+                        for slddrw_path in pendientes:
+                            estabilizador.observar(slddrw_path)
+                        continue
+                if pendientes:
+                    print(f"Exportando {len(pendientes)} plano(s)...")
+                    pool.nuevo_lote()
+                    with tempfile.TemporaryDirectory() as temp_dir:
+                        try:
+                            for _, slddrw_path, pdf in pool.procesar(pendientes, temp_dir):
+                                if pdf:
+                                    pdf = cache.guardar(slddrw_path, pdf)
+                                else:
+                                    print(f"Error exportando {slddrw_path}")
+                                _publicar_pdf(slddrw_path, pdf, destino, al_convertir)
+                        except RuntimeError as e:
+                            # Todas las sesiones murieron: se reinicia el pool y se reintenta más tarde
+                            print(f"{e}; reiniciando exportadores")
+                            pool_activo = _reiniciar_pool(pool)
+                            for slddrw_path in pendientes:
+                                if cache.buscar(slddrw_path) is None:
+                                    estabilizador.observar(slddrw_path)
+
+                if salida_combinada and pool_activo:
+                    _actualizar_paquete(sorted(vigilante.escanear()), salida_combinada, cache, pool)
+    except KeyboardInterrupt:
+        pass
+    print("Vigilancia detenida")
+
+
+def _reiniciar_pool(pool):
+    """Cerrar y volver a arrancar las sesiones del pool; devuelve False si no arrancan"""
+    pool.cerrar()
+    try:
+        pool.iniciar()
+    except Exception as e:
+        print(f"Error reiniciando los exportadores: {e}; se reintentará en el próximo ciclo")
+        return False
+    return True
+
+
+def _actualizar_paquete(archivos, salida, cache, pool):
+    """Regenerar el paquete combinado del modo vigilancia e informar de lo que no se pudo combinar"""
+    try:
+        resultado = convertir_lote(archivos, salida, cache=cache, pool=pool)
+    except Exception as e:
+        print(f"Error al actualizar el paquete combinado {salida}: {e}")
+        return
+    for slddrw_path, motivo in resultado['motivos_fallo'].items():
+        print(f"Error en el paquete combinado: {os.path.basename(slddrw_path)} ({motivo})")
+    if resultado['paginas']:
+        print(f"Paquete combinado actualizado: {resultado['paginas']} páginas")
+    else:
+        print(f"Error al actualizar el paquete combinado {salida}: no se combinó ninguna página")
+
+
+def _publicar_pdf(slddrw_path, pdf, destino, al_convertir=None):
+    """Copiar el PDF de un plano a la carpeta de destino sin dejar copias a medias"""
+    if pdf:
+        final = os.path.join(destino, os.path.splitext(os.path.basename(slddrw_path))[0] + '.pdf')
+        temporal = final + '.tmp'
+        try:
+            shutil.copyfile(pdf, temporal)
+            os.replace(temporal, final)
+            print(f"Convertido: {os.path.basename(slddrw_path)} -> {final}")
+        except OSError as e:
+            # Por ejemplo, el PDF anterior está abierto en un visor
+            print(f"No se pudo escribir {final}: {e}")
+            pdf = None
+    if al_convertir:
+        al_convertir(slddrw_path, pdf)
+
+
+def exportar_a_pdf(swApp, slddrw_path, temp_dir):
+    from win32com.client import VARIANT
+    import pythoncom
+    swDocDRAWING = 3
+    swOpenDocOptions_Silent = 64
+    errors = VARIANT(pythoncom.VT_BYREF | pythoncom.VT_I4, 0)
+    warnings = VARIANT(pythoncom.VT_BYREF | pythoncom.VT_I4, 0)
+    nombre = os.path.basename(slddrw_path)
+    with TRAZADOR.tramo('OpenDoc6', 'com', plano=nombre):
+        drawing = swApp.OpenDoc6(slddrw_path, swDocDRAWING, swOpenDocOptions_Silent, '', errors, warnings)
+    if drawing is None:
+        print(f"No se pudo abrir {os.path.basename(slddrw_path)}")
+        return None
+    pdf_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(slddrw_path))[0] + '.pdf')
+    try:
+        with TRAZADOR.tramo('SaveAs PDF', 'com', plano=nombre):
+            result = drawing.SaveAs(pdf_path)
+        if result:
+            print(f"Guardado: {pdf_path}")
+            return pdf_path
+        else:
+            print(f"Error al guardar {pdf_path}")
+            return None
+    except Exception as e:
+        print(f"Error exportando {os.path.basename(slddrw_path)}: {e}")
+        return None
+    finally:
+        with TRAZADOR.tramo('CloseDoc', 'com', plano=nombre):
+            swApp.CloseDoc(os.path.basename(slddrw_path))
+
+
+def main():
+    root = tk.Tk()
+    app = App(root)
+    root.mainloop()
+
+
+def expandir_entradas(entradas, recursivo=False):
+    """
+    Convertir la lista de entradas de la línea de comandos (archivos, carpetas
+    o patrones glob) en la lista de planos .SLDDRW, sin repetidos y en orden.
+    """
+    archivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            patron = os.path.join(entrada, '**', '*') if recursivo else os.path.join(entrada, '*')
+            candidatos = sorted(f for f in glob.glob(patron, recursive=recursivo)
+                                if f.lower().endswith('.slddrw'))
+        elif os.path.isfile(entrada):
+            candidatos = [entrada]
+        else:
+            candidatos = sorted(f for f in glob.glob(entrada, recursive=True) if os.path.isfile(f))
+            if not candidatos:
+                print(f"Sin coincidencias: {entrada}")
+        archivos.extend(os.path.abspath(f) for f in candidatos)
+    return list(dict.fromkeys(archivos))
+
+
+def main_cli(argv=None):
+    """
+    Conversión por lotes sin interfaz gráfica.
+
+    Códigos de salida: 0 todo convertido, 1 algún plano falló (el PDF combinado
+    se escribe con el resto), 2 no se generó ningún PDF (sin entradas, el backend
+    no arrancó o fallaron todos los planos).
+    """
+    parser = argparse.ArgumentParser(
+        description="Convierte planos .SLDDRW a PDF y los combina en un solo documento.")
+    parser.add_argument('entradas', nargs='+', help="archivos .SLDDRW, carpetas o patrones glob")
+    parser.add_argument('-o', '--salida',
+                        help="PDF combinado (por defecto Planos_Combinados.pdf junto al primer plano)")
+    parser.add_argument('-r', '--recursivo', action='store_true', help="buscar planos en subcarpetas")
+    parser.add_argument('-j', '--trabajadores', type=int, default=NUM_TRABAJADORES_EXPORTACION,
+                        help="procesos de exportación en paralelo")
+    parser.add_argument('--backend', choices=sorted(BACKENDS_EXPORTACION), default='solidworks',
+                        help="backend de exportación ('local' genera PDFs de prueba sin SolidWorks)")
+    parser.add_argument('--opcion', action='append', default=[], metavar='CLAVE=VALOR',
+                        help="opción del backend, p. ej. --opcion latencia=0.5 (repetible)")
+    parser.add_argument('--dividir-paginas', type=int, default=0, metavar='N',
+                        help="dividir el PDF combinado en volúmenes de N páginas")
+    parser.add_argument('--dividir-mb', type=int, default=0, metavar='MB',
+                        help="dividir el PDF combinado en volúmenes de MB megabytes")
+    parser.add_argument('--comprimir', action='store_true', help="comprimir los flujos sin filtro")
+    parser.add_argument('--sin-cache', action='store_true', help="exportar todos los planos aunque estén cacheados")
+    parser.add_argument('--tiempo-limite', type=float, default=TIEMPO_LIMITE_EXPORTACION, metavar='SEG',
+                        help="segundos máximos por plano antes de reiniciar su sesión y reintentarlo")
+    parser.add_argument('--reintentos', type=int, default=REINTENTOS_EXPORTACION, metavar='N',
+                        help="reintentos de un plano colgado antes de darlo por fallido")
+    parser.add_argument('--traza', metavar='JSON',
+                        help=f"guardar una traza de etapas (formato Chrome) e imprimir el resumen; "
+                             f"equivale a {VARIABLE_TRAZA}=JSON")
+    parser.add_argument('--vigilar', action='store_true',
+                        help="vigilar la carpeta indicada y convertir cada plano que llegue o cambie "
+                             "(con -o se mantiene además el paquete combinado)")
+    parser.add_argument('--destino', help="carpeta de los PDFs individuales en modo vigilancia "
+                                          "(por defecto PDF dentro de la carpeta vigilada)")
+    parser.add_argument('--espera', type=float, default=ESPERA_ESTABILIDAD, metavar='SEG',
+                        help="segundos sin cambios antes de convertir un plano en modo vigilancia")
+    parser.add_argument('--vistas-2d', nargs='+', default=[], metavar='STL',
+                        help="piezas STL cuyas vistas 2D se escriben en un PDF vectorial "
+                             "(<salida>_Vistas2D.pdf) y se agregan al final del PDF combinado")
+    args = parser.parse_args(argv)
+    if args.traza and not TRAZADOR.activo:
+        TRAZADOR.activar(args.traza)
+
+    opciones_backend = {}
+    for opcion in args.opcion:
+        clave, separador, valor = opcion.partition('=')
+        if not separador:
+            parser.error(f"opción de backend no válida: {opcion}")
+        try:
+            opciones_backend[clave] = json.loads(valor)
+        except ValueError:
+            opciones_backend[clave] = valor
+
+    if args.vigilar:
+        if len(args.entradas) != 1 or not os.path.isdir(args.entradas[0]):
+            parser.error("--vigilar requiere una única carpeta")
+        try:
+            vigilar_carpeta(args.entradas[0], destino=args.destino, salida_combinada=args.salida,
+                            backend=args.backend, opciones_backend=opciones_backend,
+                            num_trabajadores=max(1, args.trabajadores), espera=args.espera,
+                            recursivo=args.recursivo, tiempo_limite=args.tiempo_limite,
+                            reintentos=max(0, args.reintentos))
+        except ErrorInicioExportacion as e:
+            print(f"Error iniciando el backend de exportación: {e}")
+            return 2
+        return 0
+
+    archivos = expandir_entradas(args.entradas, args.recursivo)
+    if not archivos:
+        print("No se encontraron planos .SLDDRW.")
+        return 2
+    salida = os.path.abspath(args.salida or os.path.join(os.path.dirname(archivos[0]), "Planos_Combinados.pdf"))
+    if os.path.dirname(salida):
+        os.makedirs(os.path.dirname(salida), exist_ok=True)
+
+    def al_avanzar(completados, slddrw_path):
+        if slddrw_path is None:
+            print(f"{completados}/{len(archivos)} planos sin cambios")
+        else:
+            print(f"[{completados}/{len(archivos)}] {os.path.basename(slddrw_path)}")
+
+    anexos = []
+    if args.vistas_2d:
+        def piezas():
+            # Cada STL se lee cuando se van a escribir sus hojas, no todos antes
+            for stl_path in args.vistas_2d:
+                try:
+                    vistas = vistas_plano_stl(stl_path)
+                except Exception as e:
+                    print(f"Error leyendo {stl_path}: {e}")
+                    continue
+                yield os.path.splitext(os.path.basename(stl_path))[0], vistas
+
+        ruta_vistas = os.path.splitext(salida)[0] + "_Vistas2D.pdf"
+        with TRAZADOR.tramo('vistas 2D', 'pdf', piezas=len(args.vistas_2d)):
+            hojas = exportar_planos_pdf(piezas(), ruta_vistas)
+        if hojas:
+            print(f"Vistas 2D: {hojas} hojas en {ruta_vistas}")
+            anexos.append(ruta_vistas)
+        else:
+            print("Vistas 2D: no se generó ninguna hoja")
+
+    try:
+        with TRAZADOR.tramo('convertir lote', 'lote', planos=len(archivos)):
+            resultado = convertir_lote(
+                archivos, salida, backend=args.backend, opciones_backend=opciones_backend,
+                num_trabajadores=max(1, args.trabajadores), max_paginas=args.dividir_paginas,
+                max_bytes=args.dividir_mb * 1024 * 1024, comprimir=args.comprimir,
+                cache=None if args.sin_cache else CacheConversion(), al_avanzar=al_avanzar,
+                tiempo_limite=args.tiempo_limite, reintentos=max(0, args.reintentos), anexos=anexos)
+    except ErrorInicioExportacion as e:
+        print(f"Error iniciando el backend de exportación: {e}")
+        return 2
+
+    segundos = max(resultado['segundos'], 1e-9)
+    for volumen in resultado['volumenes']:
+        print(f"PDF combinado: {volumen}")
+    print(f"{len(archivos)} planos ({resultado['exportados']} exportados, {resultado['cacheados']} "
+          f"cacheados, {len(resultado['fallidos'])} fallidos) en {segundos:.2f} s")
+    print(f"{len(archivos) / segundos:.2f} planos/s, {resultado['paginas'] / segundos:.2f} páginas/s, "
+          f"{resultado['bytes'] / 1024:.0f} KB escritos")
+    if resultado['latencia']:
+        print("Latencia por intento: " + ", ".join(f"{clave} {valor:.2f} s"
+                                                  for clave, valor in resultado['latencia'].items()))
+    print(f"Optimización: {resultado['optimizacion']}")
+    for slddrw_path in resultado['fallidos']:
+        print(f"Fallido: {slddrw_path} ({resultado['motivos_fallo'].get(slddrw_path, 'error')})")
+
+    if not resultado['volumenes']:
+        return 2
+    return 1 if resultado['fallidos'] else 0
 
-def main():
-    root = tk.Tk()
-    app = App(root)
-    root.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        sys.exit(main_cli())
     main()
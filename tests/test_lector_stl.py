@@ -0,0 +1,74 @@
+"""Detección del formato de STL en LectorSTL (binario con cola, cabeceras "solid")"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import convert_slddrw_to_pdf as solidpdf  # noqa: E402
+
+TRIANGULOS = np.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]],
+                       [[0, 0, 0], [0, 1, 0], [0, 0, 1]]], dtype=np.float32)
+
+
+def escribir_binario(ruta, cabecera, cola=b''):
+    registros = np.zeros(len(TRIANGULOS), dtype=solidpdf.DTYPE_TRIANGULO_STL)
+    registros['vertices'] = TRIANGULOS
+    with open(ruta, 'wb') as f:
+        f.write(cabecera.ljust(80, b' '))
+        f.write(np.uint32(len(registros)).tobytes())
+        f.write(registros.tobytes())
+        f.write(cola)
+
+
+def test_binario_con_bytes_al_final(tmp_path):
+    ruta = tmp_path / 'cola.stl'
+    escribir_binario(ruta, b'exportador', cola=b'\0' * 37)
+    lector = solidpdf.LectorSTL(str(ruta))
+    assert lector.binario
+    np.testing.assert_array_equal(lector.leer_todo(), TRIANGULOS)
+
+
+def test_binario_con_cabecera_solid_facet_y_bytes_al_final(tmp_path):
+    ruta = tmp_path / 'solid_facet.stl'
+    escribir_binario(ruta, b'solid pieza exportada: 2 facets', cola=b'fin')
+    lector = solidpdf.LectorSTL(str(ruta))
+    assert lector.binario
+    np.testing.assert_array_equal(lector.leer_todo(), TRIANGULOS)
+
+
+def test_ascii(tmp_path):
+    ruta = tmp_path / 'ascii.stl'
+    facetas = "".join(
+        "  facet normal 0 0 1\n    outer loop\n"
+        + "".join(f"      vertex {x} {y} {z}\n" for x, y, z in triangulo)
+        + "    endloop\n  endfacet\n" for triangulo in TRIANGULOS.tolist())
+    ruta.write_text(f"solid pieza\n{facetas}endsolid pieza\n")
+    lector = solidpdf.LectorSTL(str(ruta))
+    assert not lector.binario
+    np.testing.assert_array_equal(lector.leer_todo(), TRIANGULOS)
+
+
+def test_binario_truncado(tmp_path):
+    ruta = tmp_path / 'truncado.stl'
+    escribir_binario(ruta, b'exportador')
+    with open(ruta, 'r+b') as f:
+        f.truncate(os.path.getsize(ruta) - 20)
+    with pytest.raises(ValueError):
+        solidpdf.LectorSTL(str(ruta))
+
+
+def test_indexar_por_bloques_igual_que_completo(tmp_path):
+    ruta = tmp_path / 'bloques.stl'
+    rejilla = np.random.default_rng(0).integers(0, 6, size=(40, 3, 3)).astype(np.float32)
+    registros = np.zeros(len(rejilla), dtype=solidpdf.DTYPE_TRIANGULO_STL)
+    registros['vertices'] = rejilla
+    with open(ruta, 'wb') as f:
+        f.write(b' ' * 80 + np.uint32(len(registros)).tobytes() + registros.tobytes())
+    lector = solidpdf.LectorSTL(str(ruta), tam_bloque=7)
+    vertices, caras = lector.indexar()
+    esperados, _ = solidpdf.indexar_triangulos(rejilla)
+    np.testing.assert_array_equal(vertices, esperados)
+    np.testing.assert_array_equal(vertices[caras], rejilla)